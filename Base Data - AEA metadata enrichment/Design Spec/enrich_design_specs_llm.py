@@ -10,6 +10,7 @@ Writes: data/design_specs_enriched.jsonl
 
 import argparse
 import hashlib
+import importlib.util
 import json
 import os
 import re
@@ -25,12 +26,22 @@ from openai import OpenAI
 
 from utils import norm_text, read_jsonl, write_jsonl, split_bullets, parse_bool
 
+# Shared SQLite cache from Round 2 - US replication/US_Aggregate_2/Scripts
+_kv_spec = importlib.util.spec_from_file_location(
+    "kv_cache", Path(__file__).resolve().parents[2] / "Round 2 - US replication"
+    / "US_Aggregate_2" / "Scripts" / "kv_cache.py"
+)
+kv_cache = importlib.util.module_from_spec(_kv_spec)
+_kv_spec.loader.exec_module(kv_cache)
+
 # ----------------- configuration -----------------
 
 PROMPT_VERSION = "v3.1"
 DEFAULT_MODEL = "gpt-5.2"
 PROCESS_N_ROWS = 0  # 0 = all; set to e.g. 5 for testing
 USE_BATCH_API = True  # Set to True to generate batch_input.jsonl instead of running sync
+DATA_DIR = Path(__file__).resolve().parent / "data"
+CACHE_NS = "enrich_design_specs"  # namespace in data/Caches/cache.sqlite (kv_cache.py)
 
 DESIGN_TYPE_ENUM = [
     "simple_multiarm", "factorial", "encouragement", "cluster_rct", 
@@ -275,16 +286,10 @@ def validate_extraction(extracted: Dict[str, Any], input_text: str) -> Tuple[boo
     ok = len(critical_errors) == 0
     return ok, errors
 
-def load_cache(cache_path: Path) -> Dict[str, Any]:
-    if not cache_path.exists():
-        return {}
-    try:
-        return json.loads(cache_path.read_text(encoding="utf-8"))
-    except Exception:
-        return {}
-
-def save_cache(cache_path: Path, cache: Dict[str, Any]) -> None:
-    cache_path.write_text(json.dumps(cache, ensure_ascii=False, indent=2), encoding="utf-8")
+def load_cache(legacy_path: Path):
+    """Dict-like SQLite cache; each assignment is persisted at once.
+    The old JSON cache at legacy_path is imported on first use."""
+    return kv_cache.open_cache(DATA_DIR, CACHE_NS, legacy=legacy_path)
 
 @dataclass
 class LLMResult:
@@ -382,7 +387,7 @@ def main():
     ap.add_argument("--model", dest="model", default=DEFAULT_MODEL, help=f"OpenAI model (default: {DEFAULT_MODEL})")
     ap.add_argument("--max", dest="max_n", type=int, default=PROCESS_N_ROWS, help=f"Process at most N rows (0 = all). Default: {PROCESS_N_ROWS}")
     ap.add_argument("--sleep", dest="sleep_s", type=float, default=0.0, help="Sleep seconds between calls")
-    ap.add_argument("--cache", dest="cache", default=".llm_cache_design_extract.json", help="Cache file path (json)")
+    ap.add_argument("--cache", dest="cache", default=".llm_cache_design_extract.json", help="Legacy JSON cache, imported into data/Caches/cache.sqlite on first run")
     args = ap.parse_args()
 
     in_path = Path(args.inp)
@@ -493,7 +498,6 @@ def main():
                 "prompt_version": PROMPT_VERSION,
                 "model": args.model,
             }
-            save_cache(cache_path, cache)
 
             if args.sleep_s > 0:
                 time.sleep(args.sleep_s)
@@ -529,7 +533,7 @@ def main():
     print(f"Wrote: {out_path}")
     print(f"Validated OK: {n_ok}")
     print(f"Needs manual: {n_manual}")
-    print(f"Cache: {cache_path}")
+    print(f"Cache: {cache.path} ({CACHE_NS})")
 
 if __name__ == "__main__":
     if not os.environ.get("OPENAI_API_KEY"):
@@ -18,7 +18,7 @@ Usage:
     python compare_aggregate.py [--config no_reasoning]
 """
 
-import argparse, csv, json
+import argparse, csv, importlib.util, json, sys
 from collections import defaultdict
 from difflib import SequenceMatcher
 from pathlib import Path
@@ -28,6 +28,17 @@ from scipy import stats
 SCRIPT_DIR = Path(__file__).resolve().parent
 DATA_DIR   = SCRIPT_DIR.parents[1] / "Data"
 
+# Parquet store reader from the aggregate pipeline (US_Aggregate_2/Scripts)
+_AGG_SCRIPTS = SCRIPT_DIR.parents[2] / "US_Aggregate_2" / "Scripts"
+sys.path.insert(0, str(_AGG_SCRIPTS))   # sim_store imports jsonl_io from there
+_store_spec  = importlib.util.spec_from_file_location(
+    "sim_store", _AGG_SCRIPTS / "sim_store.py"
+)
+_store = importlib.util.module_from_spec(_store_spec)
+_store_spec.loader.exec_module(_store)
+
+read_cell_values = _store.read_cell_values
+
 # Default GT file is the clean aligned extraction; fall back to old file if needed.
 _DEFAULT_GT = "study_enriched_aggregate.jsonl"
 
@@ -71,7 +82,13 @@ print(f"GT     : {ENRICHED.name}")
 # ---------------------------------------------------------------------------
 
 def load_sim(path: Path) -> dict[tuple, list]:
-    """Returns {(seq_id, arm_id, outcome_id): [values]}"""
+    """Returns {(seq_id, arm_id, outcome_id): [values]}
+
+    Reads only the value columns from the Parquet store (sim_store.py) when it
+    is current for `path`; otherwise decodes the JSONL."""
+    cells = read_cell_values(path)
+    if cells is not None:
+        return defaultdict(list, cells)
     sums: dict[tuple, list] = defaultdict(list)
     for line in open(path):
         r = json.loads(line)
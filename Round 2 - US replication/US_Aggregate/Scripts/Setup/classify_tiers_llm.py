@@ -26,6 +26,7 @@ Run from this script's directory:
 import argparse
 import asyncio
 import hashlib
+import importlib.util
 import json
 import os
 import re
@@ -39,7 +40,14 @@ from openai import AsyncOpenAI
 DATA_DIR  = Path(__file__).resolve().parents[2] / "Data"
 INPUT     = DATA_DIR / "Pipeline" / "expanded_us_pool.jsonl"
 OUTPUT    = DATA_DIR / "Pipeline" / "tier_classified.jsonl"
-CACHE_FILE = DATA_DIR / "Caches" / ".tier_cache.json"
+CACHE_NS   = "classify_tiers"   # namespace in Data/Caches/cache.sqlite (kv_cache.py)
+
+# Shared SQLite cache from US_Aggregate_2/Scripts
+_kv_spec = importlib.util.spec_from_file_location(
+    "kv_cache", Path(__file__).resolve().parents[3] / "US_Aggregate_2" / "Scripts" / "kv_cache.py"
+)
+kv_cache = importlib.util.module_from_spec(_kv_spec)
+_kv_spec.loader.exec_module(kv_cache)
 
 DEFAULT_MODEL   = "gpt-5.4-mini"  # fast + cheap for classification at 192 studies
 MAX_CONCURRENT  = 20
@@ -94,16 +102,10 @@ def cache_key(rec: dict) -> str:
     return hashlib.md5(text.encode()).hexdigest()
 
 
-def load_cache() -> dict:
-    if CACHE_FILE.exists():
-        with open(CACHE_FILE) as f:
-            return json.load(f)
-    return {}
-
-
-def save_cache(cache: dict):
-    with open(CACHE_FILE, "w") as f:
-        json.dump(cache, f, indent=2)
+def load_cache():
+    """Dict-like SQLite cache; each assignment is persisted at once.
+    The old .tier_cache.json is imported on first use."""
+    return kv_cache.open_cache(DATA_DIR, CACHE_NS)
 
 
 JSON_INSTRUCTION = """
@@ -128,7 +130,7 @@ async def classify_one(
     client: AsyncOpenAI,
     sem: asyncio.Semaphore,
     rec: dict,
-    cache: dict,
+    cache,
     model: str,
 ) -> dict:
     key = cache_key(rec)
@@ -184,10 +186,8 @@ async def run(model: str, limit: int):
         results.append(result)
         done += 1
         if done % 10 == 0 or done == len(tasks):
-            save_cache(cache)
             print(f"  {done}/{len(tasks)} done", end="\r")
 
-    save_cache(cache)
     print()
 
     # Sort back to original order
@@ -32,11 +32,10 @@ Usage:
     python extract_effects_gt.py [--model gpt-4.1] [--force]
 """
 
-import argparse, asyncio, json, re, time
+import argparse, asyncio, importlib.util, json, re, sys, time
 from pathlib import Path
 from typing import Any
 
-import pdfplumber
 from openai import AsyncOpenAI, RateLimitError, APIConnectionError, APIError
 
 # ---------------------------------------------------------------------------
@@ -50,6 +49,22 @@ PAPERS_ROOT  = DATA_DIR / "Papers"
 OUTPUT_PATH  = DATA_DIR / "Ground_Truth" / "study_effects_gt.jsonl"
 CACHE_PATH   = DATA_DIR / "Caches" / ".extract_effects_cache.json"
 
+# Cached PDF text extraction and the paper index from US_Aggregate_2/Scripts
+_AGG_SCRIPTS = SCRIPT_DIR.parents[2] / "US_Aggregate_2" / "Scripts"
+sys.path.insert(0, str(_AGG_SCRIPTS))   # pdf_text imports kv_cache from there
+_pdf_spec    = importlib.util.spec_from_file_location(
+    "pdf_text", _AGG_SCRIPTS / "pdf_text.py"
+)
+_pdf = importlib.util.module_from_spec(_pdf_spec)
+_pdf_spec.loader.exec_module(_pdf)
+_idx_spec    = importlib.util.spec_from_file_location(
+    "paper_index", _AGG_SCRIPTS / "paper_index.py"
+)
+_idx = importlib.util.module_from_spec(_idx_spec)
+_idx_spec.loader.exec_module(_idx)
+
+extract_pdf_text = _pdf.extract_pdf_text
+
 MAX_PDF_CHARS  = 90_000
 MAX_CONCURRENT = 4
 DEFAULT_MODEL  = "gpt-4.1"
@@ -83,36 +98,21 @@ def slugify(s: str) -> str:
 # PDF helpers
 # ---------------------------------------------------------------------------
 
+_papers = None   # PaperIndex (paper_index.py), built once on first use
+
+
+def papers():
+    global _papers
+    if _papers is None:
+        _papers = _idx.PaperIndex.load(PAPERS_ROOT)
+        _papers.report_duplicates()
+    return _papers
+
+
 def find_pdfs(seq_id: int) -> list[Path]:
-    """Return primary PDFs for a study (excludes *_supplement.pdf)."""
-    found = []
-    for f in PAPERS_ROOT.rglob("*.pdf"):
-        stem = f.stem
-        if stem == str(seq_id):
-            found.append(f)
-        elif re.match(rf"^{seq_id}_\d+$", stem):
-            found.append(f)
-    return sorted(found)
-
-
-def extract_pdf_text(paths: list[Path]) -> str:
-    parts = []
-    for path in paths:
-        pages = []
-        try:
-            with pdfplumber.open(path) as pdf:
-                for page in pdf.pages:
-                    text = page.extract_text()
-                    if text:
-                        pages.append(text)
-        except Exception as e:
-            pages.append(f"[PDF extraction failed for {path.name}: {e}]")
-        if pages:
-            parts.append(f"=== {path.name} ===\n" + "\n\n".join(pages))
-    merged = "\n\n".join(parts)
-    if len(merged) > MAX_PDF_CHARS:
-        merged = merged[:MAX_PDF_CHARS] + "\n[... truncated ...]"
-    return merged
+    """Return primary PDFs for a study (excludes *_supplement.pdf and duplicate copies)."""
+    return papers().pdfs(seq_id)
+
 
 # ---------------------------------------------------------------------------
 # Load studies
@@ -338,7 +338,7 @@ async def extract_study(study: dict, cache: dict,
         print(f"  seq={seq_id:>3}  [NO PDF]  skipping")
         return _build_record(study, [], "failed")
 
-    paper_text = extract_pdf_text(pdf_paths)
+    paper_text = extract_pdf_text(pdf_paths, MAX_PDF_CHARS)
     prompt     = build_prompt(study, paper_text)
 
     async with sem:
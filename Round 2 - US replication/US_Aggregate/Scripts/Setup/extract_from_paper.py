@@ -14,10 +14,12 @@ PDFs are located in Data/Papers/{person}/ with naming convention:
   {seq_id}_1.pdf etc.   — multiple papers for one study (all merged)
   {seq_id}_supplement.pdf — excluded
 
-PDF text is extracted with pdfplumber before being sent to the model.
+PDF text is extracted with pdfplumber before being sent to the model; page text
+is cached by content hash (US_Aggregate_2/Scripts/pdf_text.py).
 
 Outputs Data/study_enriched_aggregate.jsonl, one record per study.
-Also maintains a .extract_cache.json to avoid re-running completed studies.
+Also keeps model outputs in the shared SQLite cache (Data/Caches/cache.sqlite,
+namespace "extract_from_paper") to avoid re-running completed studies.
 
 Requires:
   - OPENAI_API_KEY in environment
@@ -31,11 +33,12 @@ Run from project root or this script's directory:
 
 import argparse
 import asyncio
+import importlib.util
 import json
 import re
+import sys
 from pathlib import Path
 
-import pdfplumber
 from openai import AsyncOpenAI
 
 # ---------------------------------------------------------------------------
@@ -47,7 +50,30 @@ INPUT       = DATA_DIR / "Pipeline" / "tier_classified.jsonl"
 PAPERS_ROOT = DATA_DIR / "Papers"
 OUTPUT      = DATA_DIR / "Ground_Truth" / "study_enriched_aggregate.jsonl"
 OUTPUT_PASS2 = DATA_DIR / "Ground_Truth" / "study_enriched_aggregate_pass2.jsonl"
-CACHE_FILE  = DATA_DIR / "Caches" / ".extract_cache.json"
+CACHE_NS    = "extract_from_paper"   # kv_cache.py namespace
+
+# Shared SQLite cache from US_Aggregate_2/Scripts
+_kv_spec = importlib.util.spec_from_file_location(
+    "kv_cache", SCRIPT_DIR.parents[2] / "US_Aggregate_2" / "Scripts" / "kv_cache.py"
+)
+kv_cache = importlib.util.module_from_spec(_kv_spec)
+_kv_spec.loader.exec_module(kv_cache)
+
+# Cached PDF text extraction and the paper index from US_Aggregate_2/Scripts
+_AGG_SCRIPTS = SCRIPT_DIR.parents[2] / "US_Aggregate_2" / "Scripts"
+sys.path.insert(0, str(_AGG_SCRIPTS))   # pdf_text imports kv_cache from there
+_pdf_spec    = importlib.util.spec_from_file_location(
+    "pdf_text", _AGG_SCRIPTS / "pdf_text.py"
+)
+_pdf = importlib.util.module_from_spec(_pdf_spec)
+_pdf_spec.loader.exec_module(_pdf)
+_idx_spec    = importlib.util.spec_from_file_location(
+    "paper_index", _AGG_SCRIPTS / "paper_index.py"
+)
+_idx = importlib.util.module_from_spec(_idx_spec)
+_idx_spec.loader.exec_module(_idx)
+
+extract_pdf_text = _pdf.extract_pdf_text
 
 DEFAULT_MODEL  = "gpt-5.4"
 MAX_CONCURRENT = 5
@@ -57,44 +83,25 @@ MAX_PDF_CHARS  = 80_000   # chars per study (merged across papers)
 # PDF helpers
 # ---------------------------------------------------------------------------
 
+_papers = None   # PaperIndex (paper_index.py), built once on first use
+
+
+def papers():
+    global _papers
+    if _papers is None:
+        _papers = _idx.PaperIndex.load(PAPERS_ROOT)
+        _papers.report_duplicates()
+    return _papers
+
+
 def find_pdfs_for_study(seq_id: int) -> list[Path]:
     """
     Find all primary PDFs for a study anywhere within Papers/.
     Matches: {seq_id}.pdf  and  {seq_id}_{N}.pdf
-    Excludes: {seq_id}_supplement.pdf
+    Excludes: {seq_id}_supplement.pdf, and duplicate copies of a paper
+    (see US_Aggregate_2/Scripts/paper_index.py)
     """
-    found = []
-    if not PAPERS_ROOT.exists():
-        return found
-    for f in PAPERS_ROOT.rglob("*.pdf"):
-        stem = f.stem
-        if stem == str(seq_id):
-            found.append(f)
-        elif re.match(rf"^{seq_id}_\d+$", stem):
-            found.append(f)
-    return sorted(found)
-
-
-def extract_pdf_text(paths: list[Path]) -> str:
-    """Extract and merge text from one or more PDFs, up to MAX_PDF_CHARS."""
-    parts = []
-    for path in paths:
-        pages = []
-        try:
-            with pdfplumber.open(path) as pdf:
-                for page in pdf.pages:
-                    text = page.extract_text()
-                    if text:
-                        pages.append(text)
-        except Exception as e:
-            pages.append(f"[PDF extraction failed for {path.name}: {e}]")
-        if pages:
-            parts.append(f"=== {path.name} ===\n" + "\n\n".join(pages))
-
-    merged = "\n\n".join(parts)
-    if len(merged) > MAX_PDF_CHARS:
-        merged = merged[:MAX_PDF_CHARS] + "\n[... truncated ...]"
-    return merged
+    return papers().pdfs(seq_id)
 
 
 # ---------------------------------------------------------------------------
@@ -306,16 +313,10 @@ def match_result_arm_ids(results: dict, instrument: dict) -> dict:
 # Cache helpers
 # ---------------------------------------------------------------------------
 
-def load_cache() -> dict:
-    if CACHE_FILE.exists():
-        with open(CACHE_FILE) as f:
-            return json.load(f)
-    return {}
-
-
-def save_cache(cache: dict):
-    with open(CACHE_FILE, "w") as f:
-        json.dump(cache, f, indent=2)
+def load_cache():
+    """Dict-like SQLite cache; each assignment is persisted at once.
+    The old .extract_cache.json is imported on first use."""
+    return kv_cache.open_cache(DATA_DIR, CACHE_NS)
 
 
 def parse_json_response(text: str) -> dict:
@@ -334,7 +335,7 @@ async def extract_one(
     client: AsyncOpenAI,
     sem: asyncio.Semaphore,
     rec: dict,
-    cache: dict,
+    cache,
     model: str,
 ) -> dict:
     seq_id = rec["seq_id"]
@@ -344,7 +345,7 @@ async def extract_one(
         return {**rec, "extract_status": "no_pdf", "results": None, "instrument": None,
                 "pdf_files": []}
 
-    pdf_text = extract_pdf_text(pdfs)
+    pdf_text = extract_pdf_text(pdfs, MAX_PDF_CHARS)
 
     results_key    = f"{seq_id}:results"
     instrument_key = f"{seq_id}:instrument"
@@ -439,8 +440,9 @@ async def run(model: str, limit: int, only_seq: int | None):
     print(f"Tier 1 studies to process: {len(records)}")
 
     # Partition by PDF availability
-    with_pdf    = [r for r in records if find_pdfs_for_study(r["seq_id"])]
-    without_pdf = [r for r in records if not find_pdfs_for_study(r["seq_id"])]
+    has_pdf     = {r["seq_id"]: bool(find_pdfs_for_study(r["seq_id"])) for r in records}
+    with_pdf    = [r for r in records if has_pdf[r["seq_id"]]]
+    without_pdf = [r for r in records if not has_pdf[r["seq_id"]]]
     print(f"  With PDF  : {len(with_pdf)}")
     print(f"  No PDF    : {len(without_pdf)}  {[r['seq_id'] for r in without_pdf]}")
 
@@ -459,7 +461,6 @@ async def run(model: str, limit: int, only_seq: int | None):
         result = await coro
         results_list.append(result)
         done += 1
-        save_cache(cache)
         n_out = len((result.get("results") or {}).get("outcomes", []))
         inst  = (result.get("instrument") or {}).get("found", False)
         n_var = len((result.get("instrument") or {}).get("treatment_variations", []))
@@ -528,7 +529,7 @@ async def run_pass2(model: str, limit: int, only_seq: int | None):
         if cached and not ("rate_limit" in str(cached).lower() or "rate limit" in str(cached).lower() or "429" in str(cached)):
             new_stats = cached
         else:
-            pdf_text = extract_pdf_text(pdfs)
+            pdf_text = extract_pdf_text(pdfs, MAX_PDF_CHARS)
             try:
                 # Same call structure
                 max_retries = 10
@@ -589,7 +590,6 @@ async def run_pass2(model: str, limit: int, only_seq: int | None):
         res = await coro
         updated_records.append(res)
         done += 1
-        save_cache(cache)
         print(f"  [{done:>2}/{len(tasks)}] pass2 seq={res['seq_id']:>3}")
 
     # Load any existing ones we skipped so we just duplicate the original file but inject updates
@@ -33,7 +33,7 @@ Usage:
     python extract_gt_from_papers.py --dry-run    # print prompts, no API calls
 """
 
-import argparse, json, random, re, time
+import argparse, importlib.util, json, random, re, sys, time
 from pathlib import Path
 from openai import OpenAI, RateLimitError, APIConnectionError, APIError
 
@@ -48,6 +48,22 @@ GT_OUT       = DATA_DIR / "Ground_Truth" / "study_gt_v2.jsonl"
 PAPERS_ROOT  = DATA_DIR / "Papers"
 CACHE_PATH   = DATA_DIR / "Caches" / ".extract_gt_v2_cache.json"
 
+# Cached PDF text extraction and the paper index from US_Aggregate_2/Scripts
+_AGG_SCRIPTS = SCRIPT_DIR.parents[2] / "US_Aggregate_2" / "Scripts"
+sys.path.insert(0, str(_AGG_SCRIPTS))   # pdf_text imports kv_cache from there
+_pdf_spec    = importlib.util.spec_from_file_location(
+    "pdf_text", _AGG_SCRIPTS / "pdf_text.py"
+)
+_pdf = importlib.util.module_from_spec(_pdf_spec)
+_pdf_spec.loader.exec_module(_pdf)
+_idx_spec    = importlib.util.spec_from_file_location(
+    "paper_index", _AGG_SCRIPTS / "paper_index.py"
+)
+_idx = importlib.util.module_from_spec(_idx_spec)
+_idx_spec.loader.exec_module(_idx)
+
+pdf_pages = _pdf.pdf_pages
+
 MODEL         = "gpt-5.1"
 MAX_PDF_CHARS = 80_000
 
@@ -65,30 +81,27 @@ def slugify(s: str) -> str:
     return re.sub(r"[^a-z0-9]+", "_", s.lower()).strip("_")[:50]
 
 
+_papers = None   # PaperIndex (paper_index.py), built once on first use
+
+
+def papers():
+    global _papers
+    if _papers is None:
+        _papers = _idx.PaperIndex.load(PAPERS_ROOT)
+        _papers.report_duplicates()
+    return _papers
+
+
 def find_pdfs(seq_id: int) -> list[Path]:
-    """All non-supplement PDFs for this study across all person-subdirs."""
-    pdfs = []
-    for person_dir in sorted(PAPERS_ROOT.iterdir()):
-        if not person_dir.is_dir():
-            continue
-        for p in sorted(person_dir.iterdir()):
-            if "supplement" in p.stem.lower():
-                continue
-            if re.fullmatch(rf"{seq_id}(_\d+)?", p.stem):
-                pdfs.append(p)
-    return pdfs
+    """All non-supplement PDFs for this study across all person-subdirs (one copy each)."""
+    return papers().pdfs(seq_id)
 
 
 def extract_pdf_text(pdfs: list[Path]) -> str:
-    import pdfplumber
     parts = []
     for pdf in pdfs:
         try:
-            with pdfplumber.open(pdf) as doc:
-                for page in doc.pages:
-                    t = page.extract_text()
-                    if t:
-                        parts.append(t)
+            parts.extend(t for t in pdf_pages(pdf) if t)
         except Exception as e:
             print(f"    WARNING: could not read {pdf.name}: {e}")
     return "\n\n".join(parts)[:MAX_PDF_CHARS]
@@ -12,6 +12,7 @@ Run from this script's directory:
     python filter_us_with_papers.py
 """
 
+import importlib.util
 import json
 import re
 from pathlib import Path
@@ -20,7 +21,15 @@ from pathlib import Path
 # Paths
 # ---------------------------------------------------------------------------
 REPO_ROOT = Path(__file__).resolve().parents[4]  # llm-simulations/
-REGISTRY_PATH = REPO_ROOT / "Base Data - AEA files" / "trials.json"
+
+# Compressed-file helpers from US_Aggregate_2/Scripts (trials.json may be .zst / .gz)
+_io_spec = importlib.util.spec_from_file_location(
+    "jsonl_io", Path(__file__).resolve().parents[3] / "US_Aggregate_2" / "Scripts" / "jsonl_io.py"
+)
+jsonl_io = importlib.util.module_from_spec(_io_spec)
+_io_spec.loader.exec_module(jsonl_io)
+
+REGISTRY_PATH = jsonl_io.resolve(REPO_ROOT / "Base Data - AEA files" / "trials.json")
 OUTPUT_PATH = Path(__file__).resolve().parents[2] / "Data" / "expanded_us_pool.jsonl"
 
 
@@ -107,7 +116,7 @@ def normalise(idx: int, r: dict) -> dict:
 
 def main():
     print(f"Loading registry from {REGISTRY_PATH} ...")
-    with open(REGISTRY_PATH) as f:
+    with jsonl_io.open_text(REGISTRY_PATH) as f:
         raw = json.load(f)
 
     records = list(raw.values()) if isinstance(raw, dict) else raw
@@ -1,7 +1,8 @@
 """
 00_preprocess_papers.py  —  Step 0 of the pipeline (optional but recommended)
 
-Pre-processes raw PDF text using gpt-5.4-mini before the main extraction step.
+Pre-processes raw PDF text before the main extraction step: rule-based cuts
+first (paper_condenser.py, no API calls), then gpt-5.4-mini on what is left.
 
 WHY
 ---
@@ -10,7 +11,11 @@ text is irrelevant: author affiliations, literature reviews, discussion,
 references, funding statements.  The main extraction model (gpt-5.4) wastes
 context window and attention on all of it.
 
-This script sends the raw PDF text through a cheap fast model that:
+The parts that can be found by rule go first, offline: running headers and
+footers, page numbers, affiliations, emails, DOI / received / copyright lines,
+acknowledgement / funding / conflict-of-interest sections and the reference
+list (paper_condenser.py; typically 85–95% of the raw text is left).  The
+shortened text then goes through a cheap fast model that:
   1. Keeps verbatim any stimulus text / vignettes / messages shown to participants
   2. Keeps verbatim all outcome measure questions and scale descriptions
   3. Keeps the methods/design section and all results tables/statistics
@@ -19,13 +24,28 @@ This script sends the raw PDF text through a cheap fast model that:
      and any appendices that don't contain participant-facing materials
 
 The resulting condensed text is typically 30–60% of the original length while
-preserving everything the extraction model needs.  It is saved to a cache file
-and automatically picked up by 01_extract_study_data.py.
+preserving everything the extraction model needs.  It is saved to the shared
+cache database and automatically picked up by 01_extract_study_data.py.
+
+Long papers are not truncated.  The text is split into chunks of about 40k
+characters at section headings (paper_condenser.split_sections), the chunks
+are condensed concurrently under the same MAX_CONCURRENT limit, and the results
+are joined in order, so appendices with stimulus text reach 01 too, and a long
+paper takes about as long as its largest chunk instead of one huge request.
+
+--condenser offline skips the model: the rule-based text alone is cached, at
+no API cost, for 01 to use where no model-condensed entry exists.
+--condenser llm sends the raw text to the model, as before paper_condenser.py.
 
 Output
 ------
-  Data/Caches/.preprocessed_papers.json
-  {seq_id: {"text": "<condensed text>", "original_chars": N, "condensed_chars": M}}
+  Data/Caches/cache.sqlite, namespace "preprocess_papers" (kv_cache.py)
+  "{seq_id}__{model}" → {"text": "<condensed text>", "original_chars": N,
+                         "offline_chars": K, "condensed_chars": M, "condenser": "both",
+                         "chunks": C}
+  "{seq_id}__offline" → the same, rule-based only (--condenser offline)
+  "{seq_id}__{model}__llm" → the same, raw text to the model (--condenser llm);
+                         entries from before paper_condenser.py are moved here
 
 Usage
 -----
@@ -40,14 +60,24 @@ Usage
 
   # Change model (default: gpt-5.4-mini)
   python 00_preprocess_papers.py --model gpt-4.1-mini
+
+  # Smaller chunks (more, shorter requests per long paper)
+  python 00_preprocess_papers.py --chunk-chars 25000
+
+  # Rule-based condensing only, no API calls
+  python 00_preprocess_papers.py --condenser offline
 """
 
-import argparse, asyncio, json, re
+import argparse, asyncio, os
 from pathlib import Path
 
-import pdfplumber
 from openai import AsyncOpenAI, RateLimitError, APIConnectionError, APIError
 
+from kv_cache import KVCache, open_cache
+from paper_condenser import condense_pdfs_async, split_sections
+from paper_index import PaperIndex
+from pdf_text import BACKENDS, DEFAULT_BACKEND, extract_pdf_text_async, pdf_pool
+
 # ---------------------------------------------------------------------------
 # Paths
 # ---------------------------------------------------------------------------
@@ -55,10 +85,11 @@ from openai import AsyncOpenAI, RateLimitError, APIConnectionError, APIError
 SCRIPT_DIR   = Path(__file__).resolve().parent
 DATA_DIR     = SCRIPT_DIR.parent / "Data"
 PAPERS_ROOT  = DATA_DIR / "Papers"
-CACHE_PATH   = DATA_DIR / "Caches" / ".preprocessed_papers.json"
+CACHE_NS     = "preprocess_papers"                      # kv_cache.py namespace
 
-MAX_PDF_CHARS  = 120_000   # generous raw input limit
-MAX_CONCURRENT = 3         # conservative — avoids rate-limit cascade on large papers
+MAX_PDF_CHARS  = 600_000   # runaway guard only — long papers are chunked, not cut
+CHUNK_CHARS    = 40_000    # per request; chunks end at section headings
+MAX_CONCURRENT = 3         # API calls (chunks) in flight — avoids rate-limit cascades
 DEFAULT_MODEL  = "gpt-5.4-mini"
 
 # ---------------------------------------------------------------------------
@@ -72,9 +103,24 @@ parser.add_argument("--force",    action="store_true",
                     help="Re-process even if already cached")
 parser.add_argument("--seq-ids",  nargs="*", type=int,
                     help="Only process these seq_ids (default: all PDFs found)")
+parser.add_argument("--pdf-workers", type=int, default=os.cpu_count(),
+                    help="Processes parsing PDFs alongside the API calls (default: all cores)")
+parser.add_argument("--rank-pages", action="store_true",
+                    help="Fill the PDF character budget with methods / results / table pages "
+                         "first and references last, instead of the first pages")
+parser.add_argument("--pdf-backend", choices=list(BACKENDS), default=DEFAULT_BACKEND,
+                    help=f"PDF text extractor (default: {DEFAULT_BACKEND}; see "
+                         "bench_pdf_backends.py)")
+parser.add_argument("--chunk-chars", type=int, default=CHUNK_CHARS,
+                    help=f"Longest text condensed in one request; longer papers are split "
+                         f"at section headings (default: {CHUNK_CHARS:,})")
+parser.add_argument("--condenser", choices=["both", "offline", "llm"], default="both",
+                    help="both: rule-based cuts, then the model on the shortened text "
+                         "(default); offline: rule-based only, no API calls; llm: the "
+                         "model on the raw text")
 args = parser.parse_args()
 
-client = AsyncOpenAI()
+client = AsyncOpenAI() if args.condenser != "offline" else None
 
 # ---------------------------------------------------------------------------
 # Prompt
@@ -126,68 +172,59 @@ Plain text.  Preserve section headings.  No commentary, no JSON, no markdown.
 The downstream model extracting data from your output will need every kept word \
 to be accurate — do not alter any numbers, question text, or condition labels.
 
-PAPER TEXT:
+{chunk_note}PAPER TEXT:
 {paper_text}"""
 
+CHUNK_NOTE = """\
+This is part {k} of {n} of the paper, split at section boundaries; the other \
+parts are condensed separately and joined after yours.  Condense only this part \
+by the rules above, and do not add an introduction, summary or commentary on \
+the missing parts.
+
+"""
+
 # ---------------------------------------------------------------------------
 # PDF helpers  (identical logic to 01_extract_study_data.py)
 # ---------------------------------------------------------------------------
 
+_papers = None   # PaperIndex (paper_index.py), built once on first use
+
+
+def papers() -> PaperIndex:
+    global _papers
+    if _papers is None:
+        _papers = PaperIndex.load(PAPERS_ROOT)
+        _papers.report_duplicates()
+    return _papers
+
+
 def find_pdfs(seq_id: int) -> list[Path]:
-    found = []
-    for f in PAPERS_ROOT.rglob("*.pdf"):
-        stem = f.stem
-        if stem == str(seq_id):
-            found.append(f)
-        elif re.match(rf"^{seq_id}_\d+$", stem):
-            found.append(f)
-    return sorted(found)
-
-
-def extract_pdf_text(paths: list[Path]) -> str:
-    parts = []
-    for path in paths:
-        pages = []
-        try:
-            with pdfplumber.open(path) as pdf:
-                for page in pdf.pages:
-                    text = page.extract_text()
-                    if text:
-                        pages.append(text)
-        except Exception as e:
-            pages.append(f"[PDF extraction failed for {path.name}: {e}]")
-        if pages:
-            parts.append(f"=== {path.name} ===\n" + "\n\n".join(pages))
-    merged = "\n\n".join(parts)
-    if len(merged) > MAX_PDF_CHARS:
-        merged = merged[:MAX_PDF_CHARS] + "\n[... truncated ...]"
-    return merged
+    """Primary PDFs for a study (excludes *_supplement.pdf and duplicate copies)."""
+    return papers().pdfs(seq_id)
 
 
 def discover_all_seq_ids() -> list[int]:
-    seen = set()
-    for f in PAPERS_ROOT.rglob("*.pdf"):
-        m = re.match(r"^(\d+)", f.stem)
-        if m:
-            seen.add(int(m.group(1)))
-    return sorted(seen)
+    return papers().seq_ids()
 
 # ---------------------------------------------------------------------------
 # Cache
 # ---------------------------------------------------------------------------
 
-def load_cache() -> dict:
-    if CACHE_PATH.exists():
-        try:
-            return json.loads(CACHE_PATH.read_text())
-        except Exception:
-            return {}
-    return {}
-
-
-def save_cache(cache: dict) -> None:
-    CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
-    CACHE_PATH.write_text(json.dumps(cache, indent=2))
+def load_cache():
+    """Shared SQLite cache (kv_cache.py); each assignment is persisted at once.
+
+    Entries written before paper_condenser.py ("{seq_id}__{model}", raw text
+    sent to the model, no "condenser" field) are moved to "{seq_id}__{model}__llm",
+    where --condenser llm finds them."""
+    cache  = open_cache(DATA_DIR, CACHE_NS)
+    legacy = [(k, v) for k, v in cache.items() if "condenser" not in v]
+    for key, entry in legacy:
+        cache[f"{key}__llm"] = {**entry, "condenser": "llm"}
+        del cache[key]
+    if legacy:
+        print(f"  [cache] {len(legacy)} raw-text entries moved to "
+              f"'{{seq_id}}__{{model}}__llm' (--condenser llm)")
+    return cache
 
 # ---------------------------------------------------------------------------
 # API call
@@ -225,12 +262,19 @@ async def call_api(prompt: str, retries: int = 8) -> str | None:
 # Per-study preprocessing
 # ---------------------------------------------------------------------------
 
-async def preprocess_one(seq_id: int, cache: dict,
-                         sem: asyncio.Semaphore) -> dict | None:
-    cache_key = f"{seq_id}__{args.model}"
+async def condense_chunk(k: int, chunks: list[str], sem: asyncio.Semaphore) -> str | None:
+    note = "" if len(chunks) == 1 else CHUNK_NOTE.format(k=k + 1, n=len(chunks))
+    async with sem:
+        return await call_api(PREPROCESS_PROMPT.format(paper_text=chunks[k], chunk_note=note))
 
-    if not args.force and cache_key in cache:
-        entry = cache[cache_key]
+
+async def preprocess_one(seq_id: int, cache: KVCache, sem: asyncio.Semaphore,
+                         pool) -> dict | None:
+    model     = "offline" if args.condenser == "offline" else args.model
+    cache_key = f"{seq_id}__{model}" + ("__llm" if args.condenser == "llm" else "")
+
+    entry = None if args.force else cache.get(cache_key)
+    if entry is not None and entry.get("condenser") == args.condenser:
         ratio = entry["condensed_chars"] / max(entry["original_chars"], 1)
         print(f"  seq={seq_id:>3}  [CACHED]  "
               f"{entry['original_chars']:>6} → {entry['condensed_chars']:>6} chars  "
@@ -242,42 +286,57 @@ async def preprocess_one(seq_id: int, cache: dict,
         print(f"  seq={seq_id:>3}  [NO PDF]")
         return None
 
-    raw_text = extract_pdf_text(pdf_paths)
-    orig_len = len(raw_text)
+    # Parsed (and condensed by rule) in the process pool, so API calls already
+    # in flight keep running
+    if args.condenser == "llm":
+        raw_text = await extract_pdf_text_async(pdf_paths, MAX_PDF_CHARS, pool,
+                                                rank=args.rank_pages, backend=args.pdf_backend)
+        orig_len = off_len = len(raw_text)
+    else:
+        offline  = await condense_pdfs_async(pdf_paths, MAX_PDF_CHARS, pool,
+                                             rank=args.rank_pages, backend=args.pdf_backend)
+        raw_text = offline["text"]
+        orig_len = offline["original_chars"]
+        off_len  = offline["offline_chars"]
+        print(f"  seq={seq_id:>3}  offline  {orig_len:>6} → {off_len:>6} chars  "
+              f"({off_len / max(orig_len, 1):.0%})")
+
+    entry = {
+        "seq_id":          seq_id,
+        "model":           model,
+        "condenser":       args.condenser,
+        "text":            raw_text,
+        "original_chars":  orig_len,
+        "offline_chars":   off_len,
+        "condensed_chars": len(raw_text),
+        "status":          "offline",
+    }
+    if args.condenser == "offline":
+        cache[cache_key] = entry
+        return entry
 
-    async with sem:
-        print(f"  seq={seq_id:>3}  preprocessing ({orig_len:,} chars)…",
-              end="", flush=True)
-        condensed = await call_api(
-            PREPROCESS_PROMPT.format(paper_text=raw_text)
-        )
-
-    if not condensed:
-        print(f"\n  seq={seq_id:>3}  FAILED — keeping raw text as fallback")
-        # Store raw text so 01 can still run; flag it
-        entry = {
-            "seq_id":          seq_id,
-            "model":           args.model,
-            "text":            raw_text,
-            "original_chars":  orig_len,
-            "condensed_chars": orig_len,
-            "status":          "failed_kept_raw",
-        }
+    # Map: every chunk is its own request, all under the shared semaphore
+    chunks = split_sections(raw_text, args.chunk_chars)
+    print(f"  seq={seq_id:>3}  preprocessing ({len(raw_text):,} chars, "
+          f"{len(chunks)} chunk{'s' if len(chunks) > 1 else ''})…", flush=True)
+    parts = await asyncio.gather(*(condense_chunk(k, chunks, sem) for k in range(len(chunks))))
+
+    # Reduce: in order, with the input kept for any chunk that failed
+    failed    = [k + 1 for k, part in enumerate(parts) if not part]
+    condensed = "\n\n".join(part or chunk for part, chunk in zip(parts, chunks))
+    cond_len  = len(condensed)
+    entry.update(text=condensed, condensed_chars=cond_len, chunks=len(chunks), status="ok")
+    if failed:
+        kept = "raw" if args.condenser == "llm" else "offline"
+        print(f"  seq={seq_id:>3}  FAILED on chunk(s) {', '.join(map(str, failed))} of "
+              f"{len(chunks)} — keeping their {kept} text as fallback")
+        # Store the model's input for those chunks so 01 can still run; flag it
+        entry.update(status=f"failed_kept_{kept}", failed_chunks=failed)
     else:
-        cond_len = len(condensed)
-        ratio    = cond_len / max(orig_len, 1)
-        print(f"  {orig_len:>6} → {cond_len:>6} chars  ({ratio:.0%})")
-        entry = {
-            "seq_id":          seq_id,
-            "model":           args.model,
-            "text":            condensed,
-            "original_chars":  orig_len,
-            "condensed_chars": cond_len,
-            "status":          "ok",
-        }
+        ratio = cond_len / max(orig_len, 1)
+        print(f"  seq={seq_id:>3}  {orig_len:>6} → {cond_len:>6} chars  ({ratio:.0%})")
 
     cache[cache_key] = entry
-    save_cache(cache)
     return entry
 
 # ---------------------------------------------------------------------------
@@ -291,15 +350,17 @@ async def main():
 
     cache   = load_cache()
     sem     = asyncio.Semaphore(MAX_CONCURRENT)
-    tasks   = [preprocess_one(sid, cache, sem) for sid in sorted(seq_ids)]
-    results = await asyncio.gather(*tasks)
+    with pdf_pool(args.pdf_workers) as pool:
+        tasks   = [preprocess_one(sid, cache, sem, pool) for sid in sorted(seq_ids)]
+        results = await asyncio.gather(*tasks)
     results = [r for r in results if r is not None]
 
-    ok      = sum(1 for r in results if r.get("status") == "ok")
-    cached  = sum(1 for r in results if r.get("status") not in ("ok", "failed_kept_raw"))
-    failed  = sum(1 for r in results if r.get("status") == "failed_kept_raw")
+    ok      = sum(1 for r in results if r.get("status") in ("ok", "offline"))
+    failed  = sum(1 for r in results if r.get("status", "").startswith("failed_kept"))
+    cached  = len(results) - ok - failed
 
     total_orig  = sum(r["original_chars"]  for r in results)
+    total_off   = sum(r.get("offline_chars", r["original_chars"]) for r in results)
     total_cond  = sum(r["condensed_chars"] for r in results)
     overall_ratio = total_cond / max(total_orig, 1)
 
@@ -307,10 +368,12 @@ async def main():
     print(f"Studies processed  : {len(results)}")
     print(f"  Fresh / ok       : {ok}")
     print(f"  Cached           : {cached}")
-    print(f"  Failed (raw kept): {failed}")
+    print(f"  Failed (kept)    : {failed}")
     print(f"Total original     : {total_orig:,} chars")
+    print(f"Total offline      : {total_off:,} chars  ({total_off / max(total_orig, 1):.0%} "
+          f"of original)")
     print(f"Total condensed    : {total_cond:,} chars  ({overall_ratio:.0%} of original)")
-    print(f"Cache → {CACHE_PATH}")
+    print(f"Cache → {cache.path}  [{CACHE_NS}]")
     print(f"\n01_extract_study_data.py will automatically use this preprocessed text.")
 
 
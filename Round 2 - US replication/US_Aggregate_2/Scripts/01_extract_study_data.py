@@ -15,22 +15,51 @@ Pass 2 — RESULTS
   Using the exact arm_ids and outcome_ids from Pass 1, the LLM returns:
     • delta = treatment_mean − control_mean for every (arm × outcome) pair
     • sample sizes, metric type, source note
+  Below COVERAGE_OK, a targeted retry asks for only the pairs still missing
+  and merges the answers into the first result.
+  --pass2-tables sends only the papers' tables; --pass2-passages sends the
+  BM25-ranked passages about the design's arms and outcomes (passage_index.py).
+  Either falls back to the full text when it finds nothing.
 
 Output: Data/Ground_Truth/study_data.jsonl
   One record per study — shared IDs between instrument and ground_truth.effects
   mean no matching step is needed downstream.
 
+Batch mode (--batch) — half price, no rate limits, results within 24h
+  Each run advances a state file (Data/Caches/extract_batch_state.json) as far
+  as it can and exits:
+    1. submit one Batch API request per study for pass 1
+    2. once that batch is done: store the designs in the cache, then submit
+       pass 2, built from those designs (arm_ids / outcome_ids as in
+       build_instrument())
+    3. once that batch is done: store the effects, and submit the targeted
+       retry for studies below COVERAGE_OK
+    4. once that batch is done: merge the retried pairs and write
+       study_data.jsonl from the cache, as a live run with every call cached
+       would
+  Batch custom_ids are the cache keys ("p1__{seq_id}__{model}"), so batch and
+  live results are interchangeable.  Studies whose batch request failed go
+  through live calls in step 4.  The study list, --pass1-only and --force
+  are stored with the run; resuming may omit them but not contradict them.
+
 Usage:
     python 01_extract_study_data.py [--model gpt-4.1] [--force]
                                     [--seq-ids 103 150 178] [--pass1-only]
+    python 01_extract_study_data.py --batch          # submit / collect; re-run until done
+    python 01_extract_study_data.py --batch --wait   # poll until every phase is done
 """
 
-import argparse, asyncio, json, re
+import argparse, asyncio, io, json, os, re
 from pathlib import Path
 
-import pdfplumber
 from openai import AsyncOpenAI, RateLimitError, APIConnectionError, APIError
 
+from kv_cache import KVCache, open_cache
+from paper_index import PaperIndex
+from passage_index import PassageIndex
+from pdf_tables import extract_tables_text_async
+from pdf_text import BACKENDS, DEFAULT_BACKEND, extract_pdf_text_async, pdf_pool
+
 # ---------------------------------------------------------------------------
 # Paths
 # ---------------------------------------------------------------------------
@@ -39,13 +68,20 @@ SCRIPT_DIR        = Path(__file__).resolve().parent
 DATA_DIR          = SCRIPT_DIR.parent / "Data"
 PAPERS_ROOT       = DATA_DIR / "Papers"
 OUTPUT_PATH       = DATA_DIR / "Ground_Truth" / "study_data.jsonl"
-CACHE_PATH        = DATA_DIR / "Caches" / ".extract_study_data_cache.json"
-PREPROCESS_CACHE  = DATA_DIR / "Caches" / ".preprocessed_papers.json"
+CACHE_NS          = "extract_study_data"     # kv_cache.py namespaces
+PREPROCESS_NS     = "preprocess_papers"      # written by 00_preprocess_papers.py
 
 MAX_PDF_CHARS  = 90_000   # fallback raw limit when no preprocessed text exists
 MAX_CONCURRENT = 4
 DEFAULT_MODEL  = "gpt-5.4"
 
+BATCH_STATE     = DATA_DIR / "Caches" / "extract_batch_state.json"
+MAX_BATCH_BYTES = 150_000_000   # per input file; the Batch API accepts up to 200 MB
+BATCH_POLL_SEC  = 60
+
+PASSAGE_BUDGET    = 24_000   # --pass2-passages: characters of passages sent to pass 2
+MIN_PASSAGE_CHARS = 3_000    # ... below this the full text is sent instead
+
 COVERAGE_OK      = 0.75
 COVERAGE_PARTIAL = 0.25
 
@@ -61,6 +97,31 @@ parser.add_argument("--seq-ids",    nargs="*", type=int,
                     help="Only process these seq_ids (default: all PDFs found)")
 parser.add_argument("--pass1-only", action="store_true",
                     help="Only run design extraction, skip results")
+parser.add_argument("--pdf-workers", type=int, default=os.cpu_count(),
+                    help="Processes parsing PDFs alongside the API calls (default: all cores)")
+parser.add_argument("--rank-pages", action="store_true",
+                    help="Fill the PDF character budget with methods / results / table pages "
+                         "first and references last, instead of the first pages")
+parser.add_argument("--pdf-backend", choices=list(BACKENDS), default=DEFAULT_BACKEND,
+                    help=f"PDF text extractor (default: {DEFAULT_BACKEND}; see "
+                         "bench_pdf_backends.py)")
+pass2_source = parser.add_mutually_exclusive_group()
+pass2_source.add_argument("--pass2-tables", action="store_true",
+                          help="Send pass 2 the papers' tables as TSV (with captions and notes, "
+                               "see pdf_tables.py) instead of the full text; the full text is "
+                               "used when no table is found and for the targeted retry")
+pass2_source.add_argument("--pass2-passages", action="store_true",
+                          help=f"Send pass 2 the passages and tables that best match the "
+                               f"design's arms, outcomes and statistics (BM25, see "
+                               f"passage_index.py), up to {PASSAGE_BUDGET:,} chars; the full "
+                               f"text is used when retrieval finds too little and for the "
+                               f"targeted retry")
+parser.add_argument("--batch", action="store_true",
+                    help="Run both passes through the Batch API (half price); each run "
+                         "submits or collects the next phase, see the module docstring")
+parser.add_argument("--wait", action="store_true",
+                    help=f"With --batch: poll every {BATCH_POLL_SEC}s until every phase "
+                         "is done instead of exiting")
 args = parser.parse_args()
 
 client = AsyncOpenAI()
@@ -76,82 +137,58 @@ def slugify(s: str) -> str:
 # PDF helpers
 # ---------------------------------------------------------------------------
 
+_papers = None   # PaperIndex (paper_index.py), built once on first use
+
+
+def papers() -> PaperIndex:
+    global _papers
+    if _papers is None:
+        _papers = PaperIndex.load(PAPERS_ROOT)
+        _papers.report_duplicates()
+    return _papers
+
+
 def find_pdfs(seq_id: int) -> list[Path]:
-    """Return primary PDFs for a study (excludes *_supplement.pdf)."""
-    found = []
-    for f in PAPERS_ROOT.rglob("*.pdf"):
-        stem = f.stem
-        if stem == str(seq_id):
-            found.append(f)
-        elif re.match(rf"^{seq_id}_\d+$", stem):
-            found.append(f)
-    return sorted(found)
-
-
-def extract_pdf_text(paths: list[Path]) -> str:
-    parts = []
-    for path in paths:
-        pages = []
-        try:
-            with pdfplumber.open(path) as pdf:
-                for page in pdf.pages:
-                    text = page.extract_text()
-                    if text:
-                        pages.append(text)
-        except Exception as e:
-            pages.append(f"[PDF extraction failed for {path.name}: {e}]")
-        if pages:
-            parts.append(f"=== {path.name} ===\n" + "\n\n".join(pages))
-    merged = "\n\n".join(parts)
-    if len(merged) > MAX_PDF_CHARS:
-        merged = merged[:MAX_PDF_CHARS] + "\n[... truncated ...]"
-    return merged
+    """Primary PDFs for a study (excludes *_supplement.pdf and duplicate copies)."""
+    return papers().pdfs(seq_id)
 
 
 def discover_all_seq_ids() -> list[int]:
-    seen = set()
-    for f in PAPERS_ROOT.rglob("*.pdf"):
-        m = re.match(r"^(\d+)", f.stem)
-        if m:
-            seen.add(int(m.group(1)))
-    return sorted(seen)
+    return papers().seq_ids()
 
 # ---------------------------------------------------------------------------
 # Preprocessed text loader  (output of 00_preprocess_papers.py)
 # ---------------------------------------------------------------------------
 
-_preprocess_cache: dict | None = None   # loaded once on first call
+_preprocess_cache = None   # opened on first call
 
-def get_paper_text(seq_id: int, pdf_paths: list[Path]) -> tuple[str, str]:
+async def get_paper_text(seq_id: int, pdf_paths: list[Path], pool) -> tuple[str, str]:
     """Return (text, source) where source is 'preprocessed' or 'raw_pdf'.
 
     Checks the 00_preprocess_papers.py cache first.  If the study was
-    preprocessed and the status is ok (or failed_kept_raw), use that text.
-    Otherwise fall back to extracting raw text directly from the PDFs.
+    preprocessed and the status is ok (or failed_kept_*), use that text.
+    Otherwise fall back to extracting raw text directly from the PDFs, in the
+    process pool so API calls already in flight keep running.
     """
     global _preprocess_cache
 
     if _preprocess_cache is None:
-        if PREPROCESS_CACHE.exists():
-            try:
-                _preprocess_cache = json.loads(PREPROCESS_CACHE.read_text())
-            except Exception:
-                _preprocess_cache = {}
-        else:
-            _preprocess_cache = {}
-
-    # Cache keys written by 00_preprocess_papers.py: "{seq_id}__{model}"
-    # We match on any entry for this seq_id regardless of which mini-model was used.
-    match = next(
-        (v for k, v in _preprocess_cache.items()
-         if k.startswith(f"{seq_id}__")),
-        None,
-    )
-    if match and match.get("text"):
-        return match["text"], "preprocessed"
+        _preprocess_cache = open_cache(DATA_DIR, PREPROCESS_NS)
+
+    # Cache keys written by 00_preprocess_papers.py: "{seq_id}__{model}" (or
+    # "{seq_id}__{model}__llm" with --condenser llm)
+    # We match on any entry for this seq_id regardless of which mini-model was used;
+    # "{seq_id}__offline" (rule-based only, --condenser offline) is the last resort.
+    entries = [(k, v) for k, v in _preprocess_cache.items_with_prefix(f"{seq_id}__")
+               if v.get("text")]
+    entries.sort(key=lambda kv: kv[0].endswith("__offline"))
+    if entries:
+        return entries[0][1]["text"], "preprocessed"
 
     # Fallback: extract raw PDF text
-    return extract_pdf_text(pdf_paths), "raw_pdf"
+    text = await extract_pdf_text_async(pdf_paths, MAX_PDF_CHARS, pool,
+                                        rank=args.rank_pages, backend=args.pdf_backend)
+    return text, "raw_pdf"
 
 # ---------------------------------------------------------------------------
 # Prompts
@@ -223,7 +260,36 @@ PAPER TEXT:
 {paper_text}"""
 
 
-def pass2_prompt(paper_text: str, design: dict) -> str:
+_EFFECT_FIELDS = """\
+  treatment_mean  — mean / proportion / score for the TREATMENT arm
+  control_mean    — mean / proportion / score for the CONTROL arm
+  delta           — treatment_mean MINUS control_mean (treatment effect)
+  n_treatment     — participants in the treatment arm (integer or null)
+  n_control       — participants in the control arm  (integer or null)
+  metric          — "mean" | "proportion" | "coefficient" | "other"
+  note            — table reference or caveat, e.g. "Table 2 col 3",
+                    "OLS coefficient, not raw mean", or \"\""""
+
+_EFFECTS_JSON = """\
+{
+  "effects": [
+    {
+      "arm_id": "<arm_id from list above>",
+      "outcome_id": "<outcome_id from list above>",
+      "outcome_name": "<outcome name>",
+      "treatment_mean": <number or null>,
+      "control_mean": <number or null>,
+      "delta": <number or null>,
+      "n_treatment": <integer or null>,
+      "n_control": <integer or null>,
+      "metric": "<mean|proportion|coefficient|other>",
+      "note": "<string>"
+    }
+  ]
+}"""
+
+
+def pass2_prompt(paper_text: str, design: dict, context: str = "text") -> str:
     ctrl_label = design.get("control_arm_label") or "control"
     arms       = design.get("treatment_variations", [])
     outcomes   = design.get("outcome_questions", [])
@@ -239,6 +305,12 @@ def pass2_prompt(paper_text: str, design: dict) -> str:
     )
     expected_n = len(treatment_arms) * len(outcomes)
     ctrl_id    = slugify(ctrl_label) if ctrl_label else "control"
+    source     = {
+        "tables":   "RESULTS TABLES (tab-separated; each starts with [file p.N table K] and its "
+                    "caption, and ends with its notes):",
+        "passages": "PAPER EXCERPTS (the passages and tables most relevant to these arms and "
+                    "outcomes, in paper order; [...] marks omitted text):",
+    }.get(context, "PAPER TEXT:")
 
     return f"""You are extracting statistical results from a social science paper.
 
@@ -255,14 +327,7 @@ TASK
 For each combination of (treatment arm × outcome), find the result
 in the paper's tables or text and extract:
 
-  treatment_mean  — mean / proportion / score for the TREATMENT arm
-  control_mean    — mean / proportion / score for the CONTROL arm
-  delta           — treatment_mean MINUS control_mean (treatment effect)
-  n_treatment     — participants in the treatment arm (integer or null)
-  n_control       — participants in the control arm  (integer or null)
-  metric          — "mean" | "proportion" | "coefficient" | "other"
-  note            — table reference or caveat, e.g. "Table 2 col 3",
-                    "OLS coefficient, not raw mean", or ""
+{_EFFECT_FIELDS}
 
 Rules:
 - Use the arm_id and outcome_id strings EXACTLY as listed above.
@@ -273,22 +338,55 @@ Rules:
 - Return exactly {expected_n} effect objects.
 
 Return ONLY valid JSON — no markdown, no prose:
-{{
-  "effects": [
-    {{
-      "arm_id": "<arm_id from list above>",
-      "outcome_id": "<outcome_id from list above>",
-      "outcome_name": "<outcome name>",
-      "treatment_mean": <number or null>,
-      "control_mean": <number or null>,
-      "delta": <number or null>,
-      "n_treatment": <integer or null>,
-      "n_control": <integer or null>,
-      "metric": "<mean|proportion|coefficient|other>",
-      "note": "<string>"
-    }}
-  ]
-}}
+{_EFFECTS_JSON}
+
+{source}
+{paper_text}"""
+
+
+def retry_prompt(paper_text: str, design: dict, missing: list[tuple[str, str]]) -> str:
+    """Pass-2 follow-up for only the (arm_id, outcome_id) pairs still missing
+    (build_retry_prompt in US_Aggregate/Scripts/Setup/extract_gt_from_papers.py)."""
+    ctrl_label = design.get("control_arm_label") or "control"
+    arm_labels = {slugify(a["arm_label"]): a["arm_label"]
+                  for a in design.get("treatment_variations", [])}
+    out_names  = {slugify(o["outcome_name"]): o["outcome_name"]
+                  for o in design.get("outcome_questions", [])}
+    title      = design.get("title") or "this paper"
+
+    missing_block   = "\n".join(
+        f'  arm_id="{arm_id}"  label="{arm_labels.get(arm_id, "")}"  '
+        f'outcome_id="{out_id}"  name="{out_names.get(out_id, "")}"'
+        for arm_id, out_id in missing
+    )
+    unique_arm_ids  = list(dict.fromkeys(arm_id for arm_id, _ in missing))
+    unique_out_ids  = list(dict.fromkeys(out_id for _, out_id in missing))
+
+    return f"""Study: "{title}" — TARGETED RESULTS PASS
+
+A first extraction did not find the results for the (treatment arm × outcome)
+pairs below.  These conditions ARE present in the paper — search more
+carefully, including ALL tables, figures, footnotes and appendices.
+
+Control arm: arm_id="{slugify(ctrl_label)}"  label="{ctrl_label}"
+
+MISSING PAIRS:
+{missing_block}
+
+For each pair extract:
+
+{_EFFECT_FIELDS}
+
+Rules:
+- arm_id MUST be one of: {unique_arm_ids}
+- outcome_id MUST be one of: {unique_out_ids}
+- If only a regression coefficient is available (not raw means), set
+  delta = coefficient, treatment_mean = null, control_mean = null,
+  metric = "coefficient".
+- Only report values explicitly stated — if genuinely absent use null.
+
+Return ONLY valid JSON — no markdown, no prose:
+{_EFFECTS_JSON}
 
 PAPER TEXT:
 {paper_text}"""
@@ -302,24 +400,28 @@ def _is_reasoning_model(model: str) -> bool:
     return model.startswith("o") or model.startswith("gpt-5")
 
 
-async def call_api(prompt: str, retries: int = 6) -> str | None:
-    import random
+def request_body(prompt: str) -> dict:
+    """Chat completion parameters, shared by live calls and batch requests."""
     extra_params: dict = {"max_completion_tokens": 16000}
     if _is_reasoning_model(args.model):
         extra_params["reasoning_effort"] = "medium"
     else:
         extra_params["temperature"] = 0
+    return {
+        "model": args.model,
+        **extra_params,
+        "messages": [
+            {"role": "system", "content": SYSTEM},
+            {"role": "user",   "content": prompt},
+        ],
+    }
 
+
+async def call_api(prompt: str, retries: int = 6) -> str | None:
+    import random
     for attempt in range(retries):
         try:
-            resp = await client.chat.completions.create(
-                model=args.model,
-                **extra_params,
-                messages=[
-                    {"role": "system", "content": SYSTEM},
-                    {"role": "user",   "content": prompt},
-                ],
-            )
+            resp = await client.chat.completions.create(**request_body(prompt))
             return resp.choices[0].message.content
         except RateLimitError:
             wait = min(20 * (2 ** attempt), 120) + random.uniform(0, 5)
@@ -431,41 +533,66 @@ def grade(cov: float) -> str:
         return "partial"
     return "failed"
 
+
+def _pair(effect: dict) -> tuple:
+    return effect.get("arm_id"), effect.get("outcome_id")
+
+
+def missing_pairs(effects: list[dict], design: dict) -> list[tuple[str, str]]:
+    """(arm_id, outcome_id) pairs of the design without a delta in `effects`."""
+    instrument = build_instrument(design)
+    found      = {_pair(e) for e in effects if e.get("delta") is not None}
+    return [(a["arm_id"], o["outcome_id"])
+            for a in instrument["treatment_variations"] if not a["is_control"]
+            for o in instrument["outcome_questions"]
+            if (a["arm_id"], o["outcome_id"]) not in found]
+
+
+def merge_effects(effects: list[dict], retry: list[dict],
+                  missing: list[tuple[str, str]]) -> tuple[list[dict], int]:
+    """`effects` with the retry's values filled in for the missing pairs (in
+    place of their null entries, or appended); also returns how many were filled."""
+    wanted = set(missing)
+    fills  = {_pair(e): e for e in retry
+              if e.get("delta") is not None and _pair(e) in wanted}
+    n      = len(fills)
+    merged = [fills.pop(_pair(e), e) if e.get("delta") is None else e for e in effects]
+    return merged + list(fills.values()), n
+
 # ---------------------------------------------------------------------------
 # Cache
 # ---------------------------------------------------------------------------
 
-def load_cache() -> dict:
-    if CACHE_PATH.exists():
-        try:
-            return json.loads(CACHE_PATH.read_text())
-        except Exception:
-            return {}
-    return {}
+def load_cache():
+    """Shared SQLite cache (kv_cache.py); each assignment is persisted at once."""
+    return open_cache(DATA_DIR, CACHE_NS)
 
 
-def save_cache(cache: dict) -> None:
-    CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
-    CACHE_PATH.write_text(json.dumps(cache, indent=2))
+def p1_key(seq_id: int) -> str:
+    return f"p1__{seq_id}__{args.model}"
+
+
+def p2_key(seq_id: int) -> str:
+    suffix = "__tables" if args.pass2_tables else "__passages" if args.pass2_passages else ""
+    return f"p2__{seq_id}__{args.model}" + suffix
 
 # ---------------------------------------------------------------------------
 # Per-study extraction
 # ---------------------------------------------------------------------------
 
-async def extract_one(seq_id: int, cache: dict,
-                      sem: asyncio.Semaphore) -> dict | None:
+async def extract_one(seq_id: int, cache: KVCache, sem: asyncio.Semaphore,
+                      pool) -> dict | None:
     pdf_paths = find_pdfs(seq_id)
     if not pdf_paths:
         print(f"  seq={seq_id:>3}  [NO PDF]")
         return None
 
-    paper_text, text_source = get_paper_text(seq_id, pdf_paths)
+    paper_text, text_source = await get_paper_text(seq_id, pdf_paths, pool)
     paper_files = [p.name for p in pdf_paths]
 
     # ---- Pass 1: design ----------------------------------------------------
-    p1_key = f"p1__{seq_id}__{args.model}"
-    if not args.force and p1_key in cache:
-        design = cache[p1_key]
+    if not args.force and p1_key(seq_id) in cache:
+        design = cache[p1_key(seq_id)]
         print(f"  seq={seq_id:>3}  [P1 CACHED]  [{text_source}]", end="")
     else:
         async with sem:
@@ -476,8 +603,7 @@ async def extract_one(seq_id: int, cache: dict,
         if design is None:
             print(f"\n  seq={seq_id:>3}  FAILED (pass 1 parse error)")
             return _failed_record(seq_id, paper_files)
-        cache[p1_key] = design
-        save_cache(cache)
+        cache[p1_key(seq_id)] = design
 
     n_arms      = len(design.get("treatment_variations", []))
     n_outcomes  = len(design.get("outcome_questions", []))
@@ -504,42 +630,74 @@ async def extract_one(seq_id: int, cache: dict,
         return _record(seq_id, design.get("title", ""), paper_files,
                        "ok", "skipped", instrument, [])
 
-    p2_key = f"p2__{seq_id}__{args.model}"
-    if not args.force and p2_key in cache:
-        effects_raw = cache[p2_key]
+    if not args.force and p2_key(seq_id) in cache:
+        effects_raw = cache[p2_key(seq_id)]
         n_found = sum(1 for e in effects_raw if e.get("delta") is not None)
         cov = coverage(effects_raw, expected_n)
         print(f"  seq={seq_id:>3}  [P2 CACHED]  "
               f"{grade(cov)}  ({n_found}/{expected_n} deltas)")
     else:
+        p2_text, context = await pass2_context(pdf_paths, paper_text, design, pool)
         async with sem:
-            print(f"  seq={seq_id:>3}  pass 2 (results, "
-                  f"{expected_n} expected)…", end="", flush=True)
-            raw2 = await call_api(pass2_prompt(paper_text, design))
+            print(f"  seq={seq_id:>3}  pass 2 (results, {expected_n} expected, "
+                  f"{text_source if context == 'text' else context} {len(p2_text):,} chars)…",
+                  end="", flush=True)
+            raw2 = await call_api(pass2_prompt(p2_text, design, context))
         parsed2     = parse_json(raw2)
         effects_raw = (parsed2 or {}).get("effects", [])
 
-        if coverage(effects_raw, expected_n) < COVERAGE_PARTIAL and expected_n > 0:
-            print(f"\n  seq={seq_id:>3}  low coverage — retrying…", end="", flush=True)
+        # Below COVERAGE_OK: ask again for only the missing pairs, on the full text
+        missing = missing_pairs(effects_raw, design)
+        if missing and coverage(effects_raw, expected_n) < COVERAGE_OK:
+            print(f"\n  seq={seq_id:>3}  {len(missing)} pair(s) missing — targeted retry…",
+                  end="", flush=True)
             async with sem:
-                raw2b     = await call_api(pass2_prompt(paper_text, design))
-            parsed2b  = parse_json(raw2b)
-            effects_b = (parsed2b or {}).get("effects", [])
-            if coverage(effects_b, expected_n) > coverage(effects_raw, expected_n):
-                effects_raw = effects_b
+                raw2b = await call_api(retry_prompt(paper_text, design, missing))
+            effects_raw, filled = merge_effects(
+                effects_raw, (parse_json(raw2b) or {}).get("effects", []), missing)
+            print(f"  +{filled}", end="")
 
         n_found = sum(1 for e in effects_raw if e.get("delta") is not None)
         cov     = coverage(effects_raw, expected_n)
         print(f"  {grade(cov)}  ({n_found}/{expected_n} deltas)")
 
-        cache[p2_key] = effects_raw
-        save_cache(cache)
+        cache[p2_key(seq_id)] = effects_raw
 
     results_status = grade(coverage(effects_raw, expected_n))
     return _record(seq_id, design.get("title", ""), paper_files,
                    "ok", results_status, instrument, effects_raw)
 
 
+async def pass2_context(pdf_paths: list[Path], paper_text: str, design: dict,
+                        pool) -> tuple[str, str]:
+    """(text, context) for pass 2: the tables (--pass2-tables) or the retrieved
+    passages (--pass2-passages) when they turn up enough, else the full text."""
+    if args.pass2_tables:
+        tables_text = await extract_tables_text_async(pdf_paths, MAX_PDF_CHARS, pool)
+        if tables_text:
+            return tables_text, "tables"
+    elif args.pass2_passages and len(paper_text) > PASSAGE_BUDGET:
+        phrases = ([design.get("control_arm_label") or ""]
+                   + [a.get("arm_label", "") for a in design.get("treatment_variations", [])]
+                   + [o.get("outcome_name", "") for o in design.get("outcome_questions", [])])
+        index   = PassageIndex.build(
+            paper_text, await extract_tables_text_async(pdf_paths, MAX_PDF_CHARS, pool))
+        excerpt = index.retrieve(phrases, PASSAGE_BUDGET)
+        if len(excerpt) >= MIN_PASSAGE_CHARS:
+            return excerpt, "passages"
+    return paper_text, "text"
+
+
+def expected_pairs(design: dict) -> int:
+    """Treatment arm × outcome pairs pass 2 should return; 0 when pass 2 is
+    skipped (no control arm or no outcomes)."""
+    instrument = build_instrument(design)
+    if instrument.get("control_arm_id") is None:
+        return 0
+    treat_arms = [a for a in instrument["treatment_variations"] if not a["is_control"]]
+    return len(treat_arms) * len(instrument["outcome_questions"])
+
+
 def _record(seq_id, title, paper_files, design_status,
             results_status, instrument, effects) -> dict:
     return {
@@ -559,19 +717,224 @@ def _failed_record(seq_id, paper_files) -> dict:
     return _record(seq_id, f"seq={seq_id}", paper_files,
                    "failed", "failed", {}, [])
 
+# ---------------------------------------------------------------------------
+# Batch mode (--batch)
+# ---------------------------------------------------------------------------
+
+def load_batch_state() -> dict | None:
+    return json.loads(BATCH_STATE.read_text()) if BATCH_STATE.exists() else None
+
+
+def save_batch_state(state: dict) -> None:
+    BATCH_STATE.parent.mkdir(parents=True, exist_ok=True)
+    tmp = BATCH_STATE.with_name(BATCH_STATE.name + ".tmp")
+    tmp.write_text(json.dumps(state, indent=2))
+    tmp.replace(BATCH_STATE)
+
+
+async def build_batch_requests(phase: str, state: dict, cache: KVCache, pool) -> list[dict]:
+    """One request per study still missing this phase's result; the custom_id
+    is the cache key the result is stored under."""
+    async def build_one(seq_id: int) -> dict | None:
+        pdf_paths = find_pdfs(seq_id)
+        if not pdf_paths:
+            return None
+        if phase == "pass1":
+            key = p1_key(seq_id)
+            if key in cache and not state["force"]:
+                return None
+            paper_text, _ = await get_paper_text(seq_id, pdf_paths, pool)
+            prompt = pass1_prompt(paper_text)
+        elif phase == "pass2":
+            key    = p2_key(seq_id)
+            design = cache.get(p1_key(seq_id))
+            if design is None or expected_pairs(design) == 0 \
+                    or (key in cache and not state["force"]):
+                return None
+            paper_text, _    = await get_paper_text(seq_id, pdf_paths, pool)
+            p2_text, context = await pass2_context(pdf_paths, paper_text, design, pool)
+            prompt           = pass2_prompt(p2_text, design, context)
+        else:                                       # "retry": missing pairs, full text
+            design  = cache.get(p1_key(seq_id))
+            effects = cache.get(p2_key(seq_id))
+            if design is None or effects is None \
+                    or coverage(effects, expected_pairs(design)) >= COVERAGE_OK:
+                return None
+            missing = missing_pairs(effects, design)
+            if not missing:
+                return None
+            paper_text, _ = await get_paper_text(seq_id, pdf_paths, pool)
+            prompt = retry_prompt(paper_text, design, missing)
+            key    = "retry__" + p2_key(seq_id)
+        return {"custom_id": key, "method": "POST", "url": "/v1/chat/completions",
+                "body": request_body(prompt)}
+
+    # PDFs are parsed in the pool for all studies at once; lines stay in seq_id order
+    requests = await asyncio.gather(*(build_one(seq_id) for seq_id in state["seq_ids"]))
+    return [r for r in requests if r is not None]
+
+
+async def submit_batches(phase: str, requests: list[dict], state: dict) -> None:
+    """Upload in files of up to MAX_BATCH_BYTES; the state is saved after each
+    batch so an interrupted submission is not sent twice."""
+    files, lines, size = [], [], 0
+    for r in requests:
+        line = (json.dumps(r, ensure_ascii=False) + "\n").encode()
+        if lines and size + len(line) > MAX_BATCH_BYTES:
+            files.append(lines)
+            lines, size = [], 0
+        lines.append(line)
+        size += len(line)
+    files.append(lines)
+
+    for i, lines in enumerate(files):
+        content  = b"".join(lines)
+        print(f"  [{phase} {i+1}/{len(files)}] uploading {len(lines)} requests "
+              f"({len(content)/1e6:.1f} MB) …")
+        file_obj = await client.files.create(file=io.BytesIO(content), purpose="batch")
+        batch    = await client.batches.create(
+            input_file_id=file_obj.id,
+            endpoint="/v1/chat/completions",
+            completion_window="24h",
+        )
+        print(f"    batch_id={batch.id}  status={batch.status}")
+        state["batches"].append({"phase": phase, "id": batch.id, "requests": len(lines),
+                                 "status": "submitted"})
+        save_batch_state(state)
+
+
+async def collect_batch(entry: dict, cache: KVCache) -> bool:
+    """Store a finished batch's results in the cache; False if still running."""
+    batch  = await client.batches.retrieve(entry["id"])
+    counts = batch.request_counts
+    print(f"  [{entry['phase']}] {entry['id']}  status={batch.status}  "
+          f"completed={counts.completed}/{counts.total}  failed={counts.failed}")
+    if batch.status not in ("completed", "failed", "expired", "cancelled"):
+        return False
+
+    stored = 0
+    if batch.output_file_id:                     # expired batches keep their finished part
+        raw = (await client.files.content(batch.output_file_id)).text
+        for line in raw.splitlines():
+            if not line.strip():
+                continue
+            r       = json.loads(line)
+            body    = (r.get("response") or {}).get("body") or {}
+            choices = body.get("choices") or [{}]
+            parsed  = parse_json(choices[0].get("message", {}).get("content"))
+            key     = r["custom_id"]
+            if key.startswith("p1__") and parsed is not None:
+                cache[key] = parsed
+                stored += 1
+            elif key.startswith("p2__"):
+                cache[key] = (parsed or {}).get("effects", [])
+                stored += 1
+            elif key.startswith("retry__"):
+                key     = key[len("retry__"):]
+                seq_id  = int(key.split("__")[1])
+                design  = cache.get(p1_key(seq_id))
+                if design is None:                  # pass-1 entry removed since submission
+                    continue
+                effects = cache.get(key, [])
+                merged, _ = merge_effects(effects, (parsed or {}).get("effects", []),
+                                          missing_pairs(effects, design))
+                cache[key] = merged
+                stored += 1
+    print(f"    stored {stored}/{entry['requests']} results")
+    entry["status"] = batch.status if batch.status != "completed" else "collected"
+    return True
+
+
+def resume_command(state: dict) -> str:
+    """The command that continues a stored batch run; its study list,
+    --pass1-only and --force come from the state file."""
+    flags = (" --pass2-tables" if state["pass2_tables"] else "") \
+        + (" --pass2-passages" if state.get("pass2_passages") else "")
+    return f"python 01_extract_study_data.py --batch --model {state['model']}{flags}"
+
+
+async def run_batch() -> bool:
+    """Advance the batch run as far as possible; True once every phase is
+    collected and study_data.jsonl can be written from the cache."""
+    state = load_batch_state()
+    if state is None:
+        state = {"model": args.model, "pass2_tables": args.pass2_tables,
+                 "pass2_passages": args.pass2_passages,
+                 "pass1_only": args.pass1_only, "force": args.force,
+                 "seq_ids": sorted(args.seq_ids or discover_all_seq_ids()),
+                 "phase": "pass1", "batches": []}
+        save_batch_state(state)
+    else:
+        # --seq-ids / --pass1-only / --force may be left out when resuming (the
+        # stored values apply), but must not contradict the run in progress
+        clash = (state["model"], state["pass2_tables"], state.get("pass2_passages", False)) \
+            != (args.model, args.pass2_tables, args.pass2_passages) \
+            or (args.seq_ids is not None and sorted(args.seq_ids) != state["seq_ids"]) \
+            or (args.pass1_only and not state["pass1_only"]) \
+            or (args.force and not state["force"])
+        if clash:
+            raise SystemExit(f"A batch run is in progress for {len(state['seq_ids'])} studies with "
+                             f"model={state['model']} pass2_tables={state['pass2_tables']} "
+                             f"pass2_passages={state.get('pass2_passages', False)} "
+                             f"pass1_only={state['pass1_only']} force={state['force']}.\n"
+                             f"Resume it with `{resume_command(state)}`, or delete "
+                             f"{BATCH_STATE} to abandon it.")
+    phases = ["pass1"] if state["pass1_only"] else ["pass1", "pass2", "retry"]
+    print(f"Batch run: {len(state['seq_ids'])} studies  |  model={state['model']}  "
+          f"pass1_only={state['pass1_only']}  force={state['force']}  "
+          f"phase={state['phase']}  |  state → {BATCH_STATE}\n")
+
+    cache = load_cache()
+    with pdf_pool(args.pdf_workers) as pool:
+        while state["phase"] != "done":
+            phase   = state["phase"]
+            pending = [b for b in state["batches"]
+                       if b["phase"] == phase and b["status"] == "submitted"]
+            if not pending and not any(b["phase"] == phase for b in state["batches"]):
+                requests = await build_batch_requests(phase, state, cache, pool)
+                if requests:
+                    await submit_batches(phase, requests, state)
+                    pending = [b for b in state["batches"] if b["phase"] == phase]
+                else:
+                    print(f"  [{phase}] nothing to submit — every study is cached")
+            done = [await collect_batch(b, cache) for b in pending]
+            save_batch_state(state)
+            if not all(done):
+                if not args.wait:
+                    print(f"\nBatches still running (results within 24h). Re-run "
+                          f"`{resume_command(state)}` to collect them.")
+                    return False
+                await asyncio.sleep(BATCH_POLL_SEC)
+                continue
+            i = phases.index(phase)
+            state["phase"] = phases[i + 1] if i + 1 < len(phases) else "done"
+            save_batch_state(state)
+
+    args.seq_ids    = state["seq_ids"]
+    args.pass1_only = state["pass1_only"]
+    args.force      = False                      # everything below is read from the cache
+    return True
+
 # ---------------------------------------------------------------------------
 # Main
 # ---------------------------------------------------------------------------
 
 async def main():
+    if args.batch:
+        if not await run_batch():
+            return
+        print(f"\nAll batches collected — writing {OUTPUT_PATH.name} from the cache "
+              f"(studies without a batch result go live)\n")
+
     seq_ids = args.seq_ids or discover_all_seq_ids()
     print(f"Processing {len(seq_ids)} studies  |  model={args.model}  "
           f"force={args.force}  pass1_only={args.pass1_only}\n")
 
     cache       = load_cache()
     sem         = asyncio.Semaphore(MAX_CONCURRENT)
-    tasks       = [extract_one(sid, cache, sem) for sid in sorted(seq_ids)]
-    raw_results = await asyncio.gather(*tasks)
+    with pdf_pool(args.pdf_workers) as pool:
+        tasks       = [extract_one(sid, cache, sem, pool) for sid in sorted(seq_ids)]
+        raw_results = await asyncio.gather(*tasks)
     results     = [r for r in raw_results if r is not None]
 
     OUTPUT_PATH.parent.mkdir(parents=True, exist_ok=True)
@@ -596,6 +959,8 @@ async def main():
     print(f"Simulatable          : {sim}")
     print(f"Total non-null deltas: {total_fx}")
     print(f"Output → {OUTPUT_PATH}")
+    if args.batch:
+        BATCH_STATE.unlink(missing_ok=True)
 
 
 if __name__ == "__main__":
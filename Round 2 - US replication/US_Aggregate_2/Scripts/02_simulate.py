@@ -6,12 +6,13 @@ marked is_simulatable=true, generates N simulated participant responses per arm
 × outcome combination using gpt-4.1 at temperature=1.
 
 Reads  : Data/Ground_Truth/study_data.jsonl
-Writes : Data/Simulation/Batch_Input/batch_*.jsonl     (default / --generate)
+Writes : Data/Simulation/Batch_Input/batch_*.jsonl     (default / --generate;
+                                                         .jsonl.zst with --compress zst)
          Data/Simulation/aggregate_simulation_raw.jsonl (--async or --download)
 
 Usage:
     # Generate batch input file for manual upload (default):
-    python 02_simulate.py [--n 50]
+    python 02_simulate.py [--n 50] [--compress zst|gz]
 
     # Submit directly to OpenAI Batch API:
     python 02_simulate.py --submit [--n 50]
@@ -26,15 +27,20 @@ Usage:
     python 02_simulate.py --list
 """
 
-import argparse, asyncio, io, json, random, re, time, uuid
+import argparse, asyncio, functools, hashlib, io, json, random, re, time, uuid
 from pathlib import Path
 from collections import defaultdict
 from tqdm import tqdm
 from openai import AsyncOpenAI, OpenAI, RateLimitError, APIConnectionError, APIError
 
+from custom_ids import CustomIdCodec, MANIFEST_NAME
+from jsonl_io import glob_jsonl, open_text, plain_path, resolve
+from parse_memo import memoized, memo_stats_line
+from sim_stats import SimStats
+
 SCRIPT_DIR   = Path(__file__).resolve().parent
 DATA_DIR     = SCRIPT_DIR.parent / "Data"
-STUDIES_PATH = DATA_DIR / "Ground_Truth" / "study_data.jsonl"
+STUDIES_PATH = resolve(DATA_DIR / "Ground_Truth" / "study_data.jsonl")
 MODEL        = "gpt-4.1"
 
 MAX_TOKENS_PER_CHUNK  = 1_345_000
@@ -43,6 +49,8 @@ MAX_ASYNC_CONCURRENT  = 20   # semaphore cap for async mode (avoids rate limit b
 MODEL_PARAMS = {"temperature": 1, "top_p": 1}
 
 OUTPUT_PATH  = DATA_DIR / "Simulation" / "aggregate_simulation_raw.jsonl"
+ID_MANIFEST  = DATA_DIR / "Simulation" / MANIFEST_NAME   # custom_id → request
+SIM_CONFIG   = "default"                                 # config tag in the manifest
 
 
 SYSTEM_PROMPT = (
@@ -57,56 +65,149 @@ SYSTEM_PROMPT = (
 # Response parsers
 # ---------------------------------------------------------------------------
 
+# universal_categorical_parse rules in precedence order: the FIRST rule that
+# matches anywhere in the upper-cased, stripped response wins.  Each rule is
+# (value, [(kind, word), ...]) where kind is
+#   "sub"    — word occurs anywhere           ("X" in t)
+#   "word"   — whole word                     (re.search(r"\bX\b", t))
+#   "token"  — whitespace-delimited token     ("X" in t.split())
+#   "full"   — the whole response             (t == "X")
+#   "prefix" — response starts with it        (t.startswith("X"))
+#   "number" — response is a bare number      (value None → float(t))
+#
+# compile_rules() turns the table into two regexes, built once at import.
+# Keep the table in sync with the reference chain in check_parsers.py, which
+# verifies equivalence on every stored batch response.
+
+_POSITIVE = ["SUPPORT", "FAVOR", "AGREE", "TRUE", "ACCEPT", "APPROVE", "WILLING",
+             "1", "A", "OPTION A", "JOB A"]
+_NEGATIVE = ["OPPOSE", "PREFER THE CURRENT", "KEEP THE CURRENT", "DISAGREE",
+             "FALSE", "REJECT", "DISAPPROVE", "UNWILLING", "0", "B", "OPTION B",
+             "JOB B"]
+
+CATEGORICAL_RULES: list[tuple[float | None, list[tuple[str, str]]]] = [
+    (1.0,  [("sub", "MESSAGE 1")]),
+    (0.0,  [("sub", "MESSAGE 2")]),
+    (1.0,  [("sub", "INCREASE")]),
+    (0.0,  [("sub", "DECREASE")]),
+    (0.5,  [("sub", "NEITHER")]),
+    (1.0,  [("sub", "INFLATION")]),
+    (0.0,  [("sub", "UNEMPLOYMENT")]),
+    (1.0,  [("token", "FOR"), ("sub", "FOR.")]),
+    (0.0,  [("token", "AGAINST"), ("sub", "AGAINST.")]),
+    (1.0,  [("sub", "VERY SURE")]),
+    (0.0,  [("sub", "VERY UNSURE")]),
+    (0.75, [("full", "SURE"), ("sub", "SURE.")]),
+    (0.25, [("full", "UNSURE"), ("sub", "UNSURE.")]),
+    (1.0,  [("full", "ALL"), ("prefix", "ALL ")]),
+    (0.0,  [("full", "NONE"), ("prefix", "NONE ")]),
+    (0.5,  [("token", "SOME"), ("sub", "SOME.")]),
+    (0.5,  [("sub", "DON'T KNOW"), ("sub", "DO NOT KNOW")]),
+    (1.0,  [("sub", "ALREADY KNEW"), ("sub", "ALREADY CONSIDERED")]),
+    (0.0,  [("sub", "DIDN'T FIND"), ("sub", "NOT CONVINCING"),
+            ("sub", "UNCONVINCING")]),
+    (0.5,  [("prefix", "OTHER")]),
+    (0.5,  [("sub", "INTEREST")]),
+    (1.0,  [("sub", "PRICE")]),
+    (0.5,  [("sub", "CONSUMPTION")]),
+    (0.0,  [("sub", "EMPLOYMENT"), ("sub", "LABOR"), ("sub", "LABOUR")]),
+    (0.5,  [("sub", "INCOME"), ("sub", "WEALTH")]),
+    (0.5,  [("sub", "STOCK"), ("sub", "HOUSING")]),
+    (0.5,  [("full", c) for c in "CDEFG"]),
+    (1.0,  [("prefix", "YES")]),
+    (0.0,  [("prefix", "NO")]),
+    (1.0,  [("word", "YES")]),
+    (0.0,  [("word", "NO")]),
+    (1.0,  [("word", w) for w in _POSITIVE]),
+    (0.0,  [("word", w) for w in _NEGATIVE]),
+    (None, [("number", "")]),
+]
+
+
+def _branch(kind: str, word: str) -> tuple[str, str]:
+    """(first char, rest) regex for one (kind, word).
+
+    A leading \\b or (?<!\\S) is re-expressed as a lookbehind placed after the
+    first character — equivalent, but it lets branches be bucketed by their
+    first literal so the regex engine skips whole buckets with one compare.
+    Anchored kinds return an empty first char.
+    """
+    head, tail = re.escape(word[:1]), re.escape(word[1:])
+    if kind == "sub":
+        return head, tail
+    if kind == "word":
+        return head, rf"(?<!\w{head}){tail}\b"
+    if kind == "token":
+        return head, rf"(?<!\S{head}){tail}(?!\S)"
+    if kind == "full":
+        return "", rf"{re.escape(word)}\Z"
+    if kind == "prefix":
+        return "", re.escape(word)
+    if kind == "number":
+        return "", r"[-+]?\d+\.?\d*\Z"
+    raise ValueError(f"unknown rule kind: {kind}")
+
+
+def compile_rules(rules: list[tuple[float | None, list[tuple[str, str]]]]):
+    """Build one precedence-ordered matcher from a rule table.
+
+    Returns parse(t) → value of the first rule (in table order) that matches
+    t, or None.  Anchored branches form one alternation tried at position 0;
+    the rest form one lookahead alternation, bucketed by first character,
+    that a single finditer scan evaluates at every position.  Every branch
+    ends in an empty capture group, so m.lastindex maps back to its rule.
+    Within a bucket branches keep table order, hence at any one position the
+    engine reports the highest-precedence rule that matches there.
+    """
+    anchored, buckets = [], {}
+    for idx, (_, alts) in enumerate(rules):
+        for kind, word in alts:
+            head, rest = _branch(kind, word)
+            if head:
+                buckets.setdefault(head, []).append((idx, rest))
+            else:
+                anchored.append((idx, rest))
+
+    a_ids, f_ids = [None], [None]          # 1-based, like m.lastindex
+    a_pat = "|".join(f"(?:{rest})()" for _, rest in anchored)
+    a_ids += [idx for idx, _ in anchored]
+    f_alts = []
+    for head, branches in buckets.items():
+        f_alts.append(head + "(?:" + "|".join(f"(?:{rest})()"
+                                               for _, rest in branches) + ")")
+        f_ids += [idx for idx, _ in branches]
+
+    a_re   = re.compile(a_pat)
+    f_re   = re.compile("(?=" + "|".join(f_alts) + ")")
+    values = [v for v, _ in rules]
+    n      = len(rules)
+
+    def parse(t: str) -> float | None:
+        m    = a_re.match(t)
+        best = a_ids[m.lastindex] if m else n
+        for m in f_re.finditer(t):
+            idx = f_ids[m.lastindex]
+            if idx < best:
+                best = idx
+                if idx == 0:
+                    break
+        if best == n:
+            return None
+        v = values[best]
+        return float(t) if v is None else v
+
+    return parse
+
+
+_categorical = compile_rules(CATEGORICAL_RULES)
+
+_NUMBER_RE  = re.compile(r"[-+]?\d+\.?\d*")
+_INTEGER_RE = re.compile(r"[-+]?\d+")
+_PERCENT_RE = re.compile(r"(\d+\.?\d*)\s*%")
+
+
 def universal_categorical_parse(text: str) -> float | None:
-    t = text.strip().upper()
-
-    if "MESSAGE 1" in t: return 1.0
-    if "MESSAGE 2" in t: return 0.0
-    if "INCREASE" in t: return 1.0
-    if "DECREASE" in t: return 0.0
-    if "NEITHER" in t: return 0.5
-    if "INFLATION" in t: return 1.0
-    if "UNEMPLOYMENT" in t: return 0.0
-    if "FOR" in t.split() or "FOR." in t: return 1.0
-    if "AGAINST" in t.split() or "AGAINST." in t: return 0.0
-
-    if "VERY SURE" in t: return 1.0
-    if "VERY UNSURE" in t: return 0.0
-    if t == "SURE" or "SURE." in t: return 0.75
-    if t == "UNSURE" or "UNSURE." in t: return 0.25
-
-    if t == "ALL" or t.startswith("ALL "): return 1.0
-    if t == "NONE" or t.startswith("NONE "): return 0.0
-    if "SOME" in t.split() or "SOME." in t: return 0.5
-    if "DON'T KNOW" in t or "DO NOT KNOW" in t: return 0.5
-
-    if "ALREADY KNEW" in t or "ALREADY CONSIDERED" in t: return 1.0
-    if "DIDN'T FIND" in t or "NOT CONVINCING" in t or "UNCONVINCING" in t: return 0.0
-    if t == "OTHER" or t.startswith("OTHER"): return 0.5
-
-    if "INTEREST" in t: return 0.5
-    if "PRICE" in t: return 1.0
-    if "CONSUMPTION" in t: return 0.5
-    if "EMPLOYMENT" in t or "LABOR" in t or "LABOUR" in t: return 0.0
-    if "INCOME" in t or "WEALTH" in t: return 0.5
-    if "STOCK" in t or "HOUSING" in t: return 0.5
-    if t in ("C", "D", "E", "F", "G"): return 0.5
-
-    if t.startswith("YES"): return 1.0
-    if t.startswith("NO"):  return 0.0
-    if re.search(r'\bYES\b', t): return 1.0
-    if re.search(r'\bNO\b',  t): return 0.0
-
-    positive = r'\b(SUPPORT|FAVOR|AGREE|TRUE|ACCEPT|APPROVE|WILLING|1|A|OPTION A|JOB A)\b'
-    negative = r'\b(OPPOSE|PREFER THE CURRENT|KEEP THE CURRENT|DISAGREE|FALSE|REJECT|DISAPPROVE|UNWILLING|0|B|OPTION B|JOB B)\b'
-    if re.search(positive, t): return 1.0
-    if re.search(negative, t): return 0.0
-
-    m = re.search(r'^[-+]?\d+\.?\d*$', t)
-    if m:
-        return float(m.group())
-
-    return None
+    return _categorical(text.strip().upper())
 
 
 def parse_binary(text: str) -> float | None:
@@ -114,9 +215,9 @@ def parse_binary(text: str) -> float | None:
 
 
 def parse_percent(text: str) -> float | None:
-    m = re.search(r"(\d+\.?\d*)\s*%", text)
+    m = _PERCENT_RE.search(text)
     if not m:
-        m = re.search(r"[-+]?\d+\.?\d*", text.strip())
+        m = _NUMBER_RE.search(text.strip())
     if not m:
         return None
     val = float(m.group(1) if m.lastindex else m.group())
@@ -124,7 +225,7 @@ def parse_percent(text: str) -> float | None:
 
 
 def parse_proportion(text: str) -> float | None:
-    m = re.search(r"[-+]?\d+\.?\d*", text.strip())
+    m = _NUMBER_RE.search(text.strip())
     if not m:
         return None
     val = float(m.group())
@@ -134,7 +235,7 @@ def parse_proportion(text: str) -> float | None:
 
 
 def parse_integer(text: str) -> float | None:
-    m = re.search(r"[-+]?\d+", text.strip())
+    m = _INTEGER_RE.search(text.strip())
     return float(int(m.group())) if m else None
 
 
@@ -142,13 +243,21 @@ def parse_choice_ab(text: str) -> float | None:
     val = universal_categorical_parse(text)
     if val is not None:
         return val
-    m = re.search(r'[-+]?\d+', text.strip())
-    return float(int(m.group())) if m else None
+    return parse_integer(text)
 
 
+def parse_flexible(text: str) -> float | None:
+    val = universal_categorical_parse(text)
+    if val is not None:
+        return val
+    return parse_integer(text)
+
+
+@functools.lru_cache(maxsize=None)
 def make_scale_parser(lo: float, hi: float):
+    # One parser object per (lo, hi): studies sharing a scale share a parser.
     def parser(text: str) -> float | None:
-        m = re.search(r"[-+]?\d+\.?\d*", text.strip())
+        m = _NUMBER_RE.search(text.strip())
         if m:
             return max(lo, min(hi, float(m.group())))
         val = universal_categorical_parse(text)
@@ -174,14 +283,58 @@ def resolve_parser(fmt: str, scale_min=None, scale_max=None):
         return FIXED_PARSERS[fmt]
     if fmt in ("scale", "dollar") and scale_min is not None and scale_max is not None:
         return make_scale_parser(float(scale_min), float(scale_max))
-    def _flexible_parser(text: str) -> float | None:
-        val = universal_categorical_parse(text)
-        if val is not None:
-            return val
-        return parse_integer(text)
-    return _flexible_parser
+    return parse_flexible
 
 # ---------------------------------------------------------------------------
+# Parser versions — every parsed record carries a "parser" tag such as
+# "binary@1:5c0e2a" or "scale[1,7]@1:5c0e2a".  `03_unpack_batches.py --reparse`
+# re-parses only records whose tag no longer matches the current one.
+#
+# Bump a kind's version when its own code changes behaviour.  Kinds that fall
+# back on universal_categorical_parse also carry a fingerprint of
+# CATEGORICAL_RULES, so editing the rule table invalidates them automatically.
+# ---------------------------------------------------------------------------
+
+PARSER_VERSIONS = {
+    "binary":     1,
+    "percent":    1,
+    "proportion": 1,
+    "integer":    1,
+    "choice":     1,
+    "choice_ab":  1,
+    "other":      1,
+    "scale":      1,
+    "flexible":   1,
+}
+
+_CATEGORICAL_KINDS = {"binary", "choice", "choice_ab", "other", "scale", "flexible"}
+RULES_FINGERPRINT  = hashlib.blake2b(repr(CATEGORICAL_RULES).encode(),
+                                     digest_size=3).hexdigest()
+
+
+def parser_tag(fmt: str, scale_min=None, scale_max=None) -> str:
+    """Version tag of the parser resolve_parser(fmt, scale_min, scale_max) returns."""
+    if fmt in FIXED_PARSERS:
+        kind, name = fmt, fmt
+    elif fmt in ("scale", "dollar") and scale_min is not None and scale_max is not None:
+        kind, name = "scale", f"scale[{float(scale_min):g},{float(scale_max):g}]"
+    else:
+        kind, name = "flexible", "flexible"
+    tag = f"{name}@{PARSER_VERSIONS[kind]}"
+    if kind in _CATEGORICAL_KINDS:
+        tag += f":{RULES_FINGERPRINT}"
+    return tag
+
+
+FALLBACK_PARSER_TAG = parser_tag("integer")   # outcome not in study configs
+
+
+def tag_kind(tag: str | None) -> str | None:
+    """Parser kind of a stored tag ("scale[1,7]@1:5c0e2a" → "scale")."""
+    if not tag:
+        return None
+    return tag.split("@", 1)[0].split("[", 1)[0]
+# ---------------------------------------------------------------------------
 # Slugify — must match 01_extract_study_data.py and 04_compare_effects.py
 # ---------------------------------------------------------------------------
 
@@ -199,7 +352,7 @@ def load_study_configs(path: Path) -> dict[int, dict]:
         )
 
     configs = {}
-    with open(path) as f:
+    with open_text(path) as f:
         for line in f:
             if not line.strip():
                 continue
@@ -245,7 +398,8 @@ def load_study_configs(path: Path) -> dict[int, dict]:
                     "id":              oid,
                     "response_format": fmt,
                     "question":        question_block,
-                    "_parser":         resolve_parser(fmt, lo, hi),
+                    "_parser":         memoized(resolve_parser(fmt, lo, hi)),
+                    "_parser_tag":     parser_tag(fmt, lo, hi),
                 })
 
             configs[seq_id] = {
@@ -261,14 +415,41 @@ def load_study_configs(path: Path) -> dict[int, dict]:
 # Prompt builder
 # ---------------------------------------------------------------------------
 
-def build_prompt(config: dict, arm_id: str, outcome: dict) -> str:
-    return config["preamble"] + config["arms"][arm_id] + outcome["question"]
+def build_messages(config: dict, arm_id: str, outcome: dict) -> list[dict]:
+    """Chat messages for one arm × outcome prompt.
+
+    The study preamble is sent as its own leading user message, so every arm
+    and outcome of a study shares a byte-identical system + preamble prefix
+    that the API can serve from its prompt cache.  Only the trailing message
+    (arm text + question) varies between requests.
+    """
+    messages = [{"role": "system", "content": SYSTEM_PROMPT}]
+    if config["preamble"]:
+        messages.append({"role": "user", "content": config["preamble"]})
+    messages.append({"role": "user",
+                     "content": config["arms"][arm_id] + outcome["question"]})
+    return messages
+
+
+def prompt_cache_key(seq_id) -> str:
+    """Routing hint so requests sharing a study prefix land on the same cache."""
+    return f"{MODEL}__seq{seq_id}"
+
+
+def usage_fields(usage: dict | None) -> dict:
+    """Prompt / cached token counts from a chat completion `usage` block."""
+    usage   = usage or {}
+    details = usage.get("prompt_tokens_details") or {}
+    return {
+        "prompt_tokens": usage.get("prompt_tokens"),
+        "cached_tokens": details.get("cached_tokens"),
+    }
 
 # ---------------------------------------------------------------------------
 # Async simulation runner
 # ---------------------------------------------------------------------------
 
-async def simulate_one(client, seq_id, arm_id, outcome, prompt, model_params,
+async def simulate_one(client, seq_id, arm_id, outcome, messages, model_params,
                        sem: asyncio.Semaphore,
                        retries: int = 6) -> dict:
     pid        = str(uuid.uuid4())
@@ -280,10 +461,8 @@ async def simulate_one(client, seq_id, arm_id, outcome, prompt, model_params,
                     model=MODEL,
                     max_completion_tokens=4096,
                     **model_params,
-                    messages=[
-                        {"role": "system", "content": SYSTEM_PROMPT},
-                        {"role": "user",   "content": prompt},
-                    ],
+                    prompt_cache_key=prompt_cache_key(seq_id),
+                    messages=messages,
                 )
             text  = (r.choices[0].message.content or "").strip()
             value = outcome["_parser"](text)
@@ -295,6 +474,8 @@ async def simulate_one(client, seq_id, arm_id, outcome, prompt, model_params,
                 "response":   text,
                 "value":      value,
                 "parse_ok":   value is not None,
+                "parser":     outcome.get("_parser_tag"),
+                **usage_fields(r.usage.model_dump() if r.usage else None),
             }
         except RateLimitError as e:
             last_error = str(e)
@@ -316,20 +497,30 @@ async def simulate_one(client, seq_id, arm_id, outcome, prompt, model_params,
 
 
 async def run_study(client, config, n_per_arm, writer, pbar, model_params, sem):
-    tasks = []
+    # Jobs are listed prefix-grouped (arm → outcome → sample) and turned into
+    # tasks in that order, so the semaphore releases identical prompts back to
+    # back.  The first call is awaited alone: it writes the shared system +
+    # preamble prefix into the prompt cache before the rest of the study fans out.
+    seq_id = config["seq_id"]
+    jobs   = []
     for arm_id in config["arms"]:
         for outcome in config["outcomes"]:
-            prompt = build_prompt(config, arm_id, outcome)
-            for _ in range(n_per_arm):
-                tasks.append(
-                    simulate_one(client, config["seq_id"], arm_id,
-                                 outcome, prompt, model_params, sem)
-                )
-    for coro in asyncio.as_completed(tasks):
-        rec = await coro
+            messages = build_messages(config, arm_id, outcome)
+            jobs.extend([(arm_id, outcome, messages)] * n_per_arm)
+    if not jobs:
+        return
+
+    def _write(rec):
         writer.write(json.dumps(rec, ensure_ascii=False) + "\n")
         pbar.update(1)
 
+    _write(await simulate_one(client, seq_id, *jobs[0], model_params, sem))
+    tasks = [asyncio.create_task(simulate_one(client, seq_id, *job,
+                                              model_params, sem))
+             for job in jobs[1:]]
+    for coro in asyncio.as_completed(tasks):
+        _write(await coro)
+
 
 async def run_async(n_per_arm: int, study_configs: dict):
     client = AsyncOpenAI()
@@ -348,6 +539,7 @@ async def run_async(n_per_arm: int, study_configs: dict):
 
     with open(OUTPUT_PATH) as f:
         records = [json.loads(l) for l in f]
+    _save_stats(records)
     _print_summary(records)
     print(f"Output → {OUTPUT_PATH}")
 
@@ -356,27 +548,31 @@ async def run_async(n_per_arm: int, study_configs: dict):
 # ---------------------------------------------------------------------------
 
 def build_batch_requests(n_per_arm: int, study_configs: dict) -> list[dict]:
+    """custom_ids are compact manifest ids (custom_ids.py); the manifest rows
+    are written before the requests are returned."""
     model_params = MODEL_PARAMS
+    codec    = CustomIdCodec(ID_MANIFEST, SIM_CONFIG)
     requests = []
+    # Requests are emitted prefix-grouped (study → arm → outcome → sample) so
+    # identical prefixes sit next to each other within a chunk.
     for seq_id, config in study_configs.items():
         for arm_id in config["arms"]:
             for outcome in config["outcomes"]:
-                prompt = build_prompt(config, arm_id, outcome)
+                messages = build_messages(config, arm_id, outcome)
                 for i in range(n_per_arm):
                     requests.append({
-                        "custom_id": f"{seq_id}__{arm_id}__{outcome['id']}__{i}",
+                        "custom_id": codec.encode(seq_id, arm_id, outcome["id"], i),
                         "method":    "POST",
                         "url":       "/v1/chat/completions",
                         "body": {
                             "model": MODEL,
                             "max_completion_tokens": 4096,
                             **model_params,
-                            "messages": [
-                                {"role": "system", "content": SYSTEM_PROMPT},
-                                {"role": "user",   "content": prompt},
-                            ],
+                            "prompt_cache_key": prompt_cache_key(seq_id),
+                            "messages": messages,
                         },
                     })
+    codec.close()
     return requests
 
 
@@ -395,19 +591,21 @@ def chunk_requests(requests: list[dict],
     return chunks
 
 
-def generate_batch_file(n_per_arm: int, study_configs: dict):
+def generate_batch_file(n_per_arm: int, study_configs: dict, compress: str | None = None):
+    """compress: None, "zst" or "gz" — codec for the written files (jsonl_io.py)."""
     batch_dir = DATA_DIR / "Simulation" / "Batch_Input"
     batch_dir.mkdir(parents=True, exist_ok=True)
+    suffix    = ".jsonl" + (f".{compress}" if compress else "")
 
-    for old in batch_dir.glob("batch_*.jsonl"):
+    for old in glob_jsonl(batch_dir, "batch_*"):
         old.unlink()
 
     requests = build_batch_requests(n_per_arm, study_configs)
     chunks   = chunk_requests(requests)
 
     for i, chunk in enumerate(chunks):
-        out_file = batch_dir / f"batch_{i+1:02d}_of_{len(chunks):02d}.jsonl"
-        with open(out_file, "w") as f:
+        out_file = batch_dir / f"batch_{i+1:02d}_of_{len(chunks):02d}{suffix}"
+        with open_text(out_file, "w") as f:
             for r in chunk:
                 f.write(json.dumps(r, ensure_ascii=False) + "\n")
         size_kb    = out_file.stat().st_size / 1024
@@ -416,9 +614,12 @@ def generate_batch_file(n_per_arm: int, study_configs: dict):
               f"{size_kb:>7.1f} KB  ~{est_tokens:>7,} tokens  → {out_file.name}")
 
     print(f"\nmodel={MODEL}  temperature=1  |  n={n_per_arm}  |  {len(chunks)} file(s)")
+    if compress:
+        print("Decompress on the uploading machine first:")
+        print(f"  python jsonl_io.py decompress {batch_dir}/batch_*{suffix}")
     print(f"Upload via OpenAI dashboard or:")
-    for f in sorted(batch_dir.glob("batch_*.jsonl")):
-        print(f"  openai api files.create -f {f} -p batch")
+    for f in glob_jsonl(batch_dir, "batch_*"):
+        print(f"  openai api files.create -f {plain_path(f)} -p batch")
 
 
 def submit_batch(n_per_arm: int, study_configs: dict) -> list[str]:
@@ -474,6 +675,7 @@ def download_batch(batch_id: str, study_configs: dict):
     with open(OUTPUT_PATH, "w") as f:
         for rec in records:
             f.write(json.dumps(rec, ensure_ascii=False) + "\n")
+    _save_stats(records)
     _print_summary(records)
     print(f"Output → {OUTPUT_PATH}")
 
@@ -486,15 +688,15 @@ def _parse_batch_output(raw: str, study_configs: dict) -> list[dict]:
                 outcome_lookup[(seq_id, arm_id.strip("_"),
                                 outcome["id"].strip("_"))] = outcome
 
+    codec   = CustomIdCodec(ID_MANIFEST, SIM_CONFIG)
     records = []
     for line in raw.splitlines():
         if not line.strip():
             continue
         r      = json.loads(line)
-        parts  = r["custom_id"].split("__")
-        seq_id = int(parts[0])
-        out_id = re.sub(r"_dup\d+$", "", parts[-2]).strip("_")
-        arm_id = "__".join(parts[1:-2]).strip("_")
+        seq_id, arm_id, out_id, _, _ = codec.decode(r["custom_id"])
+        arm_id = arm_id.strip("_")
+        out_id = out_id.strip("_")
 
         if r.get("error"):
             records.append({
@@ -505,31 +707,52 @@ def _parse_batch_output(raw: str, study_configs: dict) -> list[dict]:
             })
             continue
 
-        text    = (r["response"]["body"]["choices"][0]["message"]["content"]
-                   or "").strip()
+        body    = r["response"]["body"]
+        text    = (body["choices"][0]["message"]["content"] or "").strip()
         outcome = outcome_lookup.get((seq_id, arm_id, out_id))
-        parser  = outcome["_parser"] if outcome else parse_integer
+        parser  = outcome["_parser"] if outcome else memoized(parse_integer)
         value   = parser(text)
         records.append({
             "seq_id": seq_id, "arm_id": arm_id, "outcome_id": out_id,
             "pid": r["custom_id"], "response": text,
             "value": value, "parse_ok": value is not None,
+            "parser": outcome["_parser_tag"] if outcome else FALLBACK_PARSER_TAG,
+            **usage_fields(body.get("usage")),
         })
 
+    codec.close()
     return records
 
 
+def _save_stats(records: list[dict]):
+    """Per-cell summary table next to OUTPUT_PATH (read by 04_compare_effects.py)."""
+    stats = SimStats()
+    for rec in records:
+        stats.add(rec)
+    stats.save(OUTPUT_PATH)
+
+
 def _print_summary(records: list[dict]):
     sums: dict[tuple, list] = defaultdict(list)
     for r in records:
         if r["parse_ok"] and r["value"] is not None:
             sums[(r["seq_id"], r["outcome_id"], r["arm_id"])].append(r["value"])
     failures = sum(1 for r in records if not r["parse_ok"])
+    _print_cache_usage(records)
+    print(memo_stats_line())
     print(f"\n── Arm means ({len(records)} records, {failures} parse failures) ──")
     for (seq_id, out_id, arm_id), vals in sorted(sums.items()):
         print(f"  seq={seq_id:>3} {out_id:<25} {arm_id:<40} "
               f"mean={sum(vals)/len(vals):.4f}  n={len(vals)}")
 
+
+def _print_cache_usage(records: list[dict]):
+    prompt_tok = sum(r.get("prompt_tokens") or 0 for r in records)
+    cached_tok = sum(r.get("cached_tokens") or 0 for r in records)
+    if prompt_tok:
+        print(f"\nPrompt tokens: {prompt_tok:,}  cached: {cached_tok:,}  "
+              f"({cached_tok / prompt_tok:.1%} billed at cached rate)")
+
 # ---------------------------------------------------------------------------
 # Entry point
 # ---------------------------------------------------------------------------
@@ -544,6 +767,8 @@ if __name__ == "__main__":
                         help="Run live via async API (immediate, full price)")
     parser.add_argument("--download", metavar="BATCH_ID", default=None)
     parser.add_argument("--list",     action="store_true")
+    parser.add_argument("--compress", choices=["zst", "gz"], default=None,
+                        help="Write batch input files as .jsonl.zst / .jsonl.gz")
     args = parser.parse_args()
 
     study_configs = load_study_configs(STUDIES_PATH)
@@ -560,4 +785,4 @@ if __name__ == "__main__":
     elif args.submit:
         submit_batch(args.n_per_arm, study_configs)
     else:
-        generate_batch_file(args.n_per_arm, study_configs)
+        generate_batch_file(args.n_per_arm, study_configs, args.compress)
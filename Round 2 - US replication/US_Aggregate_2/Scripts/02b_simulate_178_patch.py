@@ -26,6 +26,12 @@ from pathlib import Path
 from openai import AsyncOpenAI, OpenAI, RateLimitError, APIConnectionError, APIError
 import importlib.util, random
 
+from custom_ids import CustomIdCodec
+from jsonl_index import read_records
+from jsonl_io import resolve
+from parse_memo import memoized, memo_stats_line
+from sim_stats import appending, stats_path
+
 SCRIPT_DIR = Path(__file__).resolve().parent
 DATA_DIR   = SCRIPT_DIR.parent / "Data"
 
@@ -37,12 +43,15 @@ _spec = importlib.util.spec_from_file_location("simulate", SCRIPT_DIR / "02_simu
 _sim  = importlib.util.module_from_spec(_spec)
 _spec.loader.exec_module(_sim)
 
-MODEL         = _sim.MODEL
-MODEL_PARAMS  = _sim.MODEL_PARAMS
-SYSTEM_PROMPT = _sim.SYSTEM_PROMPT
-build_prompt  = _sim.build_prompt
-simulate_one  = _sim.simulate_one
-OUTPUT_PATH   = _sim.OUTPUT_PATH
+MODEL            = _sim.MODEL
+MODEL_PARAMS     = _sim.MODEL_PARAMS
+build_messages   = _sim.build_messages
+prompt_cache_key = _sim.prompt_cache_key
+usage_fields     = _sim.usage_fields
+simulate_one     = _sim.simulate_one
+OUTPUT_PATH      = _sim.OUTPUT_PATH
+ID_MANIFEST      = _sim.ID_MANIFEST
+SIM_CONFIG       = _sim.SIM_CONFIG
 MAX_ASYNC_CONCURRENT = _sim.MAX_ASYNC_CONCURRENT
 
 # ---------------------------------------------------------------------------
@@ -60,6 +69,9 @@ args = parser.parse_args()
 # Targeted config: seq=178, durable_goods + non_durable_goods only
 # ---------------------------------------------------------------------------
 
+# Records parsed here are tagged "patch178.<outcome>@N" (bump N when a parser
+# below changes); 03_unpack_batches.py --reparse leaves these tags alone.
+
 def parse_durable_goods(text: str) -> float | None:
     t = text.strip().upper()
     if "GOOD" in t:       return 1.0
@@ -77,8 +89,8 @@ def parse_non_durable_goods(text: str) -> float | None:
 
 
 # Load seq=178 from study_data.jsonl so preamble / arm texts stay canonical
-_all = [json.loads(l) for l in open(DATA_DIR / "Ground_Truth" / "study_data.jsonl")]
-_rec = next(r for r in _all if r["seq_id"] == 178)
+# (seeks to its line via the study_data.idx.json sidecar)
+_rec = next(read_records(resolve(DATA_DIR / "Ground_Truth" / "study_data.jsonl"), 178))
 _inst = _rec["instrument"]
 
 ARMS = {v["arm_id"]: v["text"] for v in _inst["treatment_variations"]}
@@ -94,7 +106,8 @@ OUTCOMES = [
             + _oq_map["durable_goods"]["question_text"] + "\n\n"
             + "Reply with exactly one of: Good time to buy, Uncertain; depends, Bad time to buy."
         ),
-        "_parser":         parse_durable_goods,
+        "_parser":         memoized(parse_durable_goods),
+        "_parser_tag":     "patch178.durable_goods@1",
     },
     {
         "id":              "non_durable_goods",
@@ -104,7 +117,8 @@ OUTCOMES = [
             + _oq_map["non_durable_goods"]["question_text"] + "\n\n"
             + "Reply with exactly one of: Spend more, Spend same, Spend less."
         ),
-        "_parser":         parse_non_durable_goods,
+        "_parser":         memoized(parse_non_durable_goods),
+        "_parser_tag":     "patch178.non_durable_goods@1",
     },
 ]
 
@@ -122,25 +136,25 @@ TOTAL_CALLS = len(ARMS) * len(OUTCOMES) * args.n_per_arm
 # ---------------------------------------------------------------------------
 
 def build_requests() -> list[dict]:
-    reqs = []
+    codec = CustomIdCodec(ID_MANIFEST, SIM_CONFIG)
+    reqs  = []
     for arm_id in ARMS:
         for outcome in OUTCOMES:
-            prompt = build_prompt(CONFIG, arm_id, outcome)
+            messages = build_messages(CONFIG, arm_id, outcome)
             for i in range(args.n_per_arm):
                 reqs.append({
-                    "custom_id": f"178__{arm_id}__{outcome['id']}__{i}",
+                    "custom_id": codec.encode(178, arm_id, outcome["id"], i),
                     "method":    "POST",
                     "url":       "/v1/chat/completions",
                     "body": {
                         "model": MODEL,
                         "max_completion_tokens": 4096,
                         **MODEL_PARAMS,
-                        "messages": [
-                            {"role": "system", "content": SYSTEM_PROMPT},
-                            {"role": "user",   "content": prompt},
-                        ],
+                        "prompt_cache_key": prompt_cache_key(178),
+                        "messages": messages,
                     },
                 })
+    codec.close()
     return reqs
 
 
@@ -183,14 +197,13 @@ def download_and_append(batch_id: str):
         print(f"Batch not completed yet (status={batch.status})")
         return
     content = client.files.content(batch.output_file_id).text
+    codec   = CustomIdCodec(ID_MANIFEST, SIM_CONFIG)
     records = []
     for line in content.splitlines():
         if not line.strip():
             continue
         r      = json.loads(line)
-        parts  = r["custom_id"].split("__")
-        arm_id = parts[1]
-        oid    = parts[2]
+        _, arm_id, oid, _, _ = codec.decode(r["custom_id"])
         if r.get("error"):
             records.append({
                 "seq_id": 178, "arm_id": arm_id, "outcome_id": oid,
@@ -198,14 +211,18 @@ def download_and_append(batch_id: str):
                 "value": None, "parse_ok": False, "error": str(r["error"]),
             })
             continue
-        text    = (r["response"]["body"]["choices"][0]["message"]["content"] or "").strip()
+        body    = r["response"]["body"]
+        text    = (body["choices"][0]["message"]["content"] or "").strip()
         outcome = next(o for o in OUTCOMES if o["id"] == oid)
         value   = outcome["_parser"](text)
         records.append({
             "seq_id": 178, "arm_id": arm_id, "outcome_id": oid,
             "pid": r["custom_id"], "response": text,
             "value": value, "parse_ok": value is not None,
+            "parser": outcome["_parser_tag"],
+            **usage_fields(body.get("usage")),
         })
+    codec.close()
     _append_and_report(records)
 
 
@@ -220,12 +237,12 @@ async def run_async():
     tasks   = []
     for arm_id in ARMS:
         for outcome in OUTCOMES:
-            prompt = build_prompt(CONFIG, arm_id, outcome)
+            messages = build_messages(CONFIG, arm_id, outcome)
             for _ in range(args.n_per_arm):
-                tasks.append(
-                    simulate_one(client, 178, arm_id, outcome, prompt,
+                tasks.append(asyncio.create_task(
+                    simulate_one(client, 178, arm_id, outcome, messages,
                                  MODEL_PARAMS, sem)
-                )
+                ))
     print(f"Running {len(tasks)} calls async  (model={MODEL}  n={args.n_per_arm})")
     for coro in asyncio.as_completed(tasks):
         records.append(await coro)
@@ -238,15 +255,19 @@ async def run_async():
 
 def _append_and_report(records: list[dict]):
     OUTPUT_PATH.parent.mkdir(parents=True, exist_ok=True)
-    with open(OUTPUT_PATH, "a") as f:
+    # The per-cell summary table is updated with just these records
+    with appending(OUTPUT_PATH) as stats, open(OUTPUT_PATH, "a") as f:
         for rec in records:
             f.write(json.dumps(rec, ensure_ascii=False) + "\n")
+            stats.add(rec)
 
     n_ok   = sum(1 for r in records if r["parse_ok"])
     n_fail = len(records) - n_ok
     print(f"\nAppended {len(records)} records to {OUTPUT_PATH.name}")
+    print(f"  summary  : {stats_path(OUTPUT_PATH).name} updated")
     print(f"  parse ok : {n_ok}")
     print(f"  failures : {n_fail}")
+    print(f"  {memo_stats_line()}")
     if n_fail:
         for r in records:
             if not r["parse_ok"]:
@@ -7,17 +7,53 @@ Reads manually-downloaded batch output files from
 and consolidates them into:
     Data/Simulation/aggregate_simulation_raw_{config}.jsonl
 
+Records are streamed straight to the output file; arm means are kept as
+per-cell running accumulators (sim_stats.py) and saved alongside it as
+    Data/Simulation/aggregate_simulation_raw_{config}.stats.json
+so 04_compare_effects.py does not need to re-read the raw file.  When pyarrow
+is installed the records are also exported to the partitioned Parquet store
+(sim_store.py) under Data/Simulation/sim_store/.
+
+With --workers N (N > 1) each batch output file is decoded and parsed in its
+own worker process, writing a part file; parts are concatenated in the same
+sorted-file / line order a serial run uses, so the output is byte-identical.
+
+Overlapping files (a chunk downloaded twice, a retry batch that repeats ids
+of the original) are deduplicated by custom_id before unpacking, under
+--dedup POLICY:
+    prefer-non-error  a successful response beats an API error; otherwise the
+                      later occurrence wins (default — retries supersede)
+    first             the first occurrence wins
+    last              the last occurrence wins
+    none              keep everything (previous behaviour)
+The pre-pass reads only custom_id and error status and keeps one 64-bit key
+per id; dropped records are reported per file.
+
+Every parsed record carries a "parser" version tag (PARSER_VERSIONS in
+02_simulate.py).  After changing a parser, --reparse re-parses only the stored
+responses whose tag is out of date, straight from the raw file, and reports
+the value / parse_ok changes.
+
 Skip this step if you used `02_simulate.py --mode async` or
 `02_simulate.py --download BATCH_ID`, which write the output file directly.
 
 Usage:
-    python 03_unpack_batches.py [--config no_reasoning] [--input-dir DIR]
+    python 03_unpack_batches.py [--config no_reasoning] [--input-dir DIR] [--workers N]
+                                [--dedup prefer-non-error|first|last|none]
+    python 03_unpack_batches.py --reparse
 """
 
-import argparse, importlib.util, json, re, sys
-from collections import defaultdict
+import argparse, contextlib, hashlib, importlib.util, io, json, re, shutil, sys, tempfile
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
+from custom_ids import MANIFEST_NAME, CustomIdCodec, UnknownCustomId
+from jsonl_io import glob_jsonl, open_text
+from parse_memo import memoized, memo_stats, memo_stats_line
+from sim_stats import SimStats
+import sim_store
+
 # ---------------------------------------------------------------------------
 # Paths
 # ---------------------------------------------------------------------------
@@ -27,7 +63,7 @@ DATA_DIR      = SCRIPT_DIR.parent / "Data"
 DEFAULT_INDIR = DATA_DIR / "Simulation" / "Batch_Output"
 
 # ---------------------------------------------------------------------------
-# Import helpers from 02_simulate.py (load_study_configs, parse_integer)
+# Import helpers from 02_simulate.py (load_study_configs, parse_integer, …)
 # ---------------------------------------------------------------------------
 
 _spec = importlib.util.spec_from_file_location(
@@ -37,71 +73,146 @@ _sim = importlib.util.module_from_spec(_spec)
 _spec.loader.exec_module(_sim)
 
 load_study_configs = _sim.load_study_configs
-parse_integer      = _sim.parse_integer
+parse_integer      = memoized(_sim.parse_integer)
+usage_fields       = _sim.usage_fields
 STUDIES_PATH       = _sim.STUDIES_PATH
-
-# ---------------------------------------------------------------------------
-# CLI
-# ---------------------------------------------------------------------------
-
-parser = argparse.ArgumentParser(description=__doc__)
-parser.add_argument("--input-dir", default=None,
-                    help=f"Directory with batch output JSONL files "
-                         f"(default: {DEFAULT_INDIR})")
-args = parser.parse_args()
-
-INPUT_DIR = Path(args.input_dir) if args.input_dir else DEFAULT_INDIR
-OUT_PATH  = DATA_DIR / "Simulation" / "aggregate_simulation_raw.jsonl"
+ID_MANIFEST        = _sim.ID_MANIFEST
+SIM_CONFIG         = _sim.SIM_CONFIG
+PARSER_VERSIONS     = _sim.PARSER_VERSIONS
+FALLBACK_PARSER_TAG = _sim.FALLBACK_PARSER_TAG
+tag_kind            = _sim.tag_kind
 
 # ---------------------------------------------------------------------------
 # Build outcome lookup: (seq_id, arm_id, outcome_id) → outcome config
 # ---------------------------------------------------------------------------
 
-study_configs = load_study_configs(STUDIES_PATH)
-print(f"Loaded {len(study_configs)} study configs: {sorted(study_configs)}")
-
-outcome_lookup: dict[tuple, dict] = {}
-for seq_id, config in study_configs.items():
-    for outcome in config["outcomes"]:
-        for arm_id in config["arms"]:
-            norm_arm = arm_id.strip("_")
-            norm_out = outcome["id"].strip("_")
-            outcome_lookup[(seq_id, norm_arm, norm_out)] = outcome
+def build_outcome_lookup(study_configs: dict) -> dict[tuple, dict]:
+    outcome_lookup: dict[tuple, dict] = {}
+    for seq_id, config in study_configs.items():
+        for outcome in config["outcomes"]:
+            for arm_id in config["arms"]:
+                norm_arm = arm_id.strip("_")
+                norm_out = outcome["id"].strip("_")
+                outcome_lookup[(seq_id, norm_arm, norm_out)] = outcome
+    return outcome_lookup
 
 # ---------------------------------------------------------------------------
-# Find batch output files
+# Duplicate custom_ids — one cheap pass decides which lines to skip
 # ---------------------------------------------------------------------------
 
-batch_files = sorted(INPUT_DIR.glob("*.jsonl"))
-if not batch_files:
-    print(f"No *.jsonl files found in {INPUT_DIR}")
-    sys.exit(1)
-
-print(f"\nFound {len(batch_files)} batch output file(s) in {INPUT_DIR.name}/")
+DEDUP_POLICIES = ("prefer-non-error", "first", "last", "none")
+
+_CUSTOM_ID_RE = re.compile(r'"custom_id":\s*"([^"\\]*)"')
+_NO_ERROR_RE  = re.compile(r'"error":\s*null\s*\}\s*$')
+
+
+def _scan_line(line: str) -> tuple[str, bool]:
+    """(custom_id, is_error) without decoding the response body when the line
+    has the usual batch-output layout; falls back to json.loads otherwise."""
+    m = _CUSTOM_ID_RE.search(line)
+    if m and _NO_ERROR_RE.search(line):
+        return m.group(1), False
+    r = json.loads(line)
+    return r["custom_id"], bool(r.get("error"))
+
+
+def _id_key(custom_id: str) -> int:
+    """Fixed-size 64-bit key, so the seen-set does not hold the id strings."""
+    return int.from_bytes(hashlib.blake2b(custom_id.encode(), digest_size=8).digest(), "big")
+
+
+def _new_wins(policy: str, prev_err: bool, new_err: bool) -> bool:
+    if policy == "first":
+        return False
+    if policy == "last":
+        return True
+    return not new_err or prev_err          # prefer-non-error, ties → later
+
+
+def plan_dedup(batch_files: list[Path], policy: str) -> tuple[list[set], dict]:
+    """Returns (drop, report):
+      drop   : drop[i] = line numbers of batch_files[i] to skip
+      report : {"duplicate_ids", "dropped", "dropped_errors", "by_file", "examples"}
+    Winners are tracked as {id key: (file_idx << 33) | (line_no << 1) | is_error}."""
+    drop   = [set() for _ in batch_files]
+    report = {"duplicate_ids": 0, "dropped": 0, "dropped_errors": 0,
+              "by_file": Counter(), "examples": []}
+    if policy == "none":
+        return drop, report
+
+    winner:   dict[int, int] = {}
+    dup_keys: set[int]       = set()
+    for fi, batch_file in enumerate(batch_files):
+        for ln, line in enumerate(open_text(batch_file)):
+            if not line.strip():
+                continue
+            cid, is_err = _scan_line(line)
+            key  = _id_key(cid)
+            pos  = (fi << 33) | (ln << 1) | is_err
+            prev = winner.get(key)
+            if prev is None:
+                winner[key] = pos
+                continue
+
+            dup_keys.add(key)
+            if _new_wins(policy, bool(prev & 1), is_err):
+                loser, winner[key] = prev, pos
+            else:
+                loser = pos
+            lf, ll = loser >> 33, (loser >> 1) & 0xFFFFFFFF
+            drop[lf].add(ll)
+            report["dropped"]        += 1
+            report["dropped_errors"] += loser & 1
+            report["by_file"][batch_files[lf].name] += 1
+            if len(report["examples"]) < 5:
+                report["examples"].append((cid, batch_files[lf].name))
+
+    report["duplicate_ids"] = len(dup_keys)
+    return drop, report
+
+
+def print_dedup_report(report: dict, policy: str):
+    if policy == "none" or not report["dropped"]:
+        print(f"  No duplicate custom_ids (dedup: {policy})")
+        return
+    print(f"  Duplicate custom_ids: {report['duplicate_ids']:,} — dropped "
+          f"{report['dropped']:,} record(s), {report['dropped_errors']:,} of them "
+          f"API errors (dedup: {policy})")
+    for name, n in sorted(report["by_file"].items()):
+        print(f"    {name}: -{n:,}")
+    for cid, name in report["examples"]:
+        print(f"    e.g. {cid}  (dropped from {name})")
 
 # ---------------------------------------------------------------------------
-# Unpack
+# Unpack one batch output file
 # ---------------------------------------------------------------------------
 
-records:    list[dict] = []
-api_errors: int        = 0
-
-for batch_file in batch_files:
-    n_before = len(records)
-    for line in open(batch_file):
+def unpack_file(batch_file: Path, out, outcome_lookup: dict,
+                codec: CustomIdCodec, skip: set[int] = frozenset()) -> dict:
+    """Parse every line of batch_file except line numbers in `skip` and write
+    records to the open file `out`.  Only per-cell accumulators
+    (sim_stats.SimStats) are kept in memory."""
+    stats      = SimStats()
+    seen_seq:  set[int] = set()
+    prompt_tok = 0
+    cached_tok = 0
+    memo_0     = memo_stats()
+
+    for ln, line in enumerate(open_text(batch_file)):
         line = line.strip()
-        if not line:
+        if not line or ln in skip:
             continue
         r = json.loads(line)
 
-        # custom_id format: seq_id__arm_id__outcome_id__i
-        parts  = r["custom_id"].split("__")
-        seq_id = int(parts[0])
-        out_id = re.sub(r"_dup\d+$", "", parts[-2]).strip("_")
-        arm_id = "__".join(parts[1:-2]).strip("_")
+        try:
+            seq_id, arm_id, out_id, _, _ = codec.decode(r["custom_id"])
+        except UnknownCustomId as e:
+            raise UnknownCustomId(f"{batch_file.name} line {ln + 1}: {e.args[0]}") from None
+        arm_id = arm_id.strip("_")
+        out_id = out_id.strip("_")
 
         if r.get("error"):
-            records.append({
+            rec = {
                 "seq_id":     seq_id,
                 "arm_id":     arm_id,
                 "outcome_id": out_id,
@@ -110,61 +221,291 @@ for batch_file in batch_files:
                 "value":      None,
                 "parse_ok":   False,
                 "error":      str(r["error"]),
-            })
-            api_errors += 1
-            continue
-
-        text    = (r["response"]["body"]["choices"][0]["message"]["content"]
-                   or "").strip()
-        outcome = outcome_lookup.get((seq_id, arm_id, out_id))
-        parser  = outcome["_parser"] if outcome else parse_integer
-        value   = parser(text)
-
-        records.append({
-            "seq_id":     seq_id,
-            "arm_id":     arm_id,
-            "outcome_id": out_id,
-            "pid":        r["custom_id"],
-            "response":   text,
-            "value":      value,
-            "parse_ok":   value is not None,
-        })
-
-    print(f"  {batch_file.name}: {len(records) - n_before} records")
+            }
+        else:
+            body    = r["response"]["body"]
+            text    = (body["choices"][0]["message"]["content"] or "").strip()
+            outcome = outcome_lookup.get((seq_id, arm_id, out_id))
+            parser  = outcome["_parser"] if outcome else parse_integer
+            value   = parser(text)
+
+            rec = {
+                "seq_id":     seq_id,
+                "arm_id":     arm_id,
+                "outcome_id": out_id,
+                "pid":        r["custom_id"],
+                "response":   text,
+                "value":      value,
+                "parse_ok":   value is not None,
+                "parser":     outcome["_parser_tag"] if outcome else FALLBACK_PARSER_TAG,
+                **usage_fields(body.get("usage")),
+            }
+            prompt_tok += rec["prompt_tokens"] or 0
+            cached_tok += rec["cached_tokens"] or 0
+
+        out.write(json.dumps(rec, ensure_ascii=False) + "\n")
+        stats.add(rec)
+        seen_seq.add(seq_id)
+
+    memo_1 = memo_stats()
+    return {
+        "name":          batch_file.name,
+        "stats":         stats,
+        "seq_ids":       seen_seq,
+        "prompt_tokens": prompt_tok,
+        "cached_tokens": cached_tok,
+        "memo_lookups":  memo_1["lookups"] - memo_0["lookups"],
+        "memo_hits":     memo_1["hits"] - memo_0["hits"],
+    }
 
 # ---------------------------------------------------------------------------
-# Summary
+# Process-pool mode: one batch output file per task, one part file per file
 # ---------------------------------------------------------------------------
 
-parse_fails = sum(1 for r in records if not r["parse_ok"])
-pct_fail    = 100 * parse_fails / len(records) if records else 0
+_worker_lookup: dict[tuple, dict] = {}
+_worker_codec:  CustomIdCodec | None = None
 
-print(f"\n── {len(records):,} records total ──")
-print(f"   API errors     : {api_errors}")
-print(f"   Parse failures : {parse_fails} ({pct_fail:.1f}%)")
-print(f"   Parse successes: {len(records) - parse_fails - api_errors}")
 
-sums: dict[tuple, list] = defaultdict(list)
-for r in records:
-    if r["parse_ok"] and r["value"] is not None:
-        sums[(r["seq_id"], r["outcome_id"], r["arm_id"])].append(r["value"])
+def _init_worker():
+    global _worker_lookup, _worker_codec
+    with contextlib.redirect_stdout(io.StringIO()):   # already reported by main
+        _worker_lookup = build_outcome_lookup(load_study_configs(STUDIES_PATH))
+    _worker_codec = CustomIdCodec(ID_MANIFEST, SIM_CONFIG)
 
-print("\n── Arm means (parsed records) ──")
-for (seq_id, out_id, arm_id), vals in sorted(sums.items()):
-    print(f"  seq={seq_id:>3}  {out_id:<40}  {arm_id:<35}  "
-          f"mean={sum(vals)/len(vals):.4f}  n={len(vals)}")
 
-missing = set(study_configs) - {r["seq_id"] for r in records}
-if missing:
-    print(f"\nWARNING: no records for seq_ids: {sorted(missing)}")
+def _unpack_to_part(batch_file: Path, part_path: Path, skip: set[int]) -> dict:
+    with open(part_path, "w") as out:
+        return unpack_file(batch_file, out, _worker_lookup, _worker_codec, skip)
+
+
+def unpack_parallel(batch_files: list[Path], out, workers: int,
+                    part_dir: Path, drop: list[set]) -> list[dict]:
+    """Unpack files in a process pool, then append the part files to `out` in
+    batch_files order — the same order a serial run writes."""
+    with tempfile.TemporaryDirectory(dir=part_dir) as tmp:
+        parts = [Path(tmp) / f"part_{i:04d}.jsonl" for i in range(len(batch_files))]
+        with ProcessPoolExecutor(max_workers=workers,
+                                 initializer=_init_worker) as pool:
+            summaries = list(pool.map(_unpack_to_part, batch_files, parts, drop))
+        for part in parts:
+            with open(part) as f:
+                shutil.copyfileobj(f, out)
+    return summaries
 
 # ---------------------------------------------------------------------------
-# Write output
+# --reparse: re-parse stored responses whose parser tag is out of date
 # ---------------------------------------------------------------------------
 
-OUT_PATH.parent.mkdir(parents=True, exist_ok=True)
-with open(OUT_PATH, "w") as f:
-    for rec in records:
-        f.write(json.dumps(rec, ensure_ascii=False) + "\n")
+def _reparsed(rec: dict, value, tag: str) -> dict:
+    """rec with a new value / parse_ok / parser, in unpack_file's key order."""
+    out = {}
+    for k, v in rec.items():
+        if k == "parser":
+            continue
+        out[k] = v
+        if k == "parse_ok":
+            out["value"]    = value
+            out["parse_ok"] = value is not None
+            out["parser"]   = tag
+    return out
+
+
+def reparse(raw_path: Path, outcome_lookup: dict):
+    """Re-parse the `response` text already stored in raw_path for every record
+    whose parser tag differs from the current one (see PARSER_VERSIONS in
+    02_simulate.py).  Records tagged by a parser 02_simulate.py does not know
+    (e.g. 02b's patch178.* parsers) are left as they are."""
+    if not raw_path.exists():
+        print(f"Raw file not found: {raw_path}")
+        sys.exit(1)
+
+    stats      = SimStats()
+    counts     = Counter()
+    by_cell:   dict[tuple, Counter] = defaultdict(Counter)
+    examples:  list[tuple]          = []
+    tmp_path   = raw_path.with_name(raw_path.name + ".tmp")
+
+    with open(raw_path) as src, open(tmp_path, "w") as out:
+        for line in src:
+            if not line.strip():
+                continue
+            rec = json.loads(line)
+            counts["records"] += 1
+            outcome = outcome_lookup.get((rec["seq_id"], rec["arm_id"], rec["outcome_id"]))
+            tag     = outcome["_parser_tag"] if outcome else FALLBACK_PARSER_TAG
+            old_tag = rec.get("parser")
+
+            if rec.get("response") is None or old_tag == tag:
+                counts["current"] += 1
+            elif old_tag and tag_kind(old_tag) not in PARSER_VERSIONS:
+                counts["foreign"] += 1
+            else:
+                parser = outcome["_parser"] if outcome else parse_integer
+                value  = parser(rec["response"])
+                cell   = by_cell[(rec["seq_id"], rec["outcome_id"])]
+                cell["reparsed"] += 1
+                if value != rec["value"]:
+                    cell["value"] += 1
+                    ex = (rec["seq_id"], rec["outcome_id"], rec["value"], value,
+                          rec["response"])
+                    if len(examples) < 10 and ex not in examples:
+                        examples.append(ex)
+                if (value is not None) != rec["parse_ok"]:
+                    cell["gained" if value is not None else "lost"] += 1
+                rec  = _reparsed(rec, value, tag)
+                line = json.dumps(rec, ensure_ascii=False) + "\n"
+            out.write(line)
+            stats.add(rec)
+
+    total = sum(by_cell.values(), Counter())
+    print(f"\n── Re-parse {raw_path.name}: {counts['records']:,} records ──")
+    print(f"   Up to date     : {counts['current']:,}")
+    print(f"   Foreign parser : {counts['foreign']:,}  (left as is)")
+    print(f"   Re-parsed      : {total['reparsed']:,}  (value changed {total['value']:,}, "
+          f"parse_ok gained {total['gained']:,}, lost {total['lost']:,})")
+    print(f"   {memo_stats_line()}")
+
+    if not total["reparsed"]:
+        tmp_path.unlink()
+        print("\nNothing to re-parse — raw file unchanged.")
+        return
+
+    changed = {k: c for k, c in by_cell.items() if c["value"]}
+    if changed:
+        print("\n── Changed cells ──")
+        for (seq_id, out_id), c in sorted(changed.items()):
+            print(f"  seq={seq_id:>3}  {out_id:<40}  reparsed={c['reparsed']:<5} "
+                  f"value={c['value']:<5} +ok={c['gained']:<4} -ok={c['lost']}")
+        for seq_id, out_id, old, new, text in examples:
+            print(f"    e.g. seq={seq_id} {out_id}: {old} → {new}  {text[:50]!r}")
+
+    tmp_path.replace(raw_path)
+    stats_out = stats.save(raw_path)
+    store_out = sim_store.refresh(raw_path)
+    print(f"\nOutput → {raw_path}")
+    print(f"Summary → {stats_out}")
+    if store_out:
+        print(f"Store   → {store_out}")
+
+# ---------------------------------------------------------------------------
+# Main
+# ---------------------------------------------------------------------------
 
-print(f"\nOutput → {OUT_PATH}  ({len(records):,} lines)")
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--input-dir", default=None,
+                        help=f"Directory with batch output JSONL files "
+                             f"(default: {DEFAULT_INDIR})")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Worker processes; >1 unpacks one batch file per "
+                             "worker (default: 1, serial)")
+    parser.add_argument("--dedup", choices=DEDUP_POLICIES, default="prefer-non-error",
+                        help="How to resolve repeated custom_ids across/within "
+                             "files (default: prefer-non-error)")
+    parser.add_argument("--reparse", action="store_true",
+                        help="Re-parse responses already in the raw file whose "
+                             "parser version changed (no batch files are read)")
+    args = parser.parse_args()
+
+    input_dir = Path(args.input_dir) if args.input_dir else DEFAULT_INDIR
+    out_path  = DATA_DIR / "Simulation" / "aggregate_simulation_raw.jsonl"
+
+    study_configs = load_study_configs(STUDIES_PATH)
+    print(f"Loaded {len(study_configs)} study configs: {sorted(study_configs)}")
+
+    if args.reparse:
+        reparse(out_path, build_outcome_lookup(study_configs))
+        return
+
+    batch_files = glob_jsonl(input_dir)
+    if not batch_files:
+        print(f"No *.jsonl(.zst|.gz) files found in {input_dir}")
+        sys.exit(1)
+
+    print(f"\nFound {len(batch_files)} batch output file(s) in {input_dir.name}/")
+
+    drop, dedup_report = plan_dedup(batch_files, args.dedup)
+    print_dedup_report(dedup_report, args.dedup)
+
+    # Records stream to a .tmp file that replaces the output once complete
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = out_path.with_name(out_path.name + ".tmp")
+    workers  = min(args.workers, len(batch_files))
+
+    try:
+        with open(tmp_path, "w") as out:
+            if workers > 1:
+                summaries = unpack_parallel(batch_files, out, workers,
+                                            out_path.parent, drop)
+            else:
+                outcome_lookup = build_outcome_lookup(study_configs)
+                with CustomIdCodec(ID_MANIFEST, SIM_CONFIG) as codec:
+                    summaries = [unpack_file(f, out, outcome_lookup, codec, skip)
+                                 for f, skip in zip(batch_files, drop)]
+    except UnknownCustomId as e:
+        tmp_path.unlink(missing_ok=True)
+        print(f"\nCannot decode {e.args[0]}")
+        print(f"Compact custom_ids are mapped back to (seq_id, arm, outcome) by the manifest that "
+              f"02_simulate.py wrote when it built the batch. Copy {MANIFEST_NAME} from the "
+              f"machine that built Batch_Input/ to {ID_MANIFEST.parent} (it belongs in git "
+              f"next to Batch_Input/ and Batch_Output/), then re-run.")
+        sys.exit(1)
+
+    tmp_path.replace(out_path)
+
+    # Per-file accumulators merge in file order in both modes, so the saved
+    # summary is identical whether or not the pool was used.
+    stats    = SimStats()
+    seen_seq: set[int] = set()
+    for s in summaries:
+        print(f"  {s['name']}: {s['stats'].records} records")
+        stats.merge(s["stats"])
+        seen_seq |= s["seq_ids"]
+    stats_out = stats.save(out_path)
+    store_out = sim_store.refresh(out_path)
+
+    # -----------------------------------------------------------------------
+    # Summary
+    # -----------------------------------------------------------------------
+
+    n_records   = stats.records
+    api_errors  = stats.api_errors
+    parse_fails = stats.parse_failures
+    pct_fail    = 100 * parse_fails / n_records if n_records else 0
+    prompt_tok  = sum(s["prompt_tokens"] for s in summaries)
+    cached_tok  = sum(s["cached_tokens"] for s in summaries)
+
+    print(f"\n── {n_records:,} records total ──")
+    print(f"   API errors     : {api_errors}")
+    print(f"   Parse failures : {parse_fails} ({pct_fail:.1f}%)")
+    print(f"   Parse successes: {n_records - parse_fails - api_errors}")
+    if workers > 1:
+        lookups = sum(s["memo_lookups"] for s in summaries)
+        hits    = sum(s["memo_hits"]    for s in summaries)
+        print(f"   Parse memo: {lookups:,} lookups  {hits:,} hits "
+              f"({hits / lookups if lookups else 0:.1%})  across {workers} workers")
+    else:
+        print(f"   {memo_stats_line()}")
+
+    if prompt_tok:
+        print(f"   Prompt tokens  : {prompt_tok:,}  (cached {cached_tok:,} = "
+              f"{cached_tok / prompt_tok:.1%})")
+
+    print("\n── Arm means (parsed records) ──")
+    for (seq_id, arm_id, out_id), (n, mean, _) in sorted(
+            stats.cells.items(), key=lambda kv: (kv[0][0], kv[0][2], kv[0][1])):
+        print(f"  seq={seq_id:>3}  {out_id:<40}  {arm_id:<35}  "
+              f"mean={mean:.4f}  n={n}")
+
+    missing = set(study_configs) - seen_seq
+    if missing:
+        print(f"\nWARNING: no records for seq_ids: {sorted(missing)}")
+
+    print(f"\nOutput → {out_path}  ({n_records:,} lines)")
+    print(f"Summary → {stats_out}")
+    if store_out:
+        print(f"Store   → {store_out}")
+
+
+if __name__ == "__main__":
+    main()
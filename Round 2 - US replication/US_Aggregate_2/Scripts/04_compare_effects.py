@@ -9,7 +9,9 @@ Compares LLM-predicted treatment effects against ground-truth effects.
                and outcome_ids)
 
   LLM source : Data/Simulation/aggregate_simulation_raw_{cfg}.jsonl
-               (per-respondent records — arm means computed here)
+               (per-respondent records — arm means computed here, or
+               read from the .stats.json summary table that 02 / 02b / 03
+               keep current, or the Parquet store in Data/Simulation/sim_store/)
 
 For each study × treatment arm × outcome:
 
@@ -37,6 +39,10 @@ from pathlib import Path
 import numpy as np
 from scipy import stats
 
+from jsonl_io import open_text, resolve
+from sim_stats import SimStats, stats_path
+from sim_store import config_dir, read_cell_values
+
 # ---------------------------------------------------------------------------
 # Paths & args
 # ---------------------------------------------------------------------------
@@ -50,8 +56,8 @@ parser.add_argument("--sound-only", action="store_true",
                          "(seq 151, 164, 169, 174, 176)")
 args = parser.parse_args()
 
-GT_PATH  = DATA_DIR / "Ground_Truth" / "study_data.jsonl"
-SIM_PATH = DATA_DIR / "Simulation"   / "aggregate_simulation_raw.jsonl"
+GT_PATH  = resolve(DATA_DIR / "Ground_Truth" / "study_data.jsonl")
+SIM_PATH = resolve(DATA_DIR / "Simulation"   / "aggregate_simulation_raw.jsonl")
 OUT_CSV  = DATA_DIR / "Results"      / "effects_table.csv"
 OUT_TXT  = DATA_DIR / "Results"      / "effects_summary.txt"
 (DATA_DIR / "Results").mkdir(exist_ok=True)
@@ -88,7 +94,7 @@ def load_gt() -> tuple[dict, dict, dict, dict]:
         print("Run 01_extract_study_data.py first.")
         return {}, {}, {}, {}
 
-    for line in open(GT_PATH):
+    for line in open_text(GT_PATH):
         rec = json.loads(line)
         if not rec.get("instrument", {}).get("is_simulatable"):
             continue
@@ -135,25 +141,35 @@ def load_gt() -> tuple[dict, dict, dict, dict]:
 # Load simulation arm means
 # ---------------------------------------------------------------------------
 
-def load_sim_stats(path: Path) -> tuple[dict, dict]:
+def load_sim_stats(path: Path, seq_ids=None) -> tuple[dict, dict]:
     """Returns (means, variances) where each is {(seq_id, arm_id, outcome_id): value}.
-    Variance is population variance across all parsed responses for that arm/outcome."""
-    vals: dict[tuple, list] = defaultdict(list)
+    Variance is population variance across all parsed responses for that arm/outcome.
 
+    Sources, cheapest first: the accumulator summary table kept by 02, 02b
+    and 03_unpack_batches.py, the Parquet store (sim_store.py — only the seq_id
+    partitions in `seq_ids` and the value columns are read), then the raw file.
+    The first two are used only while they are current for `path`."""
     if not path.exists():
         print(f"Simulation file not found: {path}")
         print("Run 02_simulate.py or 03_unpack_batches.py first.")
         return {}, {}
 
-    for line in open(path):
-        r = json.loads(line)
-        if r["parse_ok"] and r["value"] is not None:
-            key = (r["seq_id"], r["arm_id"], r["outcome_id"])
-            vals[key].append(r["value"])
+    sim = SimStats.load(path)
+    if sim is not None:
+        print(f"Using arm summaries from {stats_path(path).name}")
+        return sim.means(), sim.variances()
+
+    cells = read_cell_values(path, seq_ids)
+    if cells is not None:
+        print(f"Using Parquet store {config_dir(path).relative_to(DATA_DIR)}")
+        sim = SimStats()
+        for key, vals in cells.items():
+            for x in vals:
+                sim.add_value(key, x)
+    else:
+        sim = SimStats.from_file(path)
 
-    means = {k: float(np.mean(v)) for k, v in vals.items()}
-    variances = {k: float(np.var(v)) for k, v in vals.items()}
-    return means, variances
+    return sim.means(), sim.variances()
 
 # ---------------------------------------------------------------------------
 # Build comparison rows
@@ -368,7 +384,7 @@ def main():
     if not gt:
         return
 
-    sim_means, sim_vars = load_sim_stats(SIM_PATH)
+    sim_means, sim_vars = load_sim_stats(SIM_PATH, seq_ids=set(gt))
     rows = build_rows(gt, labels, ctrl_arms, sim_means, sim_vars, scale_info)
 
     # Flag one-sided rows before any filtering
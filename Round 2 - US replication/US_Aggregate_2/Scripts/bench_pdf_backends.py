@@ -0,0 +1,172 @@
+"""
+bench_pdf_backends.py  —  Speed, memory and fidelity of the pdf_text.py backends
+
+Runs every installed backend (pdf_text.BACKENDS) over the PDFs under
+Data/Papers/, bypassing the text cache, and compares each with pdfplumber, the
+reference the cached texts and prompts were built on:
+
+    pages/s     pages parsed per second (library import excluded)
+    peak MB     peak resident memory of the process that ran the backend
+    text        overlap of the page's character 5-grams with pdfplumber's (F1),
+                ignoring case, spaces and punctuation — near 1 when the same
+                text is there in any order (a two-column page read column by
+                column still matches)
+    order       difflib ratio of the same characters in sequence — reading-
+                order agreement
+    numbers     share of pdfplumber's numbers (estimates, SEs, Ns, percentages —
+                what pass 2 reads from tables) found on the same page
+
+Spaces are ignored because pdfminer drops the spaces between words on some
+papers' pages ("oftenseenasapuzzle..."); a backend that keeps them is not
+penalised for it.  Similarities are averaged over pages, weighted by
+pdfplumber's page length.  Each backend runs in a fresh process, so peak
+memory is its own.
+
+    python bench_pdf_backends.py                          # ../Data/Papers
+    python bench_pdf_backends.py --papers ../../US_Aggregate/Data/Papers --limit 10
+    python bench_pdf_backends.py --backends pdfplumber pypdfium2 --worst 5
+"""
+
+import argparse, difflib, importlib, multiprocessing, re, resource, sys, time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from pdf_text import BACKENDS, DEFAULT_BACKEND, extractor_version
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+DATA_DIR   = SCRIPT_DIR.parent / "Data"
+PAPERS_DIR = DATA_DIR / "Papers"
+
+REFERENCE = DEFAULT_BACKEND
+
+_NOISE  = re.compile(r"[\W_]+")              # spaces, punctuation
+_NUMBER = re.compile(r"\d+(?:[.,]\d+)*")     # sign and spacing differ between backends
+
+
+def _peak_mb() -> float:
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / 1e6 if sys.platform == "darwin" else rss / 1e3     # bytes vs KiB
+
+
+def _run(backend: str, paths: list[Path]) -> dict:
+    """Parse every page of every PDF with one backend (in a fresh process)."""
+    importlib.import_module(BACKENDS[backend].package)
+    texts, failed = {}, {}
+    start = time.perf_counter()
+    for path in paths:
+        try:
+            with BACKENDS[backend](path) as pdf:
+                texts[str(path)] = [pdf.page_text(i) for i in range(len(pdf))]
+        except Exception as e:
+            failed[str(path)] = str(e)
+    seconds = time.perf_counter() - start
+    return {"texts": texts, "failed": failed, "seconds": seconds, "peak_mb": _peak_mb(),
+            "pages": sum(len(p) for p in texts.values())}
+
+
+def run_backend(backend: str, paths: list[Path]) -> dict:
+    with ProcessPoolExecutor(1, mp_context=multiprocessing.get_context("spawn")) as ex:
+        return ex.submit(_run, backend, paths).result()
+
+
+# ---------------------------------------------------------------------------
+# Similarity to the reference
+# ---------------------------------------------------------------------------
+
+def _overlap(ref: Counter, other: Counter) -> int:
+    return sum((ref & other).values())
+
+
+def _grams(s: str, n: int = 5) -> Counter:
+    return Counter(s[i:i + n] for i in range(len(s) - n + 1))
+
+
+def page_scores(ref: str, text: str) -> tuple[float, float, float]:
+    """(text F1, order ratio, numbers recall) of one page against the reference."""
+    ref_chars, chars = _NOISE.sub("", ref.lower()), _NOISE.sub("", text.lower())
+    if not ref_chars:
+        return (1.0, 1.0, 1.0) if not chars else (0.0, 0.0, 1.0)
+    ref_g, g = _grams(ref_chars), _grams(chars)
+    f1       = 2 * _overlap(ref_g, g) / max(sum(ref_g.values()) + sum(g.values()), 1)
+    order    = difflib.SequenceMatcher(None, ref_chars, chars, autojunk=False).ratio()
+    ref_nums = Counter(_NUMBER.findall(ref))
+    numbers  = (_overlap(ref_nums, Counter(_NUMBER.findall(text))) / sum(ref_nums.values())
+                if ref_nums else 1.0)
+    return f1, order, numbers
+
+
+def compare(ref_texts: dict, texts: dict) -> tuple[tuple[float, float, float], dict]:
+    """Length-weighted mean scores over all pages, and the numbers recall per file."""
+    totals, weight, per_file = [0.0, 0.0, 0.0], 0, {}
+    for path, ref_pages in ref_texts.items():
+        pages = texts.get(path)
+        if pages is None:
+            continue
+        file_num, file_w = 0.0, 0
+        for i, ref in enumerate(ref_pages):
+            scores = page_scores(ref, pages[i] if i < len(pages) else "")
+            w      = max(len(ref), 1)
+            for k in range(3):
+                totals[k] += scores[k] * w
+            weight  += w
+            file_num += scores[2] * w
+            file_w   += w
+        per_file[path] = file_num / max(file_w, 1)
+    return tuple(t / max(weight, 1) for t in totals), per_file
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--papers", type=Path, default=PAPERS_DIR,
+                        help=f"PDF directory, searched recursively (default: {PAPERS_DIR})")
+    parser.add_argument("--backends", nargs="+", choices=list(BACKENDS), default=None,
+                        help="Backends to run (default: every installed one)")
+    parser.add_argument("--limit", type=int, default=None, help="Only the first N PDFs")
+    parser.add_argument("--worst", type=int, default=0, metavar="N",
+                        help="List the N files with the lowest numbers recall per backend")
+    args = parser.parse_args()
+
+    paths = sorted(args.papers.rglob("*.pdf"))[:args.limit]
+    if not paths:
+        print(f"No PDFs under {args.papers}")
+        sys.exit(1)
+
+    names = args.backends or [n for n, b in BACKENDS.items() if b.available()]
+    if REFERENCE not in names:
+        names.insert(0, REFERENCE)
+    missing = [n for n in names if not BACKENDS[n].available()]
+    if missing:
+        print(f"Not installed: {', '.join(missing)}")
+        sys.exit(1)
+
+    size = sum(p.stat().st_size for p in paths)
+    print(f"{len(paths)} PDFs, {size / 1e6:.1f} MB under {args.papers}\n")
+
+    results = {}
+    for name in names:
+        print(f"  running {extractor_version(name)} …", flush=True)
+        results[name] = run_backend(name, paths)
+
+    ref = results[REFERENCE]["texts"]
+    print(f"\n{'backend':<12} {'pages':>6} {'sec':>7} {'pages/s':>8} {'peak MB':>8} "
+          f"{'text':>6} {'order':>6} {'numbers':>8} {'failed':>7}")
+    worst = {}
+    for name, res in results.items():
+        if name == REFERENCE:
+            (f1, order, numbers), per_file = (1.0, 1.0, 1.0), {}
+        else:
+            (f1, order, numbers), per_file = compare(ref, res["texts"])
+        worst[name] = sorted(per_file.items(), key=lambda kv: kv[1])[:args.worst]
+        print(f"{name:<12} {res['pages']:>6} {res['seconds']:>7.1f} "
+              f"{res['pages'] / max(res['seconds'], 1e-9):>8.1f} {res['peak_mb']:>8.0f} "
+              f"{f1:>6.3f} {order:>6.3f} {numbers:>8.3f} {len(res['failed']):>7}")
+
+    for name, res in results.items():
+        for path, err in res["failed"].items():
+            print(f"  [{name}] FAILED {Path(path).relative_to(args.papers)}: {err}")
+        if name != REFERENCE and worst[name]:
+            print(f"\n  {name}: lowest numbers recall")
+            for path, score in worst[name]:
+                print(f"    {score:.3f}  {Path(path).relative_to(args.papers)}")
@@ -0,0 +1,257 @@
+"""
+check_parsers.py  —  Golden-equivalence check + micro-benchmark for 02_simulate.py parsers
+
+The response parsers in 02_simulate.py run through a compiled, single-pass
+matcher (CATEGORICAL_RULES → compile_rules).  This script keeps the original
+sequential if-chain as the reference and verifies that every parser type
+returns exactly the same value on every stored response in
+Data/Simulation/Batch_Output/*.jsonl, then times both implementations against
+plain json.loads of the same lines.
+
+Exits with status 1 on any mismatch.
+
+Usage:
+    python check_parsers.py [--input-dir DIR] [--repeat 5] [--no-bench]
+"""
+
+import argparse, importlib.util, json, re, sys, time
+from pathlib import Path
+
+from jsonl_io import glob_jsonl, open_text
+
+SCRIPT_DIR    = Path(__file__).resolve().parent
+DATA_DIR      = SCRIPT_DIR.parent / "Data"
+DEFAULT_INDIR = DATA_DIR / "Simulation" / "Batch_Output"
+
+_spec = importlib.util.spec_from_file_location("simulate", SCRIPT_DIR / "02_simulate.py")
+_sim  = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(_sim)
+
+# ---------------------------------------------------------------------------
+# Reference implementation (sequential chain, as originally written)
+# ---------------------------------------------------------------------------
+
+def ref_universal_categorical_parse(text: str) -> float | None:
+    t = text.strip().upper()
+
+    if "MESSAGE 1" in t: return 1.0
+    if "MESSAGE 2" in t: return 0.0
+    if "INCREASE" in t: return 1.0
+    if "DECREASE" in t: return 0.0
+    if "NEITHER" in t: return 0.5
+    if "INFLATION" in t: return 1.0
+    if "UNEMPLOYMENT" in t: return 0.0
+    if "FOR" in t.split() or "FOR." in t: return 1.0
+    if "AGAINST" in t.split() or "AGAINST." in t: return 0.0
+
+    if "VERY SURE" in t: return 1.0
+    if "VERY UNSURE" in t: return 0.0
+    if t == "SURE" or "SURE." in t: return 0.75
+    if t == "UNSURE" or "UNSURE." in t: return 0.25
+
+    if t == "ALL" or t.startswith("ALL "): return 1.0
+    if t == "NONE" or t.startswith("NONE "): return 0.0
+    if "SOME" in t.split() or "SOME." in t: return 0.5
+    if "DON'T KNOW" in t or "DO NOT KNOW" in t: return 0.5
+
+    if "ALREADY KNEW" in t or "ALREADY CONSIDERED" in t: return 1.0
+    if "DIDN'T FIND" in t or "NOT CONVINCING" in t or "UNCONVINCING" in t: return 0.0
+    if t == "OTHER" or t.startswith("OTHER"): return 0.5
+
+    if "INTEREST" in t: return 0.5
+    if "PRICE" in t: return 1.0
+    if "CONSUMPTION" in t: return 0.5
+    if "EMPLOYMENT" in t or "LABOR" in t or "LABOUR" in t: return 0.0
+    if "INCOME" in t or "WEALTH" in t: return 0.5
+    if "STOCK" in t or "HOUSING" in t: return 0.5
+    if t in ("C", "D", "E", "F", "G"): return 0.5
+
+    if t.startswith("YES"): return 1.0
+    if t.startswith("NO"):  return 0.0
+    if re.search(r'\bYES\b', t): return 1.0
+    if re.search(r'\bNO\b',  t): return 0.0
+
+    positive = r'\b(SUPPORT|FAVOR|AGREE|TRUE|ACCEPT|APPROVE|WILLING|1|A|OPTION A|JOB A)\b'
+    negative = r'\b(OPPOSE|PREFER THE CURRENT|KEEP THE CURRENT|DISAGREE|FALSE|REJECT|DISAPPROVE|UNWILLING|0|B|OPTION B|JOB B)\b'
+    if re.search(positive, t): return 1.0
+    if re.search(negative, t): return 0.0
+
+    m = re.search(r'^[-+]?\d+\.?\d*$', t)
+    if m:
+        return float(m.group())
+
+    return None
+
+
+def ref_parse_percent(text: str) -> float | None:
+    m = re.search(r"(\d+\.?\d*)\s*%", text)
+    if not m:
+        m = re.search(r"[-+]?\d+\.?\d*", text.strip())
+    if not m:
+        return None
+    val = float(m.group(1) if m.lastindex else m.group())
+    return max(0.0, min(100.0, val))
+
+
+def ref_parse_proportion(text: str) -> float | None:
+    m = re.search(r"[-+]?\d+\.?\d*", text.strip())
+    if not m:
+        return None
+    val = float(m.group())
+    if val > 1.0:
+        val = val / 100.0
+    return max(0.0, min(1.0, val))
+
+
+def ref_parse_integer(text: str) -> float | None:
+    m = re.search(r"[-+]?\d+", text.strip())
+    return float(int(m.group())) if m else None
+
+
+def ref_parse_choice_ab(text: str) -> float | None:
+    val = ref_universal_categorical_parse(text)
+    if val is not None:
+        return val
+    m = re.search(r'[-+]?\d+', text.strip())
+    return float(int(m.group())) if m else None
+
+
+def ref_flexible_parser(text: str) -> float | None:
+    val = ref_universal_categorical_parse(text)
+    if val is not None:
+        return val
+    return ref_parse_integer(text)
+
+
+def ref_make_scale_parser(lo: float, hi: float):
+    def parser(text: str) -> float | None:
+        m = re.search(r"[-+]?\d+\.?\d*", text.strip())
+        if m:
+            return max(lo, min(hi, float(m.group())))
+        val = ref_universal_categorical_parse(text)
+        if val is not None:
+            return lo + val * (hi - lo)
+        return None
+    return parser
+
+# ---------------------------------------------------------------------------
+# Parser pairs: (name, reference, compiled)
+# ---------------------------------------------------------------------------
+
+def parser_pairs() -> list[tuple[str, object, object]]:
+    pairs = [
+        ("other",      ref_universal_categorical_parse, _sim.universal_categorical_parse),
+        ("binary",     ref_universal_categorical_parse, _sim.parse_binary),
+        ("percent",    ref_parse_percent,               _sim.parse_percent),
+        ("proportion", ref_parse_proportion,            _sim.parse_proportion),
+        ("integer",    ref_parse_integer,               _sim.parse_integer),
+        ("choice_ab",  ref_parse_choice_ab,             _sim.parse_choice_ab),
+        ("flexible",   ref_flexible_parser,             _sim.parse_flexible),
+    ]
+    scales = {(0.0, 1.0), (1.0, 5.0), (1.0, 7.0), (0.0, 10.0), (0.0, 100.0)}
+    if _sim.STUDIES_PATH.exists():
+        for rec in map(json.loads, open_text(_sim.STUDIES_PATH)):
+            for q in rec.get("instrument", {}).get("outcome_questions", []):
+                lo, hi = q.get("scale_min"), q.get("scale_max")
+                if lo is not None and hi is not None:
+                    scales.add((float(lo), float(hi)))
+    for lo, hi in sorted(scales):
+        pairs.append((f"scale[{lo:g},{hi:g}]",
+                      ref_make_scale_parser(lo, hi),
+                      _sim.make_scale_parser(lo, hi)))
+    return pairs
+
+
+# Edge cases not (yet) seen in stored batches
+EXTRA_CASES = [
+    "", " ", "5", "0", "1", "10", "-3", "+2.5", "3.", "YES", "No.", "no",
+    "Yes, definitely", "NOT SURE", "sure", "Unsure.", "sure.", "all", "All of them",
+    "none", "None at all", "some", "some.", "Other", "Others", "c", "G", "H",
+    "for", "for.", "Against.", "I am against it", "before", "Message 1", "message 2",
+    "Option A", "Option B", "Job A", "A", "B", "a or b", "keep the current system",
+    "Prefer the current law", "I don't know", "do not know", "didn't find it",
+    "not convincing", "unconvincing", "already knew", "Already considered this",
+    "Inflation", "unemployment", "employment", "labour", "price", "income",
+    "housing", "stock market", "interest rates", "consumption", "increase",
+    "decrease", "neither", "50%", "about 40 %", "0.35", "35", "7/10",
+    "The answer is 4", "NOTHING", "nobody", "YES NO", "no, yes", "1 0", "nonE ",
+    "true", "False", "support", "oppose", "unwilling", "willing", "strasse",
+]
+
+# ---------------------------------------------------------------------------
+# Corpus
+# ---------------------------------------------------------------------------
+
+def load_corpus(input_dir: Path) -> tuple[list[str], list[str]]:
+    """Returns (raw_lines, response_texts) for every batch output file."""
+    lines, texts = [], []
+    for path in glob_jsonl(input_dir):
+        for line in open_text(path):
+            if not line.strip():
+                continue
+            lines.append(line)
+            r = json.loads(line)
+            if r.get("error") or not r.get("response"):
+                continue
+            texts.append((r["response"]["body"]["choices"][0]["message"]["content"]
+                          or "").strip())
+    return lines, texts
+
+
+def check(texts: list[str]) -> int:
+    mismatches = 0
+    for name, ref, new in parser_pairs():
+        bad = [(t, ref(t), new(t)) for t in texts if ref(t) != new(t)]
+        mismatches += len(bad)
+        status = "OK" if not bad else f"{len(bad)} MISMATCHES"
+        print(f"  {name:<18} {status}")
+        for t, a, b in bad[:5]:
+            print(f"      {t[:60]!r:<64} reference={a}  compiled={b}")
+    return mismatches
+
+
+def _time(fn, items, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        for x in items:
+            fn(x)
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def bench(lines: list[str], texts: list[str], repeat: int):
+    n      = len(texts)
+    t_json = _time(json.loads, lines, repeat)
+    print(f"\n── Micro-benchmark (best of {repeat}, {n:,} responses) ──")
+    print(f"  json.loads (full batch line)  {1e6 * t_json / len(lines):7.2f} µs/line")
+    for name, ref, new in parser_pairs()[:7]:
+        t_ref = _time(ref, texts, repeat)
+        t_new = _time(new, texts, repeat)
+        print(f"  {name:<18} reference {1e6 * t_ref / n:6.2f} µs  "
+              f"compiled {1e6 * t_new / n:6.2f} µs  ({t_ref / t_new:4.1f}×)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--input-dir", default=None,
+                        help=f"Batch output directory (default: {DEFAULT_INDIR})")
+    parser.add_argument("--repeat",    type=int, default=5)
+    parser.add_argument("--no-bench",  action="store_true")
+    args = parser.parse_args()
+
+    input_dir    = Path(args.input_dir) if args.input_dir else DEFAULT_INDIR
+    lines, texts = load_corpus(input_dir)
+    corpus       = texts + EXTRA_CASES
+    corpus      += [t.lower() for t in corpus] + [f" {t}. " for t in corpus]
+    print(f"Corpus: {len(texts):,} stored responses from {input_dir.name}/ "
+          f"+ {len(corpus) - len(texts):,} edge cases")
+
+    n_bad = check(corpus)
+    if not args.no_bench and texts:
+        bench(lines, texts, args.repeat)
+
+    if n_bad:
+        print(f"\nFAILED: {n_bad} mismatches")
+        sys.exit(1)
+    print("\nAll parsers match the reference implementation.")
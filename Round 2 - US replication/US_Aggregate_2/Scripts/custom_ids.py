@@ -0,0 +1,141 @@
+"""
+custom_ids.py  —  Compact batch custom_id codec + SQLite manifest
+
+Batch requests used to carry f"{seq_id}__{arm_id}__{outcome_id}__{i}" as their
+custom_id, decoded by splitting on "__".  That is ambiguous for arm ids that
+contain "__", needed a `_dup\\d+$` suffix hack (US_Aggregate/.../dedup_batches.py)
+when two requests shared a tuple, and repeats a long slug on every line.
+
+New ids are short and fixed-width:
+
+    "r" + 16 hex chars of blake2b(config, seq_id, arm_id, outcome_id,
+                                  sample_idx, occurrence)
+
+and a manifest table maps each id back to its request:
+
+    custom_ids(custom_id PK, seq_id, arm_id, outcome_id, sample_idx, config)
+
+Ids are deterministic, so regenerating the same batch yields the same ids and
+re-inserting them is a no-op.  `occurrence` counts repeats of an identical
+tuple within one codec, so duplicate outcome ids still get distinct
+custom_ids while decoding to the same cell.
+
+Decoding is a primary-key lookup; ids in the old "__" format (every batch
+output already on disk) fall back to decode_legacy().  A compact id means
+nothing without its manifest, so the manifest is committed next to the batch
+files it describes; decoding an id the manifest lacks (or without a manifest)
+raises UnknownCustomId.
+
+Shared by 02_simulate.py, 02b_simulate_178_patch.py, 03_unpack_batches.py and
+US_Microdata/.../simulate_experiments.py:
+
+    codec = CustomIdCodec(DATA_DIR / "Simulation" / MANIFEST_NAME, config="default")
+    cid   = codec.encode(seq_id, arm_id, outcome_id, i)
+    codec.flush()                        # before the batch file leaves the machine
+    seq_id, arm_id, outcome_id, i, cfg = codec.decode(cid)
+"""
+
+import hashlib, re, sqlite3
+from collections import Counter
+from pathlib import Path
+
+MANIFEST_NAME = "custom_id_manifest.sqlite"
+ID_PREFIX     = "r"
+ID_WIDTH      = len(ID_PREFIX) + 16
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS custom_ids (
+    custom_id   TEXT PRIMARY KEY,
+    seq_id      INTEGER NOT NULL,
+    arm_id      TEXT    NOT NULL,
+    outcome_id  TEXT    NOT NULL,
+    sample_idx  INTEGER NOT NULL,
+    config      TEXT    NOT NULL
+) WITHOUT ROWID
+"""
+
+
+class UnknownCustomId(KeyError):
+    """A compact custom_id that is not in the manifest (or there is no manifest)."""
+
+
+def is_compact(custom_id: str) -> bool:
+    return len(custom_id) == ID_WIDTH and custom_id.startswith(ID_PREFIX) \
+        and "__" not in custom_id
+
+
+def decode_legacy(custom_id: str) -> tuple[int, str, str, int, None]:
+    """Old "seq__arm__outcome__i" ids, including dedup_batches.py `_dupN` suffixes."""
+    parts = custom_id.split("__")
+    return (int(parts[0]),
+            "__".join(parts[1:-2]),
+            re.sub(r"_dup\d+$", "", parts[-2]),
+            int(parts[-1]),
+            None)
+
+
+class CustomIdCodec:
+    def __init__(self, manifest_path: Path, config: str = "default"):
+        self.path     = Path(manifest_path)
+        self.config   = config
+        self._conn    = None
+        self._pending: list[tuple] = []
+        self._occ:     Counter     = Counter()
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(self.path)
+            self._conn.execute(_SCHEMA)
+        return self._conn
+
+    # -- encode --------------------------------------------------------------
+
+    def encode(self, seq_id: int, arm_id: str, outcome_id: str,
+               sample_idx: int) -> str:
+        key  = (seq_id, arm_id, outcome_id, sample_idx)
+        occ  = self._occ[key]
+        self._occ[key] += 1
+        raw  = "\x1f".join(map(str, (self.config, *key, occ))).encode()
+        cid  = ID_PREFIX + hashlib.blake2b(raw, digest_size=8).hexdigest()
+        self._pending.append((cid, seq_id, arm_id, outcome_id, sample_idx, self.config))
+        return cid
+
+    def flush(self) -> int:
+        """Write pending ids to the manifest; returns the number written."""
+        if not self._pending:
+            return 0
+        db = self._db()
+        with db:
+            db.executemany(
+                "INSERT OR IGNORE INTO custom_ids VALUES (?, ?, ?, ?, ?, ?)",
+                self._pending)
+        n, self._pending = len(self._pending), []
+        return n
+
+    # -- decode --------------------------------------------------------------
+
+    def decode(self, custom_id: str) -> tuple[int, str, str, int, str | None]:
+        """(seq_id, arm_id, outcome_id, sample_idx, config) for custom_id."""
+        if not is_compact(custom_id):
+            return decode_legacy(custom_id)
+        if self._conn is None and not self.path.exists():   # don't create an empty one
+            raise UnknownCustomId(f"custom_id {custom_id}: manifest {self.path} does not exist")
+        row = self._db().execute(
+            "SELECT seq_id, arm_id, outcome_id, sample_idx, config "
+            "FROM custom_ids WHERE custom_id = ?", (custom_id,)).fetchone()
+        if row is None:
+            raise UnknownCustomId(f"custom_id {custom_id} not in manifest {self.path}")
+        return row
+
+    def close(self):
+        self.flush()
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
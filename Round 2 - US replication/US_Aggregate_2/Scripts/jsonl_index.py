@@ -0,0 +1,276 @@
+"""
+jsonl_index.py  —  Byte-offset sidecar index for JSONL artifacts
+
+Records the byte ranges each key occupies in a JSONL file, so one study (or one
+arm × outcome cell) can be read by seeking straight to its lines instead of
+decoding the whole file:
+
+    Data/Ground_Truth/study_data.jsonl          → study_data.idx.json
+    Data/Simulation/aggregate_simulation_raw.jsonl
+                                                → aggregate_simulation_raw.idx.json
+
+Keys are picked from the first record:
+
+    simulation records        (seq_id, arm_id, outcome_id)
+    batch output lines        (seq_id, arm_id, outcome_id), decoded from custom_id
+    study_data                (seq_id,)
+    enriched design specs     (rct_id,)   (AEA registry, "AEARCTR-0000028")
+
+The chosen fields are stored in the sidecar; a record without them is an error.
+
+Consecutive lines with the same key are stored as one [start, end) span, so a
+file written cell by cell needs one span per cell.
+
+The sidecar records the size, mtime and inode of the file it describes, plus a
+hash of its last indexed bytes.  If the file has only grown in place
+(02b_simulate_178_patch.py appending records) just the new tail is indexed; any
+other change rebuilds the index.
+
+    from jsonl_index import read_records
+    rec  = next(read_records(STUDY_PATH, 178))
+    recs = list(read_records(RAW_PATH, 178, "high_inflation", "durable_goods"))
+
+Compressed files (.jsonl.zst / .jsonl.gz, see jsonl_io.py) have no usable byte
+offsets; read_records() streams them through the same key filter instead.
+
+Per-study debugging from the shell:
+
+    python jsonl_index.py Data/Simulation/aggregate_simulation_raw.jsonl --seq 178
+    python jsonl_index.py Data/Simulation/Batch_Output/*.jsonl      # (re)build only
+    python jsonl_index.py design_specs_enriched.jsonl --seq AEARCTR-0000028
+"""
+
+import argparse, hashlib, json, sys
+from pathlib import Path
+
+from custom_ids import MANIFEST_NAME, CustomIdCodec, decode_legacy, is_compact
+from jsonl_io import is_compressed, iter_jsonl, jsonl_stem
+
+CELL_FIELDS = ("seq_id", "arm_id", "outcome_id")
+KEY_FIELDS  = ("seq_id", "rct_id")      # per-study keys, in order of preference
+TAIL_BYTES  = 4096
+
+
+def _tail_hash(path: Path, size: int) -> str:
+    """Hash of the TAIL_BYTES bytes before `size` (detects rewrites vs appends)."""
+    with open(path, "rb") as f:
+        f.seek(max(0, size - TAIL_BYTES))
+        return hashlib.blake2b(f.read(min(size, TAIL_BYTES)), digest_size=8).hexdigest()
+
+
+def index_path(path: Path) -> Path:
+    return path.with_name(jsonl_stem(path) + ".idx.json")
+
+
+def _find_manifest(path: Path) -> Path | None:
+    """custom_id manifest for a batch output file (Batch_Output/../MANIFEST_NAME)."""
+    for d in (path.parent, path.parent.parent):
+        if (d / MANIFEST_NAME).exists():
+            return d / MANIFEST_NAME
+    return None
+
+
+class JsonlIndex:
+    def __init__(self, path: Path, fields: tuple[str, ...]):
+        self.path   = Path(path)
+        self.fields = fields
+        self.spans: dict[int | str, list[list]] = {}   # key[0] → [[*key, start, end]]
+        self.size   = 0                          # bytes indexed so far
+
+    # -- build ---------------------------------------------------------------
+
+    def _scan(self, start: int) -> None:
+        codec = None
+        seen  = False                            # looked for a custom_id manifest
+        last  = None
+        with open(self.path, "rb") as f:
+            f.seek(start)
+            pos = start
+            for line in f:
+                end = pos + len(line)
+                if line.strip():
+                    rec = json.loads(line)
+                    if "custom_id" in rec and not seen:
+                        codec, seen = _open_codec(self.path), True
+                    try:
+                        key = _record_key(rec, self.fields, codec)
+                    except ValueError as e:
+                        raise ValueError(f"{self.path.name} @ byte {pos}: {e}") from None
+                    if last is not None and last[:-2] == list(key) and last[-1] == pos:
+                        last[-1] = end
+                    else:
+                        last = [*key, pos, end]
+                        self.spans.setdefault(key[0], []).append(last)
+                pos = end
+        if codec is not None:
+            codec.close()
+        self.size = pos
+
+    @classmethod
+    def build(cls, path: Path) -> "JsonlIndex":
+        path = Path(path)
+        if is_compressed(path):
+            raise ValueError(f"{path.name}: compressed files cannot be indexed by byte offset")
+        with open(path, "rb") as f:
+            first = json.loads(f.readline() or b"{}")
+        index = cls(path, _fields_for(first))
+        index._scan(0)
+        return index
+
+    # -- persistence ---------------------------------------------------------
+
+    def save(self) -> Path:
+        st  = self.path.stat()
+        out = index_path(self.path)
+        out.write_text(json.dumps({
+            "source":          self.path.name,
+            "source_size":     self.size,
+            "source_mtime_ns": st.st_mtime_ns,
+            "source_ino":      st.st_ino,
+            "tail_hash":       _tail_hash(self.path, self.size),
+            "fields":          list(self.fields),
+            "spans":           [s for seq_id in sorted(self.spans)
+                                for s in self.spans[seq_id]],
+        }) + "\n")
+        return out
+
+    @classmethod
+    def load(cls, path: Path) -> "JsonlIndex":
+        """Saved index for path, brought up to date (extended or rebuilt) if needed."""
+        path = Path(path)
+        side = index_path(path)
+        st   = path.stat()
+        try:
+            data = json.loads(side.read_text())
+        except (FileNotFoundError, json.JSONDecodeError):
+            data = None
+
+        if data is not None and data["source_size"] == st.st_size \
+                and data["source_mtime_ns"] == st.st_mtime_ns \
+                and data.get("source_ino") == st.st_ino:
+            return cls._from_saved(path, data)
+
+        appended = (data is not None
+                    and data.get("source_ino") == st.st_ino
+                    and data["source_size"] < st.st_size
+                    and data.get("tail_hash") == _tail_hash(path, data["source_size"]))
+        if appended:
+            index = cls._from_saved(path, data)
+            index._scan(index.size)
+        else:
+            index = cls.build(path)
+        index.save()
+        return index
+
+    @classmethod
+    def _from_saved(cls, path: Path, data: dict) -> "JsonlIndex":
+        index = cls(path, tuple(data["fields"]))
+        for span in data["spans"]:
+            index.spans.setdefault(span[0], []).append(span)
+        index.size = data["source_size"]
+        return index
+
+    # -- lookup --------------------------------------------------------------
+
+    def keys(self) -> list[tuple]:
+        return list(dict.fromkeys(tuple(s[:-2]) for seq_id in sorted(self.spans)
+                                  for s in self.spans[seq_id]))
+
+    def ranges(self, *key) -> list[tuple[int, int]]:
+        """[start, end) byte ranges of every line whose key starts with `key`."""
+        if not key:
+            return [(s[-2], s[-1]) for seq_id in self.spans for s in self.spans[seq_id]]
+        n = len(key)
+        return [(s[-2], s[-1]) for s in self.spans.get(key[0], [])
+                if tuple(s[:n]) == key]
+
+    def read(self, *key):
+        """Yield the decoded records for `key` (a prefix of the index fields)."""
+        with open(self.path, "rb") as f:
+            for start, end in sorted(self.ranges(*key)):
+                f.seek(start)
+                for line in f.read(end - start).splitlines():
+                    if line.strip():
+                        yield json.loads(line)
+
+
+def _fields_for(first: dict) -> tuple[str, ...]:
+    if "custom_id" in first or ("arm_id" in first and "outcome_id" in first):
+        return CELL_FIELDS
+    for field in KEY_FIELDS:
+        if field in first:
+            return (field,)
+    raise ValueError(f"first record has none of the key fields {', '.join(KEY_FIELDS)}")
+
+
+def _open_codec(path: Path) -> CustomIdCodec | None:
+    manifest = _find_manifest(path)
+    return CustomIdCodec(manifest) if manifest else None
+
+
+def _record_key(rec: dict, fields: tuple[str, ...], codec: CustomIdCodec | None) -> tuple:
+    if "custom_id" not in rec:
+        missing = [k for k in fields if k not in rec]
+        if missing:
+            raise ValueError(f"record has no {', '.join(missing)} (indexed by {', '.join(fields)})")
+        return tuple(rec[k] for k in fields)
+    custom_id = rec["custom_id"]
+    if codec is None or not is_compact(custom_id):
+        seq_id, arm_id, outcome_id, _, _ = decode_legacy(custom_id)
+    else:
+        seq_id, arm_id, outcome_id, _, _ = codec.decode(custom_id)
+    return (seq_id, arm_id, outcome_id)
+
+
+def _scan_compressed(path: Path, key: tuple):
+    codec, fields, n = None, None, len(key)
+    try:
+        for rec in iter_jsonl(path):
+            if fields is None:
+                fields = _fields_for(rec)
+                codec  = _open_codec(path) if "custom_id" in rec else None
+            if _record_key(rec, fields, codec)[:n] == key:
+                yield rec
+    finally:
+        if codec is not None:
+            codec.close()
+
+
+def _key_value(text: str) -> int | str:
+    """CLI key: seq_ids are ints, rct_ids ("AEARCTR-0000028") strings."""
+    return int(text) if text.isdigit() else text
+
+
+def read_records(path: Path, *key):
+    """Records of `path` whose key starts with `key`, e.g. (seq_id,) or
+    (seq_id, arm_id, outcome_id); builds or refreshes the sidecar as needed."""
+    if is_compressed(path):
+        return _scan_compressed(Path(path), key)
+    return JsonlIndex.load(path).read(*key)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("files", nargs="+", type=Path, help="JSONL file(s) to index")
+    parser.add_argument("--seq",     type=_key_value, default=None,
+                        help="Print records for this seq_id (or rct_id)")
+    parser.add_argument("--arm",     default=None, help="... and this arm_id")
+    parser.add_argument("--outcome", default=None, help="... and this outcome_id")
+    args = parser.parse_args()
+
+    key = tuple(k for k in (args.seq, args.arm, args.outcome) if k is not None)
+    for path in args.files:
+        if not path.exists():
+            print(f"Not found: {path}")
+            sys.exit(1)
+        if args.seq is not None:
+            for rec in read_records(path, *key):
+                print(json.dumps(rec, ensure_ascii=False))
+        elif is_compressed(path):
+            print(f"{path.name}: compressed, not indexed (read by streaming)")
+        else:
+            index   = JsonlIndex.load(path)
+            n_spans = sum(len(v) for v in index.spans.values())
+            print(f"{path.name}: {len(index.spans)} {index.fields[0]}(s), {n_spans} span(s)  "
+                  f"→ {index_path(path).name}")
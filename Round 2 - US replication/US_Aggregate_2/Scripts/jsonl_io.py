@@ -0,0 +1,167 @@
+"""
+jsonl_io.py  —  Transparent .jsonl / .jsonl.zst / .jsonl.gz I/O
+
+Pipeline artifacts can be stored compressed; readers and writers pick the codec
+from the file suffix and stream through it, so nothing is decompressed to disk:
+
+    batch_01_of_02.jsonl        plain text
+    batch_01_of_02.jsonl.zst    zstandard (needs `pip install zstandard`)
+    batch_01_of_02.jsonl.gz     gzip (standard library)
+
+Batch input / output files are mostly repeated prompt and response text and
+shrink roughly 10x under zstd.
+
+    from jsonl_io import open_text, iter_jsonl, resolve, glob_jsonl
+    for rec in iter_jsonl(resolve(STUDIES_PATH)):      # finds study_data.jsonl.zst too
+        ...
+    with open_text(out_dir / "batch_01_of_02.jsonl.zst", "w") as f:
+        f.write(json.dumps(req) + "\\n")
+
+Files that are appended to or indexed by byte offset (the raw simulation
+output, see sim_stats.py / jsonl_index.py) are read compressed just as well, but
+are best kept plain while they are still being written.
+
+Convert files in place from the shell:
+
+    python jsonl_io.py compress   Data/Simulation/Batch_Output/*.jsonl
+    python jsonl_io.py decompress Data/Simulation/Batch_Input/*.jsonl.zst
+"""
+
+import argparse, gzip, json, shutil, sys
+from pathlib import Path
+
+COMPRESSED_SUFFIXES = (".zst", ".gz")
+ZSTD_LEVEL          = 10
+
+
+def _zstd():
+    try:
+        import zstandard
+    except ImportError:
+        raise ImportError("Reading/writing .zst files needs the zstandard package "
+                          "(pip install zstandard)") from None
+    return zstandard
+
+
+def open_text(path: Path, mode: str = "r"):
+    """open() for text, decompressing / compressing by suffix.  mode: r, w or a."""
+    path = Path(path)
+    mode = mode.replace("t", "")
+    if path.suffix == ".gz":
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    if path.suffix == ".zst":
+        zstd = _zstd()
+        cctx = zstd.ZstdCompressor(level=ZSTD_LEVEL) if mode != "r" else None
+        return zstd.open(path, mode + "t", cctx=cctx, encoding="utf-8")
+    return open(path, mode)
+
+
+def open_binary(path: Path):
+    """Decompressed byte stream of path (e.g. for uploading a batch file)."""
+    path = Path(path)
+    if path.suffix == ".gz":
+        return gzip.open(path, "rb")
+    if path.suffix == ".zst":
+        return _zstd().open(path, "rb")
+    return open(path, "rb")
+
+
+def is_compressed(path: Path) -> bool:
+    return Path(path).suffix in COMPRESSED_SUFFIXES
+
+
+def plain_path(path: Path) -> Path:
+    """batch.jsonl.zst → batch.jsonl"""
+    path = Path(path)
+    return path.with_suffix("") if is_compressed(path) else path
+
+
+def jsonl_stem(path: Path) -> str:
+    """aggregate_simulation_raw.jsonl(.zst|.gz) → aggregate_simulation_raw"""
+    return plain_path(path).stem
+
+
+def resolve(path: Path) -> Path:
+    """path if it exists, else its first existing compressed sibling, else path."""
+    path = Path(path)
+    if path.exists() or is_compressed(path):
+        return path
+    for suffix in COMPRESSED_SUFFIXES:
+        alt = path.with_name(path.name + suffix)
+        if alt.exists():
+            return alt
+    return path
+
+
+def glob_jsonl(directory: Path, pattern: str = "*") -> list[Path]:
+    """Sorted `pattern`.jsonl files in directory, compressed or not."""
+    directory = Path(directory)
+    files = set(directory.glob(pattern + ".jsonl"))
+    for suffix in COMPRESSED_SUFFIXES:
+        files.update(directory.glob(pattern + ".jsonl" + suffix))
+    return sorted(files)
+
+
+def iter_jsonl(path: Path):
+    """Decoded records of a (possibly compressed) JSONL file, skipping blank lines."""
+    with open_text(path) as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def write_jsonl(path: Path, records) -> int:
+    """Write records one per line; returns the number written."""
+    n = 0
+    with open_text(path, "w") as f:
+        for rec in records:
+            f.write(json.dumps(rec, ensure_ascii=False) + "\n")
+            n += 1
+    return n
+
+
+# ---------------------------------------------------------------------------
+# CLI: convert files in place
+# ---------------------------------------------------------------------------
+
+def _convert(src: Path, dst: Path) -> None:
+    tmp = dst.with_name(dst.name + ".tmp")
+    with open_binary(src) as fin:
+        if dst.suffix == ".gz":
+            fout = gzip.open(tmp, "wb")
+        elif dst.suffix == ".zst":
+            fout = _zstd().open(tmp, "wb", cctx=_zstd().ZstdCompressor(level=ZSTD_LEVEL))
+        else:
+            fout = open(tmp, "wb")
+        with fout:
+            shutil.copyfileobj(fin, fout, 1 << 20)
+    tmp.replace(dst)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("action", choices=["compress", "decompress"])
+    parser.add_argument("files", nargs="+", type=Path)
+    parser.add_argument("--format", choices=["zst", "gz"], default="zst",
+                        help="Codec for compress (default: zst)")
+    parser.add_argument("--keep", action="store_true", help="Keep the source files")
+    args = parser.parse_args()
+
+    for src in args.files:
+        if not src.exists():
+            print(f"Not found: {src}")
+            sys.exit(1)
+        if args.action == "compress":
+            if is_compressed(src):
+                continue
+            dst = src.with_name(src.name + "." + args.format)
+        else:
+            if not is_compressed(src):
+                continue
+            dst = plain_path(src)
+        _convert(src, dst)
+        before, after = src.stat().st_size, dst.stat().st_size
+        if not args.keep:
+            src.unlink()
+        print(f"{src.name} → {dst.name}  {before/1024:,.0f} KB → {after/1024:,.0f} KB")
@@ -0,0 +1,189 @@
+"""
+kv_cache.py  —  SQLite key-value cache shared by the LLM pipeline stages
+
+Replaces the whole-file JSON caches (load_cache() / save_cache() rewriting the
+full dict with indent=2 after every study).  Each stage gets its own namespace
+in one database per data tree:
+
+    Data/Caches/cache.sqlite
+        kv(namespace, key, value JSON, updated_at)   PRIMARY KEY (namespace, key)
+
+Writes are single-row upserts committed immediately, and the database runs in
+WAL mode, so a crash loses at most the entry being written and several
+processes (e.g. 00 and 01 running side by side) can read while another writes.
+
+KVCache behaves like the dict the stages used before:
+
+    cache = open_cache(DATA_DIR, "extract_study_data")
+    if key in cache:
+        design = cache[key]
+    cache[key] = design                      # persisted now, no save_cache()
+
+On first open of an empty namespace the stage's legacy JSON cache (see
+LEGACY_CACHES) is imported automatically.  To import by hand:
+
+    python kv_cache.py migrate Data/Caches/.extract_study_data_cache.json
+    python kv_cache.py migrate Data/Caches/old.json --namespace extract_study_data
+    python kv_cache.py stats Data/Caches/cache.sqlite
+"""
+
+import argparse, json, sqlite3, sys, time
+from collections.abc import MutableMapping
+from pathlib import Path
+
+CACHE_NAME = "cache.sqlite"
+
+# legacy JSON cache file → namespace it migrates into
+LEGACY_CACHES = {
+    ".preprocessed_papers.json":      "preprocess_papers",
+    ".extract_study_data_cache.json": "extract_study_data",
+    ".tier_cache.json":               "classify_tiers",
+    ".extract_cache.json":            "extract_from_paper",
+    ".llm_cache_design_extract.json": "enrich_design_specs",
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS kv (
+    namespace   TEXT NOT NULL,
+    key         TEXT NOT NULL,
+    value       TEXT NOT NULL,
+    updated_at  REAL NOT NULL,
+    PRIMARY KEY (namespace, key)
+) WITHOUT ROWID
+"""
+
+
+def connect(db_path: Path) -> sqlite3.Connection:
+    db_path = Path(db_path)
+    db_path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(db_path, timeout=30, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute(_SCHEMA)
+    return conn
+
+
+class KVCache(MutableMapping):
+    """One namespace of the cache database, as a str → JSON-value mapping."""
+
+    def __init__(self, db_path: Path, namespace: str):
+        self.path      = Path(db_path)
+        self.namespace = namespace
+        self._conn     = connect(self.path)
+
+    def __getitem__(self, key: str):
+        row = self._conn.execute(
+            "SELECT value FROM kv WHERE namespace = ? AND key = ?",
+            (self.namespace, key)).fetchone()
+        if row is None:
+            raise KeyError(key)
+        return json.loads(row[0])
+
+    def __setitem__(self, key: str, value) -> None:
+        self._conn.execute(
+            "INSERT INTO kv VALUES (?, ?, ?, ?) "
+            "ON CONFLICT (namespace, key) DO UPDATE "
+            "SET value = excluded.value, updated_at = excluded.updated_at",
+            (self.namespace, key, json.dumps(value), time.time()))
+
+    def __delitem__(self, key: str) -> None:
+        cur = self._conn.execute(
+            "DELETE FROM kv WHERE namespace = ? AND key = ?", (self.namespace, key))
+        if not cur.rowcount:
+            raise KeyError(key)
+
+    def __contains__(self, key) -> bool:
+        return self._conn.execute(
+            "SELECT 1 FROM kv WHERE namespace = ? AND key = ?",
+            (self.namespace, key)).fetchone() is not None
+
+    def __iter__(self):
+        rows = self._conn.execute(
+            "SELECT key FROM kv WHERE namespace = ? ORDER BY key", (self.namespace,))
+        return (k for (k,) in rows.fetchall())
+
+    def __len__(self) -> int:
+        return self._conn.execute(
+            "SELECT COUNT(*) FROM kv WHERE namespace = ?", (self.namespace,)).fetchone()[0]
+
+    def items_with_prefix(self, prefix: str):
+        """(key, value) pairs whose key starts with prefix, via the primary-key index."""
+        rows = self._conn.execute(
+            "SELECT key, value FROM kv WHERE namespace = ? AND key >= ? AND key < ? "
+            "ORDER BY key", (self.namespace, prefix, prefix + "\U0010ffff"))
+        return [(k, json.loads(v)) for k, v in rows.fetchall()]
+
+    def update_many(self, items) -> int:
+        """Upsert many (key, value) pairs in one transaction; returns the count."""
+        now  = time.time()
+        rows = [(self.namespace, k, json.dumps(v), now) for k, v in items]
+        with self._conn:
+            self._conn.execute("BEGIN")
+            self._conn.executemany(
+                "INSERT INTO kv VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (namespace, key) DO UPDATE "
+                "SET value = excluded.value, updated_at = excluded.updated_at", rows)
+        return len(rows)
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+def migrate_json(json_path: Path, cache: KVCache) -> int:
+    """Import a legacy {key: value} JSON cache file; returns entries imported."""
+    data = json.loads(Path(json_path).read_text())
+    return cache.update_many(data.items())
+
+
+def open_cache(data_dir: Path, namespace: str, legacy: Path | None = None) -> KVCache:
+    """KVCache for `namespace` in data_dir/Caches/CACHE_NAME.  An empty
+    namespace is seeded from its legacy JSON cache file if one exists: `legacy`
+    when given (a stage whose old cache lived elsewhere), else its LEGACY_CACHES
+    file in data_dir/Caches."""
+    caches = Path(data_dir) / "Caches"
+    cache  = KVCache(caches / CACHE_NAME, namespace)
+    if not len(cache):
+        candidates = [Path(legacy)] if legacy else [
+            caches / name for name, ns in LEGACY_CACHES.items() if ns == namespace]
+        for legacy in candidates:
+            if legacy.exists():
+                try:
+                    n = migrate_json(legacy, cache)
+                except json.JSONDecodeError:
+                    print(f"  [cache] {legacy.name} is not valid JSON; not migrated")
+                    continue
+                print(f"  [cache] migrated {n} entries from {legacy.name} "
+                      f"→ {CACHE_NAME}:{namespace}")
+    return cache
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    p_m = sub.add_parser("migrate", help="Import legacy JSON cache file(s)")
+    p_m.add_argument("files", nargs="+", type=Path)
+    p_m.add_argument("--namespace", default=None,
+                     help="Target namespace (default: from LEGACY_CACHES by file name)")
+    p_m.add_argument("--db", type=Path, default=None,
+                     help=f"Database (default: {CACHE_NAME} next to the JSON file)")
+    p_s = sub.add_parser("stats", help="Entries per namespace")
+    p_s.add_argument("db", type=Path)
+    args = parser.parse_args()
+
+    if args.cmd == "stats":
+        conn = connect(args.db)
+        for ns, n in conn.execute(
+                "SELECT namespace, COUNT(*) FROM kv GROUP BY namespace ORDER BY namespace"):
+            print(f"  {ns:<24} {n:>7,}")
+        sys.exit(0)
+
+    for path in args.files:
+        ns = args.namespace or LEGACY_CACHES.get(path.name)
+        if ns is None:
+            print(f"{path.name}: unknown cache file, pass --namespace")
+            sys.exit(1)
+        cache = KVCache(args.db or path.parent / CACHE_NAME, ns)
+        n     = migrate_json(path, cache)
+        print(f"{path.name} → {cache.path.name}:{ns}  ({n} entries, {len(cache)} total)")
+        cache.close()
@@ -0,0 +1,377 @@
+"""
+paper_condenser.py  —  Rule-based condensing of paper text, no API calls
+
+00_preprocess_papers.py used to send every paper's raw text to gpt-5.4-mini
+just to drop the parts no later stage reads.  Most of those are found by rule,
+page by page (pdf_text.pdf_pages):
+
+    headers/footers   lines repeated at the top or bottom of many pages
+                      (running titles, journal lines, download watermarks)
+                      and page numbers: a bare number as the first or last
+                      line of a page (under / above those headers) that
+                      follows the page sequence (page index + a fixed offset,
+                      one per numbering run) on several pages
+    front matter      on the first page: affiliation lines (Department,
+                      University, ...) in the author block before the abstract
+                      or first heading, received / accepted / DOI / copyright
+                      lines
+    emails            addresses anywhere, and "E-mail:", "Corresponding
+                      author", "ORCID" lines
+    references        from a "References" / "Bibliography" heading to the next
+                      appendix heading or table / figure caption, or the first
+                      page that is no longer a list of citations
+    back matter       Acknowledgements, Funding, Conflict of interest, Data
+                      availability, Author contributions sections, up to the
+                      next section heading
+
+Headings are compared with spaces removed, since pdfminer often glues the
+words of a line together ("DepartmentofEconomics").  Stimulus text, methods,
+results and tables are never touched; 00 can still run the LLM condenser on
+the shorter text, or skip it (--condenser offline).
+
+    from paper_condenser import condense_pdfs
+    out = condense_pdfs(find_pdfs(seq_id), max_chars=MAX_PDF_CHARS)
+    out["text"], out["original_chars"], out["offline_chars"], out["removed"]
+
+    python paper_condenser.py ../Data/Papers/Kaden/12.pdf           # ratio + removed
+    python paper_condenser.py ../Data/Papers --show                 # print condensed text
+    python paper_condenser.py ../Data/Papers --check                # only page numbers lost
+"""
+
+import argparse, asyncio, math, re, sys
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from pdf_text import _CITATION, DEFAULT_BACKEND, merge_ranked, pdf_pages
+
+EDGE_LINES           = 3      # lines at the top / bottom of a page checked for headers / footers
+EDGE_MIN_PAGES       = 3      # a header repeats on at least this many pages ...
+EDGE_MIN_SHARE       = 0.25   # ... and this share of the paper's pages
+MAX_FRONT_LINE       = 120    # longer first-page lines are body text, not affiliations
+MAX_HEADING          = 80
+MAX_BACKMATTER_LINES = 25     # an acknowledgements section never runs longer
+REFERENCE_PAGE_SHARE = 0.15   # below this share of citation lines a page ends the references
+
+_EMAIL       = re.compile(r"[\w.+-]+@[\w-]+(?:\.[\w-]+)+")
+_PAGE_NUMBER = re.compile(r"^[\s|\u2013-]*(?:page)?\s*\d{1,4}(?:\s*(?:of|/)\s*\d{1,4})?[\s|\u2013-]*$",
+                          re.I)
+_CONTACT     = re.compile(r"^[^\w\s]?\s*(?:e-?mail\s*(?:address(?:es)?)?\s*:|corresponding\s*author|"
+                          r"orcid|tel\.|phone\s*:)", re.I)
+_METADATA    = re.compile(r"^(?:https?://(?:dx\.)?doi\.org|doi:|©|\(c\)|copyright\b)", re.I)
+_FRONT_META  = re.compile(r"^(?:Received|Revised|Accepted|Published|Available\s*online|"
+                          r"Contents\s*lists|journal\s*homepage)")
+_AFFILIATION = re.compile(r"Department|Dept\.|Universit|Institut|School|College|Faculty|"
+                          r"Center|Centre|Laborator|NBER|CEPR|IZA|CESifo|Federal Reserve|"
+                          r"Bank of|Max Planck|Fellow|Professor")
+_PROSE       = re.compile(r"\b(?:the|this|that|these|we|our|is|are|was|were|in|to|with|which|"
+                          r"while|not|by|as)\b", re.I)   # a second column of body text beside it
+_CAPTION     = re.compile(r"^(?:Table|TABLE|Figure|FIGURE|Fig\.)\s*[A-Z]?\d+")
+_APPENDIX    = re.compile(r"^(?i:online\s*)?(?i:appendix|appendices|supplementary\s*(?:material|data|"
+                          r"information)s?)(?!\s*(?:Table|Figure|Fig))(?:\s*[A-Z]?\d{0,2}(?:\.\d+)?)"
+                          r"(?:\s*[.:\u2014-]|\s*$|\s+[A-Z])")
+_SECTION_NO  = r"(?:\d{1,2}(?:\.\d{1,2})*\.?|[IVX]{1,5}\.|[A-H]\.)"
+_NUMBERED    = re.compile(rf"^{_SECTION_NO}\s*\|?\s*[A-Z]")
+_NUMERIC     = re.compile(r"\d+\.\d+|\(\d")
+
+# Section names, lowercase with spaces removed
+_REFERENCE_NAMES  = {"references", "bibliography", "workscited", "literaturecited",
+                     "referencesandnotes"}
+_BACKMATTER_NAMES = {"acknowledgements", "acknowledgments", "acknowledgement",
+                     "acknowledgment", "funding", "fundinginformation", "conflictofinterest",
+                     "conflictsofinterest", "declarationofcompetinginterest",
+                     "declarationofinterests", "competinginterests", "dataavailability",
+                     "dataavailabilitystatement", "authorcontributions", "ethicsstatement",
+                     "disclosurestatement", "openaccess"}
+_SECTION_NAMES    = {"abstract", "introduction", "background", "literaturereview",
+                     "relatedliterature", "methods", "method", "methodology", "materialsandmethods",
+                     "experimentaldesign", "design", "procedure", "data", "results", "discussion",
+                     "conclusion", "conclusions", "concludingremarks"} \
+                    | _REFERENCE_NAMES | _BACKMATTER_NAMES
+
+
+def _key(line: str) -> str:
+    """Heading key: lowercase, without the section number, spaces or closing
+    punctuation ("5 | Data availability:" → "dataavailability")."""
+    line = re.sub(rf"^\s*{_SECTION_NO}?\s*\|?", "", line)
+    return re.sub(r"[\s:.\u2014-]+", "", line.lower())
+
+
+def _edge_key(line: str) -> str:
+    """Header / footer key: page numbers and dates vary, the rest repeats."""
+    return re.sub(r"\d+", "#", re.sub(r"\s+", "", line.lower()))
+
+
+def is_heading(line: str) -> bool:
+    line = line.strip()
+    if not line or len(line) > MAX_HEADING:
+        return False
+    m = _NUMBERED.match(line)
+    if m and not re.search(r"\d", line[m.end() - 1:]):     # "3.2 Results", not "2 Treatment 0.45"
+        return True
+    return _key(line) in _SECTION_NAMES or _is_appendix(line)
+
+
+def _is_appendix(line: str) -> bool:
+    """ "Appendix B: Instructions", "AppendixA. Supplementarydata" — not "Appendix
+    Table A3 ..." or a sentence wrapped after the word."""
+    return len(line) <= MAX_HEADING and bool(_APPENDIX.match(line.strip()))
+
+
+def _repeated_edges(pages: list[list[str]]) -> set[str]:
+    counts = Counter()
+    for lines in pages:
+        edges = lines[:EDGE_LINES] + lines[-EDGE_LINES:]
+        counts.update({_edge_key(l) for l in edges if l.strip()})
+    need = max(EDGE_MIN_PAGES, math.ceil(EDGE_MIN_SHARE * len(pages)))
+    return {k for k, n in counts.items() if n >= need}
+
+
+def _page_number(line: str) -> int | None:
+    """The number in a bare page-number line ("12", "- 12 -", "Page 3 of 32")."""
+    return int(re.search(r"\d+", line).group()) if _PAGE_NUMBER.match(line) else None
+
+
+def _ends(lines: list[str], edges: set[str]) -> set[int]:
+    """Indices of the first and last non-empty lines of a page, not counting
+    repeated headers / footers (a watermark under the page number)."""
+    body = [k for k, l in enumerate(lines)
+            if l.strip() and (_page_number(l.strip()) is not None
+                              or _edge_key(l.strip()) not in edges)]
+    return {body[0], body[-1]} if body else set()
+
+
+def _page_offsets(pages: list[list[str]], edges: set[str]) -> set[int]:
+    """Printed page number minus page index, for each offset the first or last
+    lines of at least EDGE_MIN_PAGES pages agree on (an appendix may restart
+    its numbering); empty when the paper has no page numbers."""
+    counts = Counter()
+    for i, lines in enumerate(pages):
+        numbers = {_page_number(lines[k].strip()) for k in _ends(lines, edges)} - {None}
+        counts.update(n - i for n in numbers)
+    return {offset for offset, n in counts.items() if n >= EDGE_MIN_PAGES}
+
+
+def check_page_numbers(pages: list[str]) -> tuple[int, list[str]]:
+    """(bare-number lines kept, problems) for one paper's pages.  The
+    headers/footers rule may drop one bare number per page, and only one that
+    follows a page sequence (number - page index) shared by EDGE_MIN_PAGES
+    pages; anything else it drops is a scale point, answer option or year
+    (the Likert points and 2018 / 2019 options of 125_1.pdf)."""
+    dropped = []
+    out     = condense_pages(pages, dropped=dropped)
+    kept    = sum(1 for p in out for l in p.splitlines() if _page_number(l.strip()) is not None)
+    lost    = [(i, _page_number(line.strip())) for i, rule, line in dropped
+               if rule == "headers/footers" and _page_number(line.strip()) is not None]
+    per_page = Counter(i for i, _ in lost)
+    runs     = Counter(n - i for i, n in lost)
+    problems = [f"page {i + 1}: {n} bare numbers removed" for i, n in sorted(per_page.items()) if n > 1]
+    problems += [f"page {i + 1}: bare number {n} removed off the page sequence"
+                 for i, n in lost if per_page[i] == 1 and runs[n - i] < EDGE_MIN_PAGES]
+    return kept, problems
+
+
+def _citation_share(lines: list[str]) -> float:
+    lines = [l for l in lines if l.strip()]
+    return sum(1 for l in lines if _CITATION.search(l)) / len(lines) if lines else 0.0
+
+
+def condense_pages(pages: list[str], removed: dict | None = None,
+                   dropped: list | None = None) -> list[str]:
+    """Pages of one paper with the rule-based cuts applied ("" where nothing
+    is left).  Characters removed per rule are added to `removed`, and each
+    removed line to `dropped` as (page index, rule, line)."""
+    removed = removed if removed is not None else {}
+    split   = [p.splitlines() for p in pages]
+    edges   = _repeated_edges(split)
+    offsets = _page_offsets(split, edges)
+    mode, left = None, 0               # "references" / "backmatter", lines left in back matter
+    authors = True                     # first page, before the abstract / first heading
+
+    def drop(rule: str, line: str) -> None:
+        removed[rule] = removed.get(rule, 0) + len(line) + 1
+        if dropped is not None:
+            dropped.append((i, rule, line))
+
+    out = []
+    for i, lines in enumerate(split):
+        if mode == "references" and _citation_share(lines) < REFERENCE_PAGE_SHARE:
+            mode = None
+        kept = []
+        ends = _ends(lines, edges)
+        for k, line in enumerate(lines):
+            s = line.strip()
+            if not s:
+                continue
+            # A bare number is only a page number where the sequence says so;
+            # elsewhere it is a scale point or an answer option ("2", "2018")
+            number = _page_number(s)
+            if number is not None:
+                if k in ends and number - i in offsets:
+                    drop("headers/footers", line)
+                    continue
+            elif (k < EDGE_LINES or k >= len(lines) - EDGE_LINES) and _edge_key(s) in edges:
+                drop("headers/footers", line)
+                continue
+            if i == 0 and authors and (is_heading(s) or _key(s[:12]).startswith("abstract")):
+                authors = False
+
+            if mode == "references":
+                if _is_appendix(s) or _CAPTION.match(s):
+                    mode = None
+                else:
+                    drop("references", line)
+                    continue
+            elif mode == "backmatter":
+                if is_heading(s) or left == 0:
+                    mode = None
+                elif len(_NUMERIC.findall(s)) < 2 and not (i == 0 and _PROSE.search(s)):
+                    # table rows beside it in two columns stay, and the abstract beside a
+                    # first-page "Funding information" sidebar
+                    left -= 1
+                    drop("back matter", line)
+                    continue
+
+            key = _key(s) if len(s) <= MAX_HEADING else ""
+            if key in _REFERENCE_NAMES:
+                mode = "references"
+                drop("references", line)
+                continue
+            if key in _BACKMATTER_NAMES:
+                mode, left = "backmatter", MAX_BACKMATTER_LINES
+                drop("back matter", line)
+                continue
+
+            if _CONTACT.match(s):
+                drop("emails", line)
+                continue
+            if _EMAIL.search(s):
+                stripped = _EMAIL.sub("", line)
+                drop("emails", line[:len(line) - len(stripped)])
+                if not re.search(r"\w", stripped):
+                    continue
+                line = stripped
+            if _METADATA.match(s) or (i == 0 and _FRONT_META.match(s)):
+                drop("front matter", line)
+                continue
+            if i == 0 and authors and len(s) <= MAX_FRONT_LINE and _AFFILIATION.search(s) \
+                    and not _PROSE.search(s) and not re.search(r"\d\.\d", s):
+                drop("front matter", line)
+                continue
+            kept.append(line)
+        out.append("\n".join(kept))
+    return out
+
+
+def _pieces(text: str, max_chars: int, seps: tuple[str, ...] = ("\n\n", "\n")) -> list[str]:
+    """`text` cut after paragraph breaks, then line breaks, into pieces of at
+    most max_chars (a longer line is cut anywhere)."""
+    if len(text) <= max_chars:
+        return [text]
+    if not seps:
+        return [text[i:i + max_chars] for i in range(0, len(text), max_chars)]
+    parts = re.split(f"(?<={re.escape(seps[0])})", text)
+    return [q for part in parts if part for q in _pieces(part, max_chars, seps[1:])]
+
+
+def split_sections(text: str, max_chars: int) -> list[str]:
+    """`text` in order, in chunks of at most max_chars that start at a section
+    heading or "=== file ===" header where one fits, else at a paragraph or
+    line break.  "\n\n".join() of the chunks gives the text back, up to
+    whitespace at the cuts."""
+    blocks, cur = [], []
+    for line in text.splitlines(keepends=True):
+        if cur and (line.startswith("=== ") or is_heading(line)):
+            blocks.append("".join(cur))
+            cur = []
+        cur.append(line)
+    if cur:
+        blocks.append("".join(cur))
+
+    chunks, cur = [], ""
+    for block in blocks:
+        for piece in _pieces(block, max_chars):
+            if cur and len(cur) + len(piece) > max_chars:
+                chunks.append(cur)
+                cur = ""
+            cur += piece
+    chunks.append(cur)
+    return [c.strip() for c in chunks if c.strip()]
+
+
+def condense_pdfs(paths: list[Path], max_chars: int | None = None, rank: bool = False,
+                  backend: str = DEFAULT_BACKEND) -> dict:
+    """Condensed text of one or more PDFs, merged under "=== name ===" headers
+    like extract_pdf_text() and cut to max_chars afterwards (by rank_score()
+    with rank=True), so the budget holds more of what matters:
+
+        {"text", "original_chars", "offline_chars", "removed": {rule: chars}}
+
+    original_chars / offline_chars are the merged lengths before and after the
+    cuts, both before the max_chars limit."""
+    docs, removed, original = [], {}, 0
+    for path in paths:
+        try:
+            pages = pdf_pages(path, backend)
+        except Exception as e:
+            pages = [f"[PDF extraction failed for {path.name}: {e}]"]
+        original += len(path.name) + 9 + sum(len(p) + 2 for p in pages if p)
+        docs.append((path.name, condense_pages(pages, removed)))
+
+    parts  = [f"=== {name} ===\n" + "\n\n".join(p for p in pages if p)
+              for name, pages in docs if any(pages)]
+    merged = "\n\n".join(parts)
+    n      = len(merged)
+    if max_chars is not None and n > max_chars:
+        if rank:
+            merged = merge_ranked(docs, max_chars)
+        else:
+            merged = merged[:max_chars] + "\n[... truncated ...]"
+    return {"text": merged, "original_chars": original, "offline_chars": n,
+            "removed": removed}
+
+
+async def condense_pdfs_async(paths: list[Path], max_chars: int | None = None,
+                              pool: ProcessPoolExecutor | None = None, rank: bool = False,
+                              backend: str = DEFAULT_BACKEND) -> dict:
+    """condense_pdfs() run in `pool` (see pdf_text.pdf_pool())."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(pool, condense_pdfs, list(paths), max_chars, rank, backend)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("paths", nargs="+", type=Path, help="PDF files or directories")
+    parser.add_argument("--show", action="store_true", help="Print the condensed text")
+    parser.add_argument("--check", action="store_true",
+                        help="Fail if a bare number other than a page number was removed")
+    args = parser.parse_args()
+
+    pdfs = []
+    for p in args.paths:
+        pdfs.extend(sorted(p.rglob("*.pdf")) if p.is_dir() else [p])
+    if not pdfs:
+        print("No PDFs found")
+        sys.exit(1)
+
+    total_orig = total_cond = failed = 0
+    for path in pdfs:
+        out = condense_pdfs([path])
+        total_orig += out["original_chars"]
+        total_cond += out["offline_chars"]
+        ratio = out["offline_chars"] / max(out["original_chars"], 1)
+        cuts  = ", ".join(f"{rule} {n:,}" for rule, n in sorted(out["removed"].items()))
+        print(f"  {path.name:<24} {out['original_chars']:>8,} → {out['offline_chars']:>8,} chars  "
+              f"({ratio:.0%})  {cuts}")
+        if args.show:
+            print(out["text"])
+        if args.check:
+            kept, problems = check_page_numbers(pdf_pages(path))
+            print(f"    bare numbers kept: {kept}" + "".join(f"\n    ✗ {p}" for p in problems))
+            failed += bool(problems)
+    print(f"{len(pdfs)} PDF(s): {total_orig:,} → {total_cond:,} chars "
+          f"({total_cond / max(total_orig, 1):.0%})")
+    if failed:
+        print(f"{failed} PDF(s) lost bare numbers that are not page numbers")
+        sys.exit(1)
@@ -0,0 +1,149 @@
+"""
+paper_index.py  —  One-pass index of the study PDFs under Data/Papers/
+
+find_pdfs(seq_id) used to walk PAPERS_ROOT.rglob("*.pdf") once per study (and
+discover_all_seq_ids() once more), so startup grew with studies × files.  The
+index lists the tree once per run and maps seq_id → files:
+
+    Data/Papers/{person}/{seq_id}.pdf          primary paper
+    Data/Papers/{person}/{seq_id}_{N}.pdf      further papers for the study (all merged)
+    Data/Papers/{person}/{seq_id}_supplement.pdf   indexed, but not a primary PDF
+
+It is saved next to the other caches with each file's size, mtime and sha256:
+
+    Data/Caches/paper_index.json
+
+so only new or modified PDFs are hashed on the next run.  A byte-identical
+copy of a paper filed under more than one person folder is returned once by
+pdfs(seq_id), the first by path, so the same text is not sent (and billed)
+twice.  Files that only share a name are different documents (Alex/108.pdf is
+the working paper, Kaden/108.pdf the published article) and are both kept.
+
+    from paper_index import PaperIndex
+    papers = PaperIndex.load(PAPERS_ROOT)
+    papers.pdfs(108)          # [.../Alex/108.pdf, .../Kaden/108.pdf]
+    papers.seq_ids()          # every seq_id with a PDF, as discover_all_seq_ids()
+
+    python paper_index.py ../Data/Papers               # summary + duplicate copies
+    python paper_index.py ../Data/Papers --seq 108
+"""
+
+import argparse, hashlib, json, os, re, sys
+from pathlib import Path
+
+INDEX_NAME = "paper_index.json"
+
+_SEQ_RE = re.compile(r"^(\d+)")
+
+
+def _sha256(path: Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+class PaperIndex:
+    def __init__(self, root: Path):
+        self.root  = Path(root)
+        self.files: dict[str, dict] = {}   # path relative to root → {size, mtime_ns, sha256}
+
+    @classmethod
+    def load(cls, root: Path, index_file: Path | None = None) -> "PaperIndex":
+        """Index of root, refreshed against the tree (new / changed files hashed,
+        removed files dropped) and saved if anything changed."""
+        root       = Path(root)
+        index_file = index_file or root.parent / "Caches" / INDEX_NAME
+        try:
+            saved = json.loads(index_file.read_text()).get("files", {})
+        except (FileNotFoundError, json.JSONDecodeError):
+            saved = {}
+
+        index   = cls(root)
+        changed = False
+        if root.exists():
+            for dirpath, dirnames, filenames in os.walk(root):
+                dirnames.sort()
+                for name in sorted(filenames):
+                    if not name.endswith(".pdf"):
+                        continue
+                    path = Path(dirpath) / name
+                    rel  = path.relative_to(root).as_posix()
+                    st   = path.stat()
+                    old  = saved.get(rel)
+                    if old and old["size"] == st.st_size and old["mtime_ns"] == st.st_mtime_ns:
+                        index.files[rel] = old
+                    else:
+                        index.files[rel] = {"size": st.st_size, "mtime_ns": st.st_mtime_ns,
+                                            "sha256": _sha256(path)}
+                        changed = True
+        if changed or saved.keys() != index.files.keys():
+            index_file.parent.mkdir(parents=True, exist_ok=True)
+            index_file.write_text(json.dumps({"root": str(root), "files": index.files},
+                                             indent=1) + "\n")
+        return index
+
+    def seq_ids(self) -> list[int]:
+        """Every seq_id with a PDF (supplements included), sorted."""
+        seen = set()
+        for rel in self.files:
+            m = _SEQ_RE.match(Path(rel).stem)
+            if m:
+                seen.add(int(m.group(1)))
+        return sorted(seen)
+
+    def pdfs(self, seq_id: int) -> list[Path]:
+        """Primary PDFs for a study ({seq_id}.pdf, {seq_id}_{N}.pdf; no supplements),
+        sorted by path.  Of several byte-identical copies only the first is
+        kept; files with the same name but different content (a working-paper
+        and a published version) are both kept."""
+        found, hashes = [], set()
+        for rel in sorted(self.files):
+            stem = Path(rel).stem
+            if stem != str(seq_id) and not re.fullmatch(rf"{seq_id}_\d+", stem):
+                continue
+            sha = self.files[rel]["sha256"]
+            if sha in hashes:
+                continue
+            hashes.add(sha)
+            found.append(self.root / rel)
+        return found
+
+    def duplicates(self) -> list[tuple[str, list[Path]]]:
+        """("identical", paths) for files with the same content and ("same name",
+        paths) for one file name filed under several folders; paths sorted."""
+        by_hash: dict[str, list[str]] = {}
+        by_name: dict[str, list[str]] = {}
+        for rel in sorted(self.files):
+            by_hash.setdefault(self.files[rel]["sha256"], []).append(rel)
+            by_name.setdefault(Path(rel).name, []).append(rel)
+        groups = [("identical", rels) for rels in by_hash.values() if len(rels) > 1]
+        groups += [("same name", rels) for rels in by_name.values()
+                   if len(rels) > 1 and len({self.files[r]["sha256"] for r in rels}) > 1]
+        return [(kind, [self.root / r for r in rels]) for kind, rels in groups]
+
+    def report_duplicates(self) -> None:
+        for kind, group in self.duplicates():
+            rels = [p.relative_to(self.root).as_posix() for p in group]
+            use  = rels[0] if kind == "identical" else "all (different content)"
+            print(f"  [papers] {kind}: {', '.join(rels)} — using {use}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("root", type=Path, help="Papers directory (e.g. ../Data/Papers)")
+    parser.add_argument("--seq", type=int, default=None, help="List the PDFs used for this seq_id")
+    args = parser.parse_args()
+
+    if not args.root.is_dir():
+        print(f"Not a directory: {args.root}")
+        sys.exit(1)
+    papers = PaperIndex.load(args.root)
+    if args.seq is not None:
+        for p in papers.pdfs(args.seq):
+            print(p)
+        sys.exit(0)
+    size = sum(f["size"] for f in papers.files.values())
+    print(f"{len(papers.files)} PDFs, {size / 1e6:.1f} MB, {len(papers.seq_ids())} seq_ids")
+    papers.report_duplicates()
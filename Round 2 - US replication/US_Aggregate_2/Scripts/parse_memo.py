@@ -0,0 +1,61 @@
+"""
+parse_memo.py  —  Shared bounded LRU memo for response parsers
+
+Simulated responses are extremely repetitive ("5", "YES", "No."): a 7k-record
+unpack contains ~130 distinct response texts.  Every parser used by the
+pipeline normalises its input with text.strip() first, so parse results are
+memoised on (parser, stripped text) and repeated responses become a single
+dictionary lookup.
+
+One process-wide memo is shared by 02_simulate.py, 02b_simulate_178_patch.py,
+03_unpack_batches.py and US_Microdata/.../simulate_experiments.py:
+
+    from parse_memo import memoized, memo_stats_line
+    parser = memoized(resolve_parser(fmt, lo, hi))
+    value  = parser(text)
+    print(memo_stats_line())
+"""
+
+import functools
+
+MEMO_MAXSIZE = 100_000   # entries; (parser, text) keys are small
+
+
+@functools.lru_cache(maxsize=MEMO_MAXSIZE)
+def _parse_cached(parser, text: str):
+    return parser(text)
+
+
+def parse(parser, text: str):
+    """parser(text), memoised on (parser, text.strip())."""
+    return _parse_cached(parser, text.strip())
+
+
+def memoized(parser):
+    """Return `parser` fronted by the shared memo (same call signature)."""
+    if isinstance(parser, functools.partial) and parser.func is parse:
+        return parser
+    return functools.partial(parse, parser)
+
+
+def memo_stats() -> dict:
+    info    = _parse_cached.cache_info()
+    lookups = info.hits + info.misses
+    return {
+        "lookups":  lookups,
+        "hits":     info.hits,
+        "misses":   info.misses,
+        "size":     info.currsize,
+        "maxsize":  info.maxsize,
+        "hit_rate": info.hits / lookups if lookups else 0.0,
+    }
+
+
+def memo_stats_line() -> str:
+    s = memo_stats()
+    return (f"Parse memo: {s['lookups']:,} lookups  {s['hits']:,} hits "
+            f"({s['hit_rate']:.1%})  {s['size']:,}/{s['maxsize']:,} entries")
+
+
+def memo_clear() -> None:
+    _parse_cached.cache_clear()
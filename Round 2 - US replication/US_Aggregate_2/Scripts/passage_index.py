@@ -0,0 +1,185 @@
+"""
+passage_index.py  —  BM25 passage retrieval over one paper, for pass 2 of 01
+
+Pass 2 of 01_extract_study_data.py needs the parts of a paper that report
+results for the arms and outcomes pass 1 found, not the whole 90k characters.
+A paper is cut into passages (paragraphs, split at headings and every ~1,200
+characters) plus one passage per pdf_tables.py table block, and scored for a
+query made of the design's arm labels, control label and outcome names:
+
+    BM25        term frequency × idf, normalised by passage length
+    statistics  + STAT_WEIGHT per "M =", "SD =", "n =", "β", "(0.12)", "0.34**"
+                pattern (up to STAT_CAP)
+    tables      + TABLE_WEIGHT for table blocks and passages citing "Table N"
+
+The best passages are kept up to a character budget and returned in paper
+order, "[...]" marking the gaps, with the table blocks last.
+
+Terms are counted in the passage text with spaces and punctuation removed, so
+they match where pdfminer glued the words of a line together
+("Theeffectofthenudgeontakeup"), and multi-word labels also count as one
+phrase ("Take-up" → "takeup").  Terms shorter than SHORT_TERM letters only
+count at the start of a word ("lab" in "lab session", not in "label").  No
+index is stored: building one for a paper takes milliseconds.
+
+    from passage_index import PassageIndex
+    index   = PassageIndex.build(paper_text, tables_text)
+    context = index.retrieve(["Reminder letter", "Control", "Take-up"], max_chars=24_000)
+
+    python passage_index.py ../Data/Papers/Kaden/12.pdf --query "summer reading" "reading comprehension"
+"""
+
+import argparse, math, re, sys
+from pathlib import Path
+
+from paper_condenser import is_heading
+
+PASSAGE_CHARS = 1_200   # passages are cut at the line that passes this
+K1, B         = 1.5, 0.75
+STAT_WEIGHT   = 0.5     # per statistics pattern in the passage ...
+STAT_CAP      = 4       # ... counted up to this many
+TABLE_WEIGHT  = 2.0
+MIN_TERM      = 3       # shorter query words ("of", "no") are dropped
+SHORT_TERM    = 5       # shorter terms must start a word
+
+_STATS     = re.compile(r"\b(?:M|SD|SE|N|n|p|t|F|d|b|OR|CI)\s*[=<>]|β|χ2|χ²|"
+                        r"\(\d*\.\d+\)|\d\.\d+\*+")
+_TABLE_REF = re.compile(r"\bTable\s*[A-Z]?\d+", re.I)
+_TABLE     = re.compile(r"^\[.+ p\.\d+ table \d+\]")          # pdf_tables.table_block() header
+_STOPWORDS = {"the", "and", "for", "with", "from", "that", "this", "condition", "group",
+              "arm", "treatment", "baseline"}
+
+
+def _squash(text: str) -> str:
+    return re.sub(r"[\W_]+", "", text.lower())
+
+
+def query_terms(phrases: list[str]) -> list[str]:
+    """Words of the phrases (≥ MIN_TERM letters, no stopwords), plus each
+    multi-word phrase squashed into one term."""
+    terms = []
+    for phrase in phrases:
+        words  = re.findall(r"[a-z0-9]+", (phrase or "").lower())
+        terms += [w for w in words if len(w) >= MIN_TERM and w not in _STOPWORDS]
+        if len(words) > 1:
+            terms.append("".join(words))
+    return list(dict.fromkeys(terms))
+
+
+def split_passages(text: str, size: int = PASSAGE_CHARS) -> list[str]:
+    """Paragraphs of `text`, cut at section headings and after `size` chars."""
+    passages = []
+    for para in re.split(r"\n\s*\n", text):
+        cur, n = [], 0
+        for line in para.splitlines():
+            if cur and (n > size or is_heading(line)):
+                passages.append("\n".join(cur))
+                cur, n = [], 0
+            cur.append(line)
+            n += len(line) + 1
+        if cur:
+            passages.append("\n".join(cur))
+    return [p for p in passages if p.strip() and not p.startswith("=== ")]
+
+
+def split_tables(tables_text: str) -> list[str]:
+    """The blocks of pdf_tables.extract_tables_text(), without file headers."""
+    blocks = []
+    for block in re.split(r"\n\n(?=\[|=== )", tables_text):
+        block = re.sub(r"^=== .+ ===\n?", "", block)
+        if _TABLE.match(block):
+            blocks.append(block)
+    return blocks
+
+
+class PassageIndex:
+    def __init__(self, passages: list[str], tables: list[str] = ()):
+        self.passages = list(passages) + list(tables)
+        self.is_table = [False] * len(passages) + [True] * len(tables)
+        self._text    = [_squash(p) for p in self.passages]
+        self._lower   = [p.lower() for p in self.passages]
+        self._avg     = sum(len(t) for t in self._text) / max(len(self._text), 1)
+
+    @classmethod
+    def build(cls, text: str, tables_text: str = "") -> "PassageIndex":
+        return cls(split_passages(text), split_tables(tables_text))
+
+    def __len__(self) -> int:
+        return len(self.passages)
+
+    def bm25(self, terms: list[str]) -> list[float]:
+        n   = len(self.passages)
+        out = [0.0] * n
+        for term in terms:
+            if len(term) < SHORT_TERM:
+                start = re.compile(rf"(?<![a-z0-9]){re.escape(term)}")
+                tfs   = [len(start.findall(t)) for t in self._lower]
+            else:
+                tfs   = [t.count(term) for t in self._text]
+            df  = sum(1 for tf in tfs if tf)
+            if not df:
+                continue
+            idf = math.log(1 + (n - df + 0.5) / (df + 0.5))
+            for i, tf in enumerate(tfs):
+                if tf:
+                    norm    = K1 * (1 - B + B * len(self._text[i]) / max(self._avg, 1))
+                    out[i] += idf * tf * (K1 + 1) / (tf + norm)
+        return out
+
+    def bonus(self, i: int) -> float:
+        passage = self.passages[i]
+        table   = self.is_table[i] or bool(_TABLE_REF.search(passage))
+        return STAT_WEIGHT * min(len(_STATS.findall(passage)), STAT_CAP) + TABLE_WEIGHT * table
+
+    def retrieve(self, phrases: list[str], max_chars: int) -> str:
+        """The best-scoring passages for `phrases` that fit in max_chars, in
+        paper order; "" if no term of the phrases occurs in the paper."""
+        bm25 = self.bm25(query_terms(phrases))
+        if not any(bm25):
+            return ""
+        scores = [score + self.bonus(i) for i, score in enumerate(bm25)]
+        chosen, used = [], 0
+        for i in sorted(range(len(self.passages)), key=lambda i: -scores[i]):
+            if scores[i] <= 0:
+                break
+            size = len(self.passages[i]) + 9       # + "\n\n" and a possible "[...]\n\n"
+            if used + size <= max_chars:
+                chosen.append(i)
+                used += size
+
+        parts, prev = [], -1
+        for i in sorted(chosen):
+            if i != prev + 1 and not self.is_table[i]:
+                parts.append("[...]")
+            parts.append(self.passages[i])
+            prev = i
+        return "\n\n".join(parts)
+
+
+if __name__ == "__main__":
+    from pdf_tables import extract_tables_text
+    from pdf_text import extract_pdf_text
+
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("pdfs", nargs="+", type=Path, help="The PDFs of one paper")
+    parser.add_argument("--query", nargs="+", required=True,
+                        help="Arm labels / outcome names to retrieve passages for")
+    parser.add_argument("--max-chars", type=int, default=24_000)
+    parser.add_argument("--show", action="store_true", help="Print the retrieved text")
+    args = parser.parse_args()
+
+    missing = [p for p in args.pdfs if not p.exists()]
+    if missing:
+        print(f"Not found: {', '.join(map(str, missing))}")
+        sys.exit(1)
+
+    text    = extract_pdf_text(args.pdfs)
+    index   = PassageIndex.build(text, extract_tables_text(args.pdfs))
+    context = index.retrieve(args.query, args.max_chars)
+    print(f"{len(index)} passages ({sum(index.is_table)} tables), terms: "
+          f"{', '.join(query_terms(args.query))}")
+    print(f"retrieved {len(context):,} of {len(text):,} chars "
+          f"({len(context) / max(len(text), 1):.0%})")
+    if args.show:
+        print(context)
@@ -0,0 +1,293 @@
+"""
+pdf_tables.py  —  Results tables as compact TSV blocks for pass 2
+
+Pass 2 of 01_extract_study_data.py looks up treatment and control means in the
+paper's results tables, but flattened page text loses the table layout and
+spends tokens on prose the pass does not need.  This module finds the tables on
+each page and renders them as tab-separated blocks with their page, caption and
+notes:
+
+    [119_2.pdf p.11 table 1] TABLE 2 Summary statistics for demographic variables
+    Online	In‐person	Difference
+    Demographic	Mean	deviation	Mean	deviation	Mean	error
+    Age	36.14	10.81	21.48	2.34	14.66	0.32***
+    ...
+    Note: For age, the significance of differences is calculated using a t test ...
+
+Two detectors run on every page:
+
+    ruled     pdfplumber's table finder (page.find_tables()), for tables drawn
+              with cell borders; kept if at least MIN_ROWS × 2 with numeric cells
+    unruled   the usual economics layout (horizontal rules only, or none):
+              words are grouped into lines and split into cells at gaps wider
+              than the font height; a run of lines with several numeric or
+              short cells is a table if it follows a "Table N" caption or has
+              at least MIN_UNCAPTIONED_ROWS rows of numbers (figure axes and
+              display equations do not)
+
+Tables are cached like page text (pdf_text.py), keyed by the PDF's content hash:
+
+    pdf_tables   "{sha256}:{TABLES_VERSION}" → [{"page", "caption", "rows", "notes"}, ...]
+
+    from pdf_tables import extract_tables_text
+    tables = extract_tables_text(find_pdfs(seq_id))        # "" if none found
+
+    python pdf_tables.py ../Data/Papers/Kaden/119_2.pdf    # print the blocks
+    python pdf_tables.py ../Data/Papers --stats            # tables and size vs page text
+"""
+
+import argparse, asyncio, re, sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from pdf_text import _cache, _pkg_version, file_hash, pdf_pages
+
+TABLES_NS      = "pdf_tables"
+TABLES_REV     = 1
+TABLES_VERSION = f"tables-pdfplumber-{_pkg_version('pdfplumber')}.r{TABLES_REV}"
+
+CELL_GAP             = 0.8   # × font height: a wider gap between words starts a new cell
+MAX_GAP_LINES        = 2     # non-table lines (wrapped row labels, panel titles) inside a table
+MIN_ROWS             = 3
+MIN_UNCAPTIONED_ROWS = 6
+MAX_CELL_CHARS       = 60    # longer cells are prose (or the other text column)
+CAPTION_LOOKBACK     = 4     # lines above a table searched for its caption
+MAX_NOTES_CHARS      = 600
+
+_CAPTION = re.compile(r"^(?:Table|TABLE)\s*[A-Z]?\d+[A-Za-z]?(?:[.:—–-]|\s|$)")
+_NOTES   = re.compile(r"^(?:Notes?|Sources?)\s*[:.]", re.I)
+_NUMERIC = re.compile(r"^[(\[]?[-−–]?[$€£]?\d[\d,]*(?:\.\d+)?%?[)\]]?\**$|^[(\[]\d+[)\]]$")
+
+
+def _is_numeric(cell: str) -> bool:
+    return bool(_NUMERIC.match(cell.replace(" ", "")))
+
+
+def _clean(cell) -> str:
+    return " ".join(str(cell or "").split())
+
+
+# ---------------------------------------------------------------------------
+# Detection
+# ---------------------------------------------------------------------------
+
+def _lines(page, skip: list[tuple]) -> list[dict]:
+    """Upright words grouped into lines, each split into cells at wide gaps.
+    Words inside a `skip` bbox (a ruled table) are left out."""
+    words = [w for w in page.extract_words(x_tolerance=1.5, y_tolerance=3)
+             if w.get("upright", True)
+             and not any(x0 <= w["x0"] and w["x1"] <= x1 and top <= w["top"] and w["bottom"] <= bottom
+                         for x0, top, x1, bottom in skip)]
+    # A word joins the line its vertical midpoint falls in, so sub- and
+    # superscripts, raised minus signs and tall parentheses stay on their row
+    rows: list[list[dict]] = []
+    for w in sorted(words, key=lambda w: (w["top"], w["x0"])):
+        mid = (w["top"] + w["bottom"]) / 2
+        if rows and rows[-1][0]["top"] <= mid <= rows[-1][0]["bottom"]:
+            rows[-1].append(w)
+        else:
+            rows.append([w])
+
+    lines = []
+    for ws in rows:
+        ws.sort(key=lambda w: w["x0"])
+        height = max(w["bottom"] - w["top"] for w in ws)
+        cells, cell = [], [ws[0]["text"]]
+        for a, b in zip(ws, ws[1:]):
+            if b["x0"] - a["x1"] > CELL_GAP * height:
+                cells.append(" ".join(cell))
+                cell = []
+            cell.append(b["text"])
+        cells.append(" ".join(cell))
+        lines.append({"top": ws[0]["top"], "cells": cells})
+    return lines
+
+
+def _is_row(cells: list[str]) -> bool:
+    """A line that looks like a table row: two or more numeric cells, or three
+    or more short ones (column headers), and no run of prose."""
+    if any(len(c) > MAX_CELL_CHARS for c in cells):
+        return False
+    if sum(_is_numeric(c) for c in cells) >= 2:
+        return True
+    return len(cells) >= 3 and all(len(c) <= 25 for c in cells)
+
+
+def _caption_before(lines: list[dict], start: int) -> str:
+    """Caption of a table starting at lines[start]: from a "Table N" line at
+    most CAPTION_LOOKBACK lines up to the table, or ""."""
+    for i in range(start - 1, max(start - 1 - CAPTION_LOOKBACK, -1), -1):
+        if _CAPTION.match(lines[i]["cells"][0]):
+            return " ".join(" ".join(l["cells"]) for l in lines[i:start])
+    return ""
+
+
+def _notes_after(lines: list[dict], end: int) -> str:
+    """Notes / Source paragraph right after a table (lines[end:]), capped."""
+    if end >= len(lines) or not _NOTES.match(lines[end]["cells"][0]):
+        return ""
+    text = ""
+    for line in lines[end:]:
+        if text and (_is_row(line["cells"]) or _CAPTION.match(line["cells"][0])):
+            break
+        text = f"{text} {' '.join(line['cells'])}".strip()
+        if len(text) >= MAX_NOTES_CHARS:
+            return text[:MAX_NOTES_CHARS] + " …"
+    return text
+
+
+def _numeric_block(rows: list[list[str]]) -> bool:
+    """An uncaptioned table (e.g. the continuation of one from the previous
+    page) needs MIN_UNCAPTIONED_ROWS rows of numbers, at least a third of its
+    lines (row labels can wrap), which figure axes and equations do not have."""
+    numeric = sum(1 for r in rows if sum(_is_numeric(c) for c in r) >= 2)
+    return numeric >= MIN_UNCAPTIONED_ROWS and numeric >= len(rows) / 3
+
+
+def _unruled_tables(lines: list[dict]) -> list[dict]:
+    tables, i = [], 0
+    while i < len(lines):
+        if not _is_row(lines[i]["cells"]):
+            i += 1
+            continue
+        start, end, n_rows, gap = i, i + 1, 1, 0
+        for j in range(i + 1, len(lines)):
+            if _is_row(lines[j]["cells"]):
+                end, n_rows, gap = j + 1, n_rows + 1, 0
+            elif _CAPTION.match(lines[j]["cells"][0]) or _NOTES.match(lines[j]["cells"][0]):
+                break
+            else:
+                gap += 1
+                if gap > MAX_GAP_LINES:
+                    break
+        caption    = _caption_before(lines, start)
+        rows       = [l["cells"] for l in lines[start:end]]
+        if n_rows >= MIN_ROWS and (caption or _numeric_block(rows)):
+            tables.append({"top": lines[start]["top"], "caption": caption, "rows": rows,
+                           "notes": _notes_after(lines, end)})
+        i = end
+    return tables
+
+
+def _ruled_tables(page) -> tuple[list[dict], list[tuple]]:
+    """Bordered tables from pdfplumber's finder, and their bboxes."""
+    tables, boxes = [], []
+    for found in page.find_tables():
+        rows = [[_clean(c) for c in row] for row in found.extract()]
+        rows = [r for r in rows if any(r)]
+        if len(rows) < MIN_ROWS or max(len(r) for r in rows) < 2 \
+                or sum(_is_numeric(c) for r in rows for c in r) < 2:
+            continue
+        tables.append({"top": found.bbox[1], "rows": rows})
+        boxes.append(found.bbox)
+    return tables, boxes
+
+
+def page_tables(page) -> list[dict]:
+    """Tables on one pdfplumber page, top to bottom:
+    [{"caption": str, "rows": [[cell, ...], ...], "notes": str}]"""
+    ruled, boxes = _ruled_tables(page)
+    lines  = _lines(page, boxes)
+    tables = _unruled_tables(lines)
+    for t in ruled:
+        above = [i for i, l in enumerate(lines) if l["top"] < t["top"]]
+        start = above[-1] + 1 if above else 0
+        below = [i for i, l in enumerate(lines) if l["top"] > t["top"]]
+        t["caption"] = _caption_before(lines, start)
+        t["notes"] = _notes_after(lines, below[0]) if below else ""
+        tables.append(t)
+    tables.sort(key=lambda t: t.pop("top"))
+    for t in tables:
+        while t["rows"] and t["rows"][-1] and not t["rows"][-1][-1]:
+            t["rows"][-1].pop()
+    return tables
+
+
+# ---------------------------------------------------------------------------
+# Cached per PDF
+# ---------------------------------------------------------------------------
+
+def pdf_tables(path: Path) -> list[dict]:
+    """Every table in a PDF, from the cache or detected (and cached) now:
+    [{"page": 1-based, "caption", "rows", "notes"}, ...]."""
+    path   = Path(path)
+    key    = f"{file_hash(path)}:{TABLES_VERSION}"
+    tables = _cache(TABLES_NS)
+    if key in tables:
+        return tables[key]
+
+    import pdfplumber
+    found = []
+    with pdfplumber.open(path) as pdf:
+        for n, page in enumerate(pdf.pages, 1):
+            found.extend({"page": n, **t} for t in page_tables(page))
+            page.close()
+    tables[key] = found
+    return found
+
+
+def table_block(name: str, k: int, table: dict) -> str:
+    head = f"[{name} p.{table['page']} table {k}]"
+    if table["caption"]:
+        head += f" {table['caption']}"
+    lines = [head] + ["\t".join(row) for row in table["rows"]]
+    if table["notes"]:
+        lines.append(table["notes"])
+    return "\n".join(lines)
+
+
+def extract_tables_text(paths: list[Path], max_chars: int | None = None) -> str:
+    """TSV blocks for every table in the PDFs, each file under an
+    "=== name ===" header as in extract_pdf_text(); "" if no table is found.
+    A file that cannot be read is skipped."""
+    parts = []
+    for path in paths:
+        try:
+            tables = pdf_tables(path)
+        except Exception as e:
+            print(f"  [tables] {path.name}: {e}")
+            continue
+        if tables:
+            parts.append(f"=== {path.name} ===\n" + "\n\n".join(
+                table_block(path.name, k, t) for k, t in enumerate(tables, 1)))
+    merged = "\n\n".join(parts)
+    if max_chars is not None and len(merged) > max_chars:
+        merged = merged[:max_chars] + "\n[... truncated ...]"
+    return merged
+
+
+async def extract_tables_text_async(paths: list[Path], max_chars: int | None = None,
+                                    pool: ProcessPoolExecutor | None = None) -> str:
+    """extract_tables_text() run in `pool` (see pdf_text.pdf_pool())."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(pool, extract_tables_text, list(paths), max_chars)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("paths", nargs="+", type=Path, help="PDF files or directories")
+    parser.add_argument("--stats", action="store_true",
+                        help="Only print tables found and TSV size vs page text per file")
+    args = parser.parse_args()
+
+    pdfs = []
+    for p in args.paths:
+        pdfs.extend(sorted(p.rglob("*.pdf")) if p.is_dir() else [p])
+    if not pdfs:
+        print("No PDFs found")
+        sys.exit(1)
+
+    for path in pdfs:
+        if not args.stats:
+            print(extract_tables_text([path]) or f"=== {path.name} ===\n(no tables)", end="\n\n")
+            continue
+        try:
+            tables = pdf_tables(path)
+            text   = sum(len(t) for t in pdf_pages(path))
+        except Exception as e:
+            print(f"  {path.name:<40} FAILED: {e}")
+            continue
+        tsv = len(extract_tables_text([path]))
+        print(f"  {path.name:<40} {len(tables):>3} tables  {tsv:>7,} chars  "
+              f"({tsv / max(text, 1):.0%} of {text:,} page text)")
@@ -0,0 +1,443 @@
+"""
+pdf_text.py  —  Cached PDF text extraction shared by the extraction stages
+
+Every stage that reads papers (00_preprocess_papers.py, 01_extract_study_data.py,
+the US_Aggregate/Scripts/Setup extractors, extract_yellow_instruments.py) used
+to run pdfplumber over every page on every invocation.  Page text is now cached
+in the shared SQLite cache (kv_cache.py), keyed by the PDF's content hash and
+the extractor version:
+
+    US_Aggregate_2/Data/Caches/cache.sqlite
+        pdf_text   "{sha256}:{extractor_version}" → {"file": name, "n_pages": N, "pages": [text, ...]}
+        pdf_hash   "{path}:{size}:{mtime_ns}"     → sha256
+
+so a renamed, moved or duplicated PDF is parsed once, an edited PDF is parsed
+again, and a repeat run over Data/Papers parses nothing (the pdf_hash entries
+also spare re-hashing files whose size and mtime are unchanged).
+extractor_version() includes the backend and its version; bump EXTRACTOR_REV
+when the per-page post-processing here changes.
+
+    from pdf_text import extract_pdf_text, pdf_pages
+    text  = extract_pdf_text(find_pdfs(seq_id), max_chars=MAX_PDF_CHARS)
+    pages = pdf_pages(path)                  # one string per page ("" if blank)
+
+Pages are parsed lazily (iter_pages): extract_pdf_text() stops once the budget
+is exceeded, so the appendix pages of a long paper that the truncation would
+discard are never parsed, and only the pages parsed so far are cached (a later
+call with a larger budget parses on from there).  With rank=True the budget is
+filled by rank_score() instead — methods, stimuli, results and tables before
+literature review, references last — and skipped pages are marked
+"[... pages 30–37 omitted ...]".
+
+Warm the cache (or check what is cached) from the shell:
+
+    python pdf_text.py ../Data/Papers
+    python pdf_text.py ../Data/Papers/Person1/12.pdf --show 3
+
+Text comes from one of several backends (BACKENDS).  pdfplumber is the
+reference and the default; pypdfium2 (PDFium) is several times faster, and
+PyMuPDF is used if installed.  Each backend has its own cache entries:
+
+    text = extract_pdf_text(paths, MAX_PDF_CHARS, backend="pypdfium2")
+
+bench_pdf_backends.py measures speed, memory and agreement with pdfplumber.
+
+The async stages (00, 01) parse in a process pool instead of on the event loop,
+so API calls already in flight keep running while a long paper is parsed:
+
+    with pdf_pool() as pool:                 # one worker per core
+        text = await extract_pdf_text_async(paths, MAX_PDF_CHARS, pool)
+"""
+
+import argparse, asyncio, hashlib, os, re, sys
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import closing
+from importlib.metadata import PackageNotFoundError, version
+from pathlib import Path
+
+from kv_cache import CACHE_NAME, KVCache
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+CACHE_DIR  = SCRIPT_DIR.parent / "Data" / "Caches"
+TEXT_NS    = "pdf_text"
+HASH_NS    = "pdf_hash"
+
+EXTRACTOR_REV = 1
+
+
+def _pkg_version(name: str) -> str:
+    try:
+        return version(name)
+    except PackageNotFoundError:
+        return "missing"
+
+
+# ---------------------------------------------------------------------------
+# Backends
+# ---------------------------------------------------------------------------
+
+class PdfBackend:
+    """One open PDF: len() pages, page_text(i) for 0 <= i < len().  Subclasses
+    import their library in __init__, so only the chosen backend is needed."""
+    name    = ""
+    package = ""                   # distribution name, for the version
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+
+    def __len__(self) -> int:
+        raise NotImplementedError
+
+    def page_text(self, i: int) -> str:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @classmethod
+    def available(cls) -> bool:
+        return _pkg_version(cls.package) != "missing"
+
+
+class PdfplumberBackend(PdfBackend):
+    """Reference: pdfminer layout analysis, the text every cached result was built on."""
+    name = package = "pdfplumber"
+
+    def __init__(self, path: Path):
+        import pdfplumber
+        super().__init__(path)
+        self._pdf = pdfplumber.open(self.path)
+
+    def __len__(self) -> int:
+        return len(self._pdf.pages)
+
+    def page_text(self, i: int) -> str:
+        page = self._pdf.pages[i]
+        text = page.extract_text() or ""
+        page.close()
+        return text
+
+    def close(self) -> None:
+        self._pdf.close()
+
+
+class PypdfiumBackend(PdfBackend):
+    """PDFium (Chrome's PDF engine) text in content order."""
+    name = package = "pypdfium2"
+
+    def __init__(self, path: Path):
+        import pypdfium2
+        super().__init__(path)
+        self._pdf = pypdfium2.PdfDocument(self.path)
+
+    def __len__(self) -> int:
+        return len(self._pdf)
+
+    def page_text(self, i: int) -> str:
+        page = self._pdf[i]
+        tp   = page.get_textpage()
+        text = tp.get_text_range()
+        tp.close()
+        page.close()
+        return _tidy(text)
+
+    def close(self) -> None:
+        self._pdf.close()
+
+
+class PymupdfBackend(PdfBackend):
+    """MuPDF text blocks in reading order."""
+    name = package = "pymupdf"
+
+    def __init__(self, path: Path):
+        import pymupdf
+        super().__init__(path)
+        self._pdf = pymupdf.open(self.path)
+
+    def __len__(self) -> int:
+        return self._pdf.page_count
+
+    def page_text(self, i: int) -> str:
+        return _tidy(self._pdf[i].get_text(sort=True))
+
+    def close(self) -> None:
+        self._pdf.close()
+
+
+_LINE_END = re.compile(r"[ \t]+(?=\n|$)")
+
+
+def _tidy(text: str) -> str:
+    """Line breaks, spacing and hyphenation as pdfplumber: CRLF and form feeds
+    become newlines, trailing spaces and blank edge lines go, and PDFium's
+    U+FFFE hyphenation marks (the word is already rejoined) are removed."""
+    text = text.replace("\r\n", "\n").replace("\r", "\n").replace("\f", "\n")
+    return _LINE_END.sub("", text.replace("\ufffe", "")).strip("\n")
+
+
+BACKENDS: dict[str, type[PdfBackend]] = {
+    b.name: b for b in (PdfplumberBackend, PypdfiumBackend, PymupdfBackend)
+}
+DEFAULT_BACKEND = "pdfplumber"
+
+
+def extractor_version(backend: str = DEFAULT_BACKEND) -> str:
+    """Cache-key suffix: backend, its package version and EXTRACTOR_REV."""
+    return f"{backend}-{_pkg_version(BACKENDS[backend].package)}.r{EXTRACTOR_REV}"
+
+
+# Keyed by pid as well: a forked pool worker must open its own connections, and
+# must not close the ones it inherited (that would drop the parent's WAL locks).
+_caches: dict[tuple[int, str], KVCache] = {}
+
+
+def _cache(namespace: str) -> KVCache:
+    key = (os.getpid(), namespace)
+    if key not in _caches:
+        _caches[key] = KVCache(CACHE_DIR / CACHE_NAME, namespace)
+    return _caches[key]
+
+
+def file_hash(path: Path) -> str:
+    """sha256 of the file's bytes, memoised by (path, size, mtime)."""
+    path = Path(path).resolve()
+    st   = path.stat()
+    memo = f"{path}:{st.st_size}:{st.st_mtime_ns}"
+    hashes = _cache(HASH_NS)
+    if memo in hashes:
+        return hashes[memo]
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    hashes[memo] = digest = h.hexdigest()
+    return digest
+
+
+def iter_pages(path: Path, backend: str = DEFAULT_BACKEND):
+    """Yield the text of each page of a PDF in order ("" for a blank page).
+    Cached pages come from the cache; the rest are parsed one at a time, so a
+    consumer that stops early leaves the remaining pages unparsed.  Parsed
+    pages are cached when the generator finishes or is closed, also on error.
+    Use contextlib.closing() when breaking out of the loop."""
+    path  = Path(path)
+    key   = f"{file_hash(path)}:{extractor_version(backend)}"
+    texts = _cache(TEXT_NS)
+    entry = texts.get(key) or {"file": path.name, "n_pages": None, "pages": []}
+    pages = entry["pages"]
+    yield from list(pages)
+    if entry.get("n_pages", len(pages)) == len(pages):     # complete
+        return
+
+    n_cached = len(pages)
+    try:
+        with BACKENDS[backend](path) as pdf:
+            entry["n_pages"] = len(pdf)
+            for i in range(n_cached, len(pdf)):
+                text = pdf.page_text(i)
+                pages.append(text)
+                yield text
+    finally:
+        if len(pages) > n_cached:
+            texts[key] = entry
+
+
+def pdf_pages(path: Path, backend: str = DEFAULT_BACKEND) -> list[str]:
+    """Text of every page of a PDF, from the cache or parsed (and cached) now.
+    Raises whatever the extractor raises for an unreadable file."""
+    return list(iter_pages(path, backend))
+
+
+# ---------------------------------------------------------------------------
+# Page ranking  (extract_pdf_text(..., rank=True))
+# ---------------------------------------------------------------------------
+
+# Design, stimulus and results vocabulary — the pages 01's two passes need
+_RANK_TERMS = re.compile(
+    r"\b(?:method|design|procedure|participants?|respondents?|subjects?|sample|"
+    r"treatments?|control|conditions?|arms?|experiment(?:al)?|survey|vignettes?|"
+    r"instructions?|questionnaire|please|scale|results?|estimates?|effects?|"
+    r"table|mean|std\.?|standard (?:deviation|error)|N\s*=)\b", re.I)
+_CITATION = re.compile(
+    r"\(\d{4}[a-z]?\)|\b(?:19|20)\d{2}[a-z]?\.\s|et al\.|doi\.org|https?://|"
+    r"\bJournal of\b|\bReview\b|\bpp\.\s*\d", re.I)
+_REFERENCES = re.compile(r"^\s*(?:references|bibliography|works cited|literature cited)\s*$",
+                         re.I | re.M)
+_NUMBER     = re.compile(r"-?\d+\.\d+")
+
+
+def rank_score(text: str) -> float:
+    """Higher for methods / stimulus / results / table pages, lowest for
+    reference lists.  Scores only order pages within one extraction."""
+    if not text.strip():
+        return float("-inf")
+    lines     = [l for l in text.splitlines() if l.strip()] or [""]
+    per_kchar = 1000 / max(len(text), 1)
+    score     = len(_RANK_TERMS.findall(text)) * per_kchar
+    score    += min(len(_NUMBER.findall(text)) * per_kchar, 20) / 2   # tables of estimates
+    cited     = sum(1 for l in lines if _CITATION.search(l)) / len(lines)
+    score    -= 20 * cited
+    if _REFERENCES.search(text):
+        score -= 50
+    return score
+
+
+def _ranked_text(paths: list[Path], max_chars: int, backend: str) -> str:
+    docs = []
+    for path in paths:
+        try:
+            pages = pdf_pages(path, backend)
+        except Exception as e:
+            pages = [f"[PDF extraction failed for {path.name}: {e}]"]
+        docs.append((path.name, pages))
+    return merge_ranked(docs, max_chars)
+
+
+def merge_ranked(docs: list[tuple[str, list[str]]], max_chars: int) -> str:
+    """Fill max_chars with the highest-ranked pages of (name, pages) docs (each
+    doc's first page always first), then emit them in document order under
+    "=== name ===" headers with omission markers."""
+    candidates = []
+    for i, (_, pages) in enumerate(docs):
+        nonblank = [j for j, text in enumerate(pages) if text]
+        for j in nonblank:
+            candidates.append((j != nonblank[0], -rank_score(pages[j]), i, j))
+
+    keep, opened, used = set(), set(), 0
+    for _, _, i, j in sorted(candidates):
+        cost = len(docs[i][1][j]) + 2
+        if i not in opened:
+            cost += len(docs[i][0]) + 9               # "=== name ===\n" header
+        if used + cost <= max_chars:
+            keep.add((i, j))
+            opened.add(i)
+            used += cost
+
+    parts = []
+    for i, (name, pages) in enumerate(docs):
+        out, gap = [], []
+        for j, text in enumerate(pages):
+            if not text:
+                continue
+            if (i, j) in keep:
+                if gap:
+                    out.append(_omitted(gap))
+                    gap = []
+                out.append(text)
+            else:
+                gap.append(j + 1)
+        if gap and out:
+            out.append(_omitted(gap))
+        if out:
+            parts.append(f"=== {name} ===\n" + "\n\n".join(out))
+    return "\n\n".join(parts)
+
+
+def _omitted(pages: list[int]) -> str:
+    span = f"page {pages[0]}" if len(pages) == 1 else f"pages {pages[0]}–{pages[-1]}"
+    return f"[... {span} omitted ...]"
+
+
+# ---------------------------------------------------------------------------
+# Merged text for the prompts
+# ---------------------------------------------------------------------------
+
+def extract_pdf_text(paths: list[Path], max_chars: int | None = None,
+                     rank: bool = False, backend: str = DEFAULT_BACKEND) -> str:
+    """Merge the text of one or more PDFs, each under an "=== name ===" header,
+    truncated to max_chars.  Pages are read lazily: parsing stops once the
+    budget is exceeded, so the pages past it are never parsed.
+
+    rank=True fills the budget with the highest-ranked pages instead of the
+    first ones (methods, stimuli, results and tables before literature review
+    and references; see rank_score); every page is read once for that.
+
+    backend names the text extractor (BACKENDS; pdfplumber by default)."""
+    if rank and max_chars is not None:
+        return _ranked_text(list(paths), max_chars, backend)
+
+    parts, done = [], 0            # done = len("\n\n".join(parts))
+    over = False
+    for path in paths:
+        head  = f"=== {path.name} ===\n"
+        pages = []
+        size  = done + (2 if parts else 0) + len(head) - 2
+        try:
+            with closing(iter_pages(path, backend)) as it:
+                for text in it:
+                    if not text:
+                        continue
+                    pages.append(text)
+                    size += len(text) + 2
+                    if max_chars is not None and size > max_chars:
+                        over = True
+                        break
+        except Exception as e:
+            pages.append(f"[PDF extraction failed for {path.name}: {e}]")
+        if pages:
+            parts.append(head + "\n\n".join(pages))
+            done = len("\n\n".join(parts))
+        if over:
+            break
+    merged = "\n\n".join(parts)
+    if max_chars is not None and len(merged) > max_chars:
+        merged = merged[:max_chars] + "\n[... truncated ...]"
+    return merged
+
+
+# ---------------------------------------------------------------------------
+# Process pool for the async stages
+# ---------------------------------------------------------------------------
+
+def pdf_pool(workers: int | None = None) -> ProcessPoolExecutor:
+    """Pool for extract_pdf_text_async(); one worker per core by default."""
+    return ProcessPoolExecutor(max_workers=workers or os.cpu_count() or 1)
+
+
+async def extract_pdf_text_async(paths: list[Path], max_chars: int | None = None,
+                                 pool: ProcessPoolExecutor | None = None,
+                                 rank: bool = False, backend: str = DEFAULT_BACKEND) -> str:
+    """extract_pdf_text() run in `pool` (the loop's default thread pool if None)."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(pool, extract_pdf_text, list(paths), max_chars,
+                                      rank, backend)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("paths", nargs="+", type=Path, help="PDF files or directories")
+    parser.add_argument("--show", type=int, default=None, metavar="PAGE",
+                        help="Print the cached text of this page (1-based)")
+    parser.add_argument("--backend", choices=list(BACKENDS), default=DEFAULT_BACKEND,
+                        help=f"Text extractor (default: {DEFAULT_BACKEND})")
+    args = parser.parse_args()
+
+    pdfs = []
+    for p in args.paths:
+        pdfs.extend(sorted(p.rglob("*.pdf")) if p.is_dir() else [p])
+    if not pdfs:
+        print("No PDFs found")
+        sys.exit(1)
+
+    texts = _cache(TEXT_NS)
+    suffix = extractor_version(args.backend)
+    for path in pdfs:
+        cached = f"{file_hash(path)}:{suffix}" in texts
+        try:
+            pages = pdf_pages(path, args.backend)
+        except Exception as e:
+            print(f"  {path.name:<40} FAILED: {e}")
+            continue
+        chars = sum(len(t) for t in pages)
+        print(f"  {path.name:<40} {len(pages):>4} pages  {chars:>8,} chars  "
+              f"{'cached' if cached else 'parsed'}")
+        if args.show:
+            print(pages[args.show - 1] if 0 < args.show <= len(pages) else "(no such page)")
+    print(f"{len(pdfs)} PDF(s) — {suffix} → {CACHE_DIR / CACHE_NAME}")
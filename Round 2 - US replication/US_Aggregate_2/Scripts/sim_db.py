@@ -0,0 +1,204 @@
+"""
+sim_db.py  —  DuckDB views over ground truth, simulations and effects
+
+Exposes the pipeline artifacts as DuckDB views so ad-hoc questions are one SQL
+statement instead of another script that re-reads every JSONL:
+
+    studies         Data/Ground_Truth/study_data.jsonl (one row per study)
+    gt_effects      study_data ground_truth.effects, one row per contrast
+    sim_raw         every Data/Simulation/aggregate_simulation_raw*.jsonl,
+                    with a `config` column (Parquet store partitions when
+                    current, see sim_store.py; the JSONL otherwise)
+    effects         every Data/Results/effects_table*.csv, with `config`
+    micro_studies   US_Microdata/Data/Microdata/SORTED DATA - study_enriched_*.jsonl
+
+and derived views:
+
+    arm_means       config × seq_id × arm_id × outcome_id: n, mean, var_pop,
+                    min, max, parse failures
+    study_r         config × seq_id: contrasts, Pearson r(gt_delta, llm_effect),
+                    sign accuracy over comparable contrasts
+    config_r        the same pooled per config
+
+Config names follow sim_store.config_for(): aggregate_simulation_raw.jsonl and
+effects_table.csv are "default", *_{cfg}.* is cfg.
+
+    python sim_db.py --views
+    python sim_db.py "SELECT config, scale_type,
+                             avg((sign(gt_delta) = sign(llm_effect))::INT) AS sign_acc
+                      FROM effects WHERE comparable AND gt_delta <> 0
+                      GROUP BY ALL ORDER BY ALL"
+
+    from sim_db import connect
+    con = connect()
+    con.sql("SELECT * FROM study_r WHERE config = 'default'").show()
+"""
+
+import argparse, re, sys
+from pathlib import Path
+
+from jsonl_io import glob_jsonl, is_compressed
+from sim_store import config_dir, config_for, is_current
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+DATA_DIR   = SCRIPT_DIR.parent / "Data"
+MICRO_DIR  = SCRIPT_DIR.parents[1] / "US_Microdata" / "Data" / "Microdata"
+
+MAX_OBJECT_SIZE = 64 * 1024 * 1024   # study records carry full instrument text
+
+
+def _sql_str(s) -> str:
+    return "'" + str(s).replace("'", "''") + "'"
+
+
+def _read_json(path: Path, columns: dict | None = None) -> str:
+    opts = ""
+    if columns:
+        opts += ", columns={" + ", ".join(f"{_sql_str(k)}: {_sql_str(v)}"
+                                          for k, v in columns.items()) + "}"
+    if is_compressed(path):
+        opts += ", compression='auto_detect'"
+    return (f"read_json({_sql_str(path)}, format='newline_delimited', "
+            f"maximum_object_size={MAX_OBJECT_SIZE}{opts})")
+
+
+# Columns read from raw simulation records; keys a record lacks read as NULL
+SIM_COLUMNS = {
+    "seq_id":     "INTEGER",
+    "arm_id":     "VARCHAR",
+    "outcome_id": "VARCHAR",
+    "value":      "DOUBLE",
+    "parse_ok":   "BOOLEAN",
+    "parser":     "VARCHAR",
+    "error":      "VARCHAR",
+}
+
+
+def _sim_source(raw_path: Path) -> str:
+    """SELECT for one raw file: its Parquet partitions if current, else the JSONL."""
+    if is_current(raw_path):
+        glob = _sql_str(config_dir(raw_path) / "seq_id=*" / "*.parquet")
+        src  = f"read_parquet({glob}, hive_partitioning=true)"
+    else:
+        src  = _read_json(raw_path, SIM_COLUMNS)
+    cols = ", ".join(f"CAST({c} AS {t}) AS {c}" for c, t in SIM_COLUMNS.items())
+    return f"SELECT {_sql_str(config_for(raw_path))} AS config, {cols} FROM {src}"
+
+
+# Columns every effects_table version has, which can still sniff as VARCHAR when
+# a table has few comparable rows
+EFFECT_CASTS = ", ".join(f"TRY_CAST({c} AS DOUBLE) AS {c}" for c in ("gt_delta", "llm_effect"))
+
+
+def _effects_config(path: Path) -> str:
+    m = re.fullmatch(r"effects_table(?:_(.+))?", path.stem)
+    return m.group(1) if m and m.group(1) else "default"
+
+
+ARM_MEANS = """
+CREATE OR REPLACE VIEW arm_means AS
+SELECT config, seq_id, arm_id, outcome_id,
+       count(value)   FILTER (WHERE parse_ok)                 AS n,
+       avg(value)     FILTER (WHERE parse_ok)                 AS mean,
+       var_pop(value) FILTER (WHERE parse_ok)                 AS var_pop,
+       min(value)     FILTER (WHERE parse_ok)                 AS min,
+       max(value)     FILTER (WHERE parse_ok)                 AS max,
+       count(*) FILTER (WHERE NOT parse_ok OR value IS NULL)  AS parse_failures
+FROM sim_raw
+GROUP BY ALL
+"""
+
+STUDY_R = """
+CREATE OR REPLACE VIEW study_r AS
+SELECT config, seq_id, any_value(study_label)            AS study_label,
+       count(*)                                          AS contrasts,
+       corr(gt_delta, llm_effect)                        AS r,
+       avg((sign(gt_delta) = sign(llm_effect))::INTEGER)
+           FILTER (WHERE gt_delta <> 0)                  AS sign_accuracy
+FROM effects
+WHERE comparable
+GROUP BY config, seq_id
+"""
+
+CONFIG_R = """
+CREATE OR REPLACE VIEW config_r AS
+SELECT config,
+       count(*)                                          AS contrasts,
+       count(DISTINCT seq_id)                            AS studies,
+       corr(gt_delta, llm_effect)                        AS r,
+       sqrt(avg((llm_effect - gt_delta) ^ 2))            AS rmse,
+       avg((sign(gt_delta) = sign(llm_effect))::INTEGER)
+           FILTER (WHERE gt_delta <> 0)                  AS sign_accuracy
+FROM effects
+WHERE comparable
+GROUP BY config
+"""
+
+
+def connect(data_dir: Path = DATA_DIR, micro_dir: Path = MICRO_DIR, database: str = ":memory:"):
+    """DuckDB connection with every view whose source files exist."""
+    try:
+        import duckdb
+    except ImportError:
+        raise ImportError("sim_db.py needs duckdb (pip install duckdb)") from None
+    con = duckdb.connect(database)
+
+    studies = glob_jsonl(data_dir / "Ground_Truth", "study_data")
+    if studies:
+        con.execute(f"CREATE OR REPLACE VIEW studies AS SELECT * FROM {_read_json(studies[0])}")
+        con.execute("""
+            CREATE OR REPLACE VIEW gt_effects AS
+            SELECT seq_id, title, unnest(ground_truth.effects, recursive := true)
+            FROM studies""")
+
+    raws = glob_jsonl(data_dir / "Simulation", "aggregate_simulation_raw*")
+    if raws:
+        con.execute("CREATE OR REPLACE VIEW sim_raw AS "
+                    + " UNION ALL ".join(_sim_source(p) for p in raws))
+        con.execute(ARM_MEANS)
+
+    csvs = sorted((data_dir / "Results").glob("effects_table*.csv"))
+    if csvs:
+        con.execute("CREATE OR REPLACE VIEW effects AS " + " UNION ALL BY NAME ".join(
+            f"SELECT {_sql_str(_effects_config(p))} AS config, * REPLACE ({EFFECT_CASTS}) "
+            f"FROM read_csv({_sql_str(p)}, header=true)" for p in csvs))
+        con.execute(STUDY_R)
+        con.execute(CONFIG_R)
+
+    micro = glob_jsonl(micro_dir, "SORTED DATA - study_enriched_*")
+    if micro:
+        con.execute(f"""
+            CREATE OR REPLACE VIEW micro_studies AS
+            SELECT seq_id, rct_id, simulation_tier,
+                   provenance.registry.title AS title,
+                   * EXCLUDE (seq_id, rct_id, simulation_tier)
+            FROM {_read_json(micro[0])}""")
+    return con
+
+
+def views(con) -> list[str]:
+    return [r[0] for r in con.execute(
+        "SELECT view_name FROM duckdb_views() WHERE NOT internal ORDER BY view_name").fetchall()]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("sql", nargs="?", help="SQL statement to run")
+    parser.add_argument("--views", action="store_true", help="List views and their columns")
+    parser.add_argument("--csv", type=Path, default=None, help="Write the result to a CSV file")
+    args = parser.parse_args()
+
+    con = connect()
+    if args.views or not args.sql:
+        for name in views(con):
+            cols = con.execute(f"DESCRIBE {name}").fetchall()
+            print(f"{name}: " + ", ".join(c[0] for c in cols))
+        sys.exit(0)
+
+    rel = con.sql(args.sql)
+    if args.csv:
+        rel.write_csv(str(args.csv))
+        print(f"Wrote {rel.shape[0]} rows → {args.csv}")
+    else:
+        rel.show(max_rows=200, max_width=200)
@@ -0,0 +1,191 @@
+"""
+sim_stats.py  —  Constant-memory per-cell summaries of simulation records
+
+Keeps one Welford accumulator (n, mean, M2) per (seq_id, arm_id, outcome_id)
+cell, plus the cell's min / max value and parse-failure count, so arm means and
+variances can be computed while records stream past instead of collecting
+every value in memory.  (n, mean, M2) carries the same information as
+(count, sum, sum of squares) without the cancellation error in the variance.
+
+Every writer of a raw file saves the table next to it, keyed by the config
+the raw file belongs to:
+    aggregate_simulation_raw.jsonl  →  aggregate_simulation_raw.stats.json
+
+    03_unpack_batches.py     rebuilt from the records it unpacks
+    02_simulate.py           rebuilt from the records of an async run / download
+    02b_simulate_178_patch   updated in place for the appended records only:
+
+        with appending(OUTPUT_PATH) as stats, open(OUTPUT_PATH, "a") as f:
+            for rec in records:
+                f.write(json.dumps(rec) + "\n")
+                stats.add(rec)
+
+04_compare_effects.py reads the table instead of re-reading the raw file.  The
+table records the size and mtime of the raw file it describes; if the raw file
+has changed behind its back the table is ignored and the raw file is streamed
+again.
+"""
+
+import json
+from contextlib import contextmanager
+from pathlib import Path
+
+from jsonl_io import jsonl_stem, open_text
+
+STATS_VERSION = 2
+
+
+def stats_path(raw_path: Path) -> Path:
+    return raw_path.with_name(jsonl_stem(raw_path) + ".stats.json")
+
+
+class SimStats:
+    """Streaming per-cell mean / population variance of parsed values."""
+
+    def __init__(self):
+        self.cells: dict[tuple, list] = {}   # key → [n, mean, M2]
+        self.extrema:  dict[tuple, list] = {}   # key → [min, max]
+        self.failures: dict[tuple, int]  = {}   # key → parse failures
+        self.records        = 0
+        self.api_errors     = 0
+        self.parse_failures = 0
+
+    def add(self, rec: dict) -> None:
+        self.records += 1
+        if rec.get("error"):
+            self.api_errors += 1
+        if not rec["parse_ok"] or rec["value"] is None:
+            self.parse_failures += 1
+            key = (rec["seq_id"], rec["arm_id"], rec["outcome_id"])
+            self.failures[key] = self.failures.get(key, 0) + 1
+            return
+        self.add_value((rec["seq_id"], rec["arm_id"], rec["outcome_id"]), rec["value"])
+
+    def add_value(self, key: tuple, x: float) -> None:
+        acc = self.cells.get(key)
+        if acc is None:
+            acc = self.cells[key] = [0, 0.0, 0.0]
+            self.extrema[key] = [x, x]
+        else:
+            ext = self.extrema[key]
+            if x < ext[0]: ext[0] = x
+            if x > ext[1]: ext[1] = x
+        acc[0] += 1
+        delta   = x - acc[1]
+        acc[1] += delta / acc[0]
+        acc[2] += delta * (x - acc[1])
+
+    def merge(self, other: "SimStats") -> None:
+        """Fold another accumulator set into this one (Chan et al. update)."""
+        self.records        += other.records
+        self.api_errors     += other.api_errors
+        self.parse_failures += other.parse_failures
+        for key, f in other.failures.items():
+            self.failures[key] = self.failures.get(key, 0) + f
+        for key, (nb, mb, m2b) in other.cells.items():
+            acc = self.cells.get(key)
+            lo, hi = other.extrema[key]
+            if acc is None:
+                self.cells[key]   = [nb, mb, m2b]
+                self.extrema[key] = [lo, hi]
+                continue
+            ext    = self.extrema[key]
+            ext[0] = min(ext[0], lo)
+            ext[1] = max(ext[1], hi)
+            na, ma, m2a = acc
+            n      = na + nb
+            delta  = mb - ma
+            acc[0] = n
+            acc[1] = ma + delta * nb / n
+            acc[2] = m2a + m2b + delta * delta * na * nb / n
+
+    def means(self) -> dict[tuple, float]:
+        return {k: mean for k, (_, mean, _) in self.cells.items()}
+
+    def variances(self) -> dict[tuple, float]:
+        """Population variance (ddof=0), matching np.var."""
+        return {k: m2 / n for k, (n, _, m2) in self.cells.items()}
+
+    def counts(self) -> dict[tuple, int]:
+        return {k: n for k, (n, _, _) in self.cells.items()}
+
+    # -- persistence ---------------------------------------------------------
+
+    def save(self, raw_path: Path) -> Path:
+        from sim_store import config_for
+        st   = raw_path.stat()
+        out  = stats_path(raw_path)
+        rows = []
+        for k in sorted(self.cells.keys() | self.failures.keys()):
+            n, mean, m2 = self.cells.get(k, (0, 0.0, 0.0))
+            lo, hi      = self.extrema.get(k, (None, None))
+            rows.append([*k, n, mean, m2, lo, hi, self.failures.get(k, 0)])
+        out.write_text(json.dumps({
+            "version":         STATS_VERSION,
+            "config":          config_for(raw_path),
+            "source":          raw_path.name,
+            "source_size":     st.st_size,
+            "source_mtime_ns": st.st_mtime_ns,
+            "records":         self.records,
+            "api_errors":      self.api_errors,
+            "parse_failures":  self.parse_failures,
+            # seq_id, arm_id, outcome_id, n, mean, M2, min, max, parse failures
+            "cells":           rows,
+        }) + "\n")
+        return out
+
+    @classmethod
+    def load(cls, raw_path: Path) -> "SimStats | None":
+        """Saved summary for raw_path, or None if missing or stale."""
+        path = stats_path(raw_path)
+        if not path.exists() or not raw_path.exists():
+            return None
+        try:
+            data = json.loads(path.read_text())
+        except json.JSONDecodeError:
+            return None
+        st = raw_path.stat()
+        if (data.get("version") != STATS_VERSION
+                or data.get("source_size") != st.st_size
+                or data.get("source_mtime_ns") != st.st_mtime_ns):
+            return None
+        stats = cls()
+        stats.records        = data["records"]
+        stats.api_errors     = data["api_errors"]
+        stats.parse_failures = data["parse_failures"]
+        for seq_id, arm_id, outcome_id, n, mean, m2, lo, hi, fails in data["cells"]:
+            key = (seq_id, arm_id, outcome_id)
+            if n:
+                stats.cells[key]   = [n, mean, m2]
+                stats.extrema[key] = [lo, hi]
+            if fails:
+                stats.failures[key] = fails
+        return stats
+
+    @classmethod
+    def from_file(cls, raw_path: Path) -> "SimStats":
+        """Stream a raw simulation JSONL file."""
+        stats = cls()
+        with open_text(raw_path) as f:
+            for line in f:
+                if line.strip():
+                    stats.add(json.loads(line))
+        return stats
+
+
+@contextmanager
+def appending(raw_path: Path):
+    """Yield a SimStats to add() the records being appended to raw_path; on
+    exit the saved table is updated with them.  If there was no current table
+    to update, it is rebuilt from the (now appended) raw file instead."""
+    if raw_path.exists() and raw_path.stat().st_size:
+        base = SimStats.load(raw_path)
+    else:
+        base = SimStats()
+    added = SimStats()
+    yield added
+    if base is None:
+        base = SimStats.from_file(raw_path)
+    else:
+        base.merge(added)
+    base.save(raw_path)
@@ -0,0 +1,194 @@
+"""
+sim_store.py  —  Partitioned Parquet store for per-respondent simulation records
+
+Complements the raw JSONL files with a columnar copy that compare / plot steps
+can read without decoding every record (and its response text):
+
+    Data/Simulation/aggregate_simulation_raw.jsonl
+        → Data/Simulation/sim_store/config=default/seq_id=178/part-0.parquet
+    Data/Microdata/simulation_raw_no_reasoning.jsonl
+        → Data/Microdata/sim_store/config=no_reasoning/seq_id=20/part-0.parquet
+
+Columns: arm_id / outcome_id / parser are dictionary-encoded, value is float64,
+parse_ok is bool.  The raw text columns (response, error, pid) are written
+with their own, heavier compression; a reader that asks only for
+(seq_id, arm_id, outcome_id, value) never touches their bytes, and a seq_id
+filter only opens the matching partition directories.
+
+Each config directory records the size and mtime of the JSONL file it was
+built from (_source.json); read_cell_values() returns None when the store is
+missing, stale or pyarrow is not installed, and callers fall back to the JSONL.
+
+03_unpack_batches.py refreshes the store after every unpack / re-parse.  Other
+raw files can be exported by hand:
+
+    python sim_store.py Data/Microdata/simulation_raw_no_reasoning.jsonl
+"""
+
+import argparse, importlib.util, json, shutil, sys
+from pathlib import Path
+
+from jsonl_io import jsonl_stem, open_text
+
+STORE_NAME = "sim_store"
+CHUNK_ROWS = 50_000
+
+_TEXT_COLUMNS = ("pid", "response", "error")
+
+
+def config_for(raw_path: Path) -> str:
+    """aggregate_simulation_raw.jsonl → "default", simulation_raw_{cfg}.jsonl → cfg."""
+    stem = jsonl_stem(raw_path)
+    for prefix in ("aggregate_simulation_raw", "simulation_raw"):
+        if stem.startswith(prefix):
+            return stem[len(prefix):].lstrip("_") or "default"
+    return stem
+
+
+def config_dir(raw_path: Path) -> Path:
+    return raw_path.parent / STORE_NAME / f"config={config_for(raw_path)}"
+
+
+def _schema():
+    import pyarrow as pa
+    dict_str = pa.dictionary(pa.int32(), pa.string())
+    return pa.schema([
+        ("row",           pa.int64()),            # line ordinal in the JSONL
+        ("seq_id",        pa.int32()),
+        ("arm_id",        dict_str),
+        ("outcome_id",    dict_str),
+        ("value",         pa.float64()),
+        ("parse_ok",      pa.bool_()),
+        ("parser",        dict_str),
+        ("prompt_tokens", pa.int32()),
+        ("cached_tokens", pa.int32()),
+        ("pid",           pa.string()),
+        ("response",      pa.string()),
+        ("error",         pa.string()),
+    ])
+
+
+def _batches(raw_path: Path, schema):
+    import pyarrow as pa
+    cols = {name: [] for name in schema.names}
+    with open_text(raw_path) as f:
+        for row, line in enumerate(f):
+            if not line.strip():
+                continue
+            rec = json.loads(line)
+            rec["row"] = row
+            for name, vals in cols.items():
+                vals.append(rec.get(name))
+            if len(cols["seq_id"]) >= CHUNK_ROWS:
+                yield pa.RecordBatch.from_pydict(cols, schema=schema)
+                cols = {name: [] for name in schema.names}
+    if cols["seq_id"]:
+        yield pa.RecordBatch.from_pydict(cols, schema=schema)
+
+
+def export_jsonl(raw_path: Path) -> Path:
+    """(Re)build the config partition for raw_path; returns its directory."""
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+
+    out    = config_dir(raw_path)
+    schema = _schema()
+    if out.exists():
+        shutil.rmtree(out)
+
+    fmt     = ds.ParquetFileFormat()
+    options = fmt.make_write_options(
+        compression={name: ("zstd" if name in _TEXT_COLUMNS else "snappy")
+                     for name in schema.names if name != "seq_id"},
+        use_dictionary=["arm_id", "outcome_id", "parser"],
+    )
+    ds.write_dataset(
+        _batches(raw_path, schema), out, schema=schema, format=fmt,
+        file_options=options,
+        partitioning=ds.partitioning(pa.schema([("seq_id", pa.int32())]), flavor="hive"),
+        basename_template="part-{i}.parquet",
+        existing_data_behavior="overwrite_or_ignore",
+        use_threads=False,                      # keep file order within a partition
+    )
+    st = raw_path.stat()
+    (out / "_source.json").write_text(json.dumps({
+        "source":          raw_path.name,
+        "source_size":     st.st_size,
+        "source_mtime_ns": st.st_mtime_ns,
+    }) + "\n")
+    return out
+
+
+def refresh(raw_path: Path) -> Path | None:
+    """export_jsonl() if pyarrow is installed, else None (the store is optional)."""
+    if importlib.util.find_spec("pyarrow") is None:
+        return None
+    return export_jsonl(raw_path)
+
+
+def is_current(raw_path: Path) -> bool:
+    meta = config_dir(raw_path) / "_source.json"
+    if not meta.exists() or not raw_path.exists():
+        return False
+    data = json.loads(meta.read_text())
+    st   = raw_path.stat()
+    return (data.get("source_size") == st.st_size
+            and data.get("source_mtime_ns") == st.st_mtime_ns)
+
+
+def read_table(raw_path: Path, columns: list[str], seq_ids=None,
+               parsed_only: bool = True):
+    """Arrow table with only `columns`, only the seq_id partitions asked for,
+    or None if the store cannot be used (fall back to the JSONL)."""
+    try:
+        import pyarrow as pa
+        import pyarrow.dataset as ds
+    except ImportError:
+        return None
+    if not is_current(raw_path):
+        return None
+
+    dataset = ds.dataset(
+        config_dir(raw_path), format="parquet",
+        partitioning=ds.partitioning(pa.schema([("seq_id", pa.int32())]), flavor="hive"),
+        exclude_invalid_files=True,
+    )
+    flt = None
+    if parsed_only:
+        flt = ds.field("parse_ok") & ds.field("value").is_valid()
+    if seq_ids is not None:
+        sel = ds.field("seq_id").isin(sorted(seq_ids))
+        flt = sel if flt is None else flt & sel
+    return dataset.to_table(columns=columns, filter=flt)
+
+
+def read_cell_values(raw_path: Path, seq_ids=None) -> dict[tuple, list] | None:
+    """{(seq_id, arm_id, outcome_id): [values]} for parsed records, or None.
+
+    Keys and values come back in JSONL order, as if the file had been read."""
+    tbl = read_table(raw_path, ["row", "seq_id", "arm_id", "outcome_id", "value"],
+                     seq_ids)
+    if tbl is None:
+        return None
+    tbl = tbl.sort_by("row")
+    cells: dict[tuple, list] = {}
+    cols = tbl.to_pydict()
+    for seq_id, arm_id, outcome_id, value in zip(
+            cols["seq_id"], cols["arm_id"], cols["outcome_id"], cols["value"]):
+        cells.setdefault((seq_id, arm_id, outcome_id), []).append(value)
+    return cells
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("raw", nargs="+", type=Path, help="Raw simulation JSONL file(s)")
+    args = parser.parse_args()
+
+    for raw_path in args.raw:
+        if not raw_path.exists():
+            print(f"Not found: {raw_path}")
+            sys.exit(1)
+        out = export_jsonl(raw_path)
+        n   = len(list(out.rglob("*.parquet")))
+        print(f"{raw_path.name} → {out}  ({n} partition file(s))")
@@ -1,3 +1,4 @@
+import importlib.util
 import json
 import re
 import subprocess
@@ -12,7 +13,15 @@ import pyreadstat
 
 
 ROOT        = Path(__file__).resolve().parent          # Scripts/Microdata/
-DESIGN_PATH = ROOT / "design_specs_enriched.jsonl"
+
+# Compressed-JSONL helpers from the aggregate pipeline (US_Aggregate_2/Scripts)
+_io_spec = importlib.util.spec_from_file_location(
+    "jsonl_io", ROOT.parents[2] / "US_Aggregate_2" / "Scripts" / "jsonl_io.py"
+)
+jsonl_io = importlib.util.module_from_spec(_io_spec)
+_io_spec.loader.exec_module(jsonl_io)
+
+DESIGN_PATH = jsonl_io.resolve(ROOT / "design_specs_enriched.jsonl")   # or .jsonl.zst / .gz
 OUTPUT_PATH = ROOT.parents[1] / "Data" / "Microdata" / "study_enriched_requested.jsonl"
 
 SELECTED_IDS = [
@@ -24,8 +33,7 @@ SELECTED_IDS = [
 
 def load_designs():
     out = {}
-    for line in DESIGN_PATH.read_text().splitlines():
-        obj = json.loads(line)
+    for obj in jsonl_io.iter_jsonl(DESIGN_PATH):
         out[obj["seq_id"]] = obj
     return out
 
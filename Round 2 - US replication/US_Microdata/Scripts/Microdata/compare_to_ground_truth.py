@@ -18,12 +18,23 @@ seq=52 : arm labels match, GT out1         — ceiling effect flagged
 seq=53 : arm labels don't match GT         — marked NOT_COMPARABLE
 """
 
-import argparse, csv, json
+import argparse, csv, importlib.util, json, sys
 from collections import defaultdict
 from pathlib import Path
 from scipy import stats
 
 DATA_DIR = Path(__file__).resolve().parents[2] / "Data" / "Microdata"
+
+# Parquet store reader from the aggregate pipeline (US_Aggregate_2/Scripts)
+_AGG_SCRIPTS = Path(__file__).resolve().parents[3] / "US_Aggregate_2" / "Scripts"
+sys.path.insert(0, str(_AGG_SCRIPTS))   # sim_store imports jsonl_io from there
+_store_spec  = importlib.util.spec_from_file_location(
+    "sim_store", _AGG_SCRIPTS / "sim_store.py"
+)
+_store = importlib.util.module_from_spec(_store_spec)
+_store_spec.loader.exec_module(_store)
+
+read_cell_values = _store.read_cell_values
 GT_PATH  = DATA_DIR / "SORTED DATA - study_enriched_tier1and2_tagged.jsonl"
 
 parser = argparse.ArgumentParser()
@@ -54,7 +65,13 @@ STUDY_LABELS = {
 # ---------------------------------------------------------------------------
 
 def load_sim(path):
-    """Returns {(seq_id, arm_id, outcome_id): [values]}"""
+    """Returns {(seq_id, arm_id, outcome_id): [values]}
+
+    Reads only the value columns from the Parquet store (sim_store.py) when it
+    is current for `path`; otherwise decodes the JSONL."""
+    cells = read_cell_values(path, seq_ids=set(STUDY_LABELS))
+    if cells is not None:
+        return defaultdict(list, cells)
     sums = defaultdict(list)
     for line in open(path):
         r = json.loads(line)
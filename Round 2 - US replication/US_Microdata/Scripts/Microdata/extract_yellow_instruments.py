@@ -10,12 +10,13 @@ Run from this script's directory:
 """
 
 import asyncio
+import importlib.util
 import json
 import os
 import re
+import sys
 from pathlib import Path
 
-import pdfplumber
 from openai import AsyncOpenAI
 
 # ---------------------------------------------------------------------------
@@ -27,6 +28,15 @@ PAPERS_DIR   = SCRIPTS_DIR.parents[3] / "llm-simulations-local" / "Papers"
 TRACK1_JSONL = DATA_DIR / "SORTED DATA - study_enriched_tier1and2_tagged.jsonl"
 OUTPUT       = DATA_DIR / "yellow_instruments.jsonl"
 
+# Cached PDF text extraction from the aggregate pipeline (US_Aggregate_2/Scripts)
+_AGG_SCRIPTS = SCRIPTS_DIR.parents[2] / "US_Aggregate_2" / "Scripts"
+sys.path.insert(0, str(_AGG_SCRIPTS))   # pdf_text imports kv_cache from there
+_pdf_spec    = importlib.util.spec_from_file_location(
+    "pdf_text", _AGG_SCRIPTS / "pdf_text.py"
+)
+_pdf = importlib.util.module_from_spec(_pdf_spec)
+_pdf_spec.loader.exec_module(_pdf)
+
 MODEL        = "gpt-5.4-mini"
 MAX_PDF_CHARS = 80_000
 
@@ -76,13 +86,8 @@ def load_track1_records() -> dict:
 # ---------------------------------------------------------------------------
 
 def extract_pdf_text(path: Path) -> str:
-    pages = []
     try:
-        with pdfplumber.open(path) as pdf:
-            for page in pdf.pages:
-                text = page.extract_text()
-                if text:
-                    pages.append(text)
+        pages = [t for t in _pdf.pdf_pages(path) if t]
     except Exception as e:
         return f"[PDF extraction failed: {e}]"
     full = "\n\n".join(pages)
@@ -18,7 +18,7 @@ Usage:
     python simulate_experiments.py --mode async --config no_reasoning [--n 100]
 """
 
-import argparse, asyncio, io, json, re, time, uuid
+import argparse, asyncio, importlib.util, io, json, re, time, uuid
 from pathlib import Path
 from collections import defaultdict
 from tqdm import tqdm
@@ -27,6 +27,27 @@ from openai import AsyncOpenAI, OpenAI
 DATA_DIR = Path(__file__).resolve().parents[2] / "Data" / "Microdata"
 MODEL    = "gpt-5.1"
 
+# Shared parse memo from the aggregate pipeline (US_Aggregate_2/Scripts)
+_AGG_SCRIPTS = Path(__file__).resolve().parents[3] / "US_Aggregate_2" / "Scripts"
+_memo_spec   = importlib.util.spec_from_file_location(
+    "parse_memo", _AGG_SCRIPTS / "parse_memo.py"
+)
+_memo = importlib.util.module_from_spec(_memo_spec)
+_memo_spec.loader.exec_module(_memo)
+
+memoized        = _memo.memoized
+memo_stats_line = _memo.memo_stats_line
+
+# Compact custom_id codec + manifest, shared with the aggregate pipeline
+_ids_spec = importlib.util.spec_from_file_location(
+    "custom_ids", _AGG_SCRIPTS / "custom_ids.py"
+)
+_ids = importlib.util.module_from_spec(_ids_spec)
+_ids_spec.loader.exec_module(_ids)
+
+CustomIdCodec = _ids.CustomIdCodec
+ID_MANIFEST   = DATA_DIR / _ids.MANIFEST_NAME
+
 # ---------------------------------------------------------------------------
 # Batch configurations
 # ---------------------------------------------------------------------------
@@ -92,10 +113,10 @@ def parse_choice_ab(text: str) -> float | None:
     return None
 
 PARSERS = {
-    "binary":      parse_binary,
-    "dollar_0_3":  parse_dollar_0_3,
-    "percent":     parse_percent,
-    "choice_ab":   parse_choice_ab,
+    "binary":      memoized(parse_binary),
+    "dollar_0_3":  memoized(parse_dollar_0_3),
+    "percent":     memoized(parse_percent),
+    "choice_ab":   memoized(parse_choice_ab),
 }
 
 # ---------------------------------------------------------------------------
@@ -607,6 +628,7 @@ def print_summary(records: list[dict]):
             sums[(r["seq_id"], r["outcome_id"], r["arm_id"])].append(r["value"])
     failures = sum(1 for r in records if not r["parse_ok"])
     print(f"\n── Simulated arm means ({len(records)} records, {failures} parse failures) ──")
+    print(f"  {memo_stats_line()}")
     for (seq_id, out_id, arm_id), vals in sorted(sums.items()):
         print(f"  seq={seq_id} {out_id:<15} {arm_id:<45} "
               f"mean={sum(vals)/len(vals):.4f}  n={len(vals)}")
@@ -643,7 +665,9 @@ async def run_async(n_per_arm: int, cfg_name: str):
 # Batch mode
 # ---------------------------------------------------------------------------
 
-def build_batch_requests(n_per_arm: int, model_params: dict) -> list[dict]:
+def build_batch_requests(n_per_arm: int, model_params: dict,
+                         cfg_name: str) -> list[dict]:
+    codec    = CustomIdCodec(ID_MANIFEST, cfg_name)
     requests = []
     for seq_id, config in STUDY_CONFIGS.items():
         for arm_id in config["arms"]:
@@ -651,7 +675,7 @@ def build_batch_requests(n_per_arm: int, model_params: dict) -> list[dict]:
                 prompt = build_prompt(config, arm_id, outcome)
                 for i in range(n_per_arm):
                     requests.append({
-                        "custom_id": f"{seq_id}__{arm_id}__{outcome['id']}__{i}",
+                        "custom_id": codec.encode(seq_id, arm_id, outcome["id"], i),
                         "method": "POST",
                         "url": "/v1/chat/completions",
                         "body": {
@@ -663,6 +687,7 @@ def build_batch_requests(n_per_arm: int, model_params: dict) -> list[dict]:
                             ],
                         },
                     })
+    codec.close()
     return requests
 
 
@@ -670,7 +695,7 @@ def submit_batch(n_per_arm: int, cfg_name: str) -> str:
     cfg          = BATCH_CONFIGS[cfg_name]
     model_params = cfg["model_params"]
     client       = OpenAI()
-    requests     = build_batch_requests(n_per_arm, model_params)
+    requests     = build_batch_requests(n_per_arm, model_params, cfg_name)
     print(f"{cfg['label']}  |  {len(requests)} requests …")
 
     content  = "\n".join(json.dumps(r) for r in requests).encode()
@@ -709,15 +734,13 @@ def download_batch(batch_id: str, cfg_name: str):
         raise RuntimeError(f"Batch {batch_id}: 0 successes, {counts.failed} failures. See error samples above.")
 
     raw     = client.files.content(batch.output_file_id).text
+    codec   = CustomIdCodec(ID_MANIFEST, cfg_name)
     records = []
     for line in raw.splitlines():
         if not line.strip():
             continue
         r      = json.loads(line)
-        parts  = r["custom_id"].split("__")
-        seq_id = int(parts[0])
-        out_id = parts[-2]
-        arm_id = "__".join(parts[1:-2])
+        seq_id, arm_id, out_id, _, _ = codec.decode(r["custom_id"])
         config  = STUDY_CONFIGS[seq_id]
         outcome = next(o for o in config["outcomes"] if o["id"] == out_id)
 
@@ -734,6 +757,7 @@ def download_batch(batch_id: str, cfg_name: str):
                              "pid": r["custom_id"], "response": text,
                              "value": value, "parse_ok": value is not None,
                              "batch_cfg": cfg_name})
+    codec.close()
 
     out.parent.mkdir(parents=True, exist_ok=True)
     with open(out, "w") as f: